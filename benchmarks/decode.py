@@ -0,0 +1,113 @@
+"""Listing page decoding benchmark.
+
+Compares decode_icon_page against validating pages with the pydantic
+IconResponse model, on synthetic pages shaped like API responses:
+time to parse and decode, and memory held by the decoded icons.
+"""
+
+import gc
+import json
+import statistics
+import time
+import tracemalloc
+from typing import Any, Callable
+
+import click
+
+from icons8_download_cli.models import IconResponse, decode_icon_page
+
+
+def decode_with_pydantic(data: Any) -> list[Any]:
+    """Decode a page with the pydantic models."""
+    return IconResponse.model_validate(data).icons
+
+
+def decode_compact(data: Any) -> list[Any]:
+    """Decode a page with decode_icon_page."""
+    return decode_icon_page(data).icons
+
+
+DECODERS: dict[str, Callable[[Any], list[Any]]] = {
+    "pydantic": decode_with_pydantic,
+    "decode_icon_page": decode_compact,
+}
+
+
+def build_pages(icons: int, page_size: int) -> list[bytes]:
+    """Encode synthetic listing pages with the fields the API returns."""
+    pages = []
+    for offset in range(0, icons, page_size):
+        entries = [
+            {
+                "id": f"icon{index:07d}",
+                "name": f"icon name {index}",
+                "commonName": f"icon-name-{index}",
+                "category": "Benchmark",
+                "platform": "ios",
+                "isColor": index % 2 == 0,
+                "isExplicit": False,
+                "sourceFormat": "svg",
+            }
+            for index in range(offset, min(icons, offset + page_size))
+        ]
+        pages.append(json.dumps({"success": True, "icons": entries}).encode("utf-8"))
+    return pages
+
+
+def measure_time(
+    decoder: Callable[[Any], list[Any]],
+    pages: list[bytes],
+    repeat: int,
+) -> tuple[float, float]:
+    """Median seconds to parse and decode all pages, and to decode only."""
+    parsed = [json.loads(page) for page in pages]
+    total_times = []
+    decode_times = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        for page in pages:
+            decoder(json.loads(page))
+        total_times.append(time.perf_counter() - started_at)
+
+        started_at = time.perf_counter()
+        for data in parsed:
+            decoder(data)
+        decode_times.append(time.perf_counter() - started_at)
+    return statistics.median(total_times), statistics.median(decode_times)
+
+
+def measure_memory(decoder: Callable[[Any], list[Any]], pages: list[bytes]) -> int:
+    """Bytes still allocated by the decoded icons once the pages are dropped."""
+    gc.collect()
+    tracemalloc.start()
+    icons = []
+    for page in pages:
+        icons.extend(decoder(json.loads(page)))
+    gc.collect()
+    retained, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del icons
+    return retained
+
+
+@click.command()
+@click.option("--icons", type=click.IntRange(min=1), default=200_000, help="Icons to decode (default: 200000)")
+@click.option("--page-size", type=click.IntRange(min=1), default=100, help="Icons per page (default: 100)")
+@click.option("--repeat", type=click.IntRange(min=1), default=5, help="Timed runs, median kept (default: 5)")
+def main(icons: int, page_size: int, repeat: int) -> None:
+    """Compare listing page decoders."""
+    pages = build_pages(icons, page_size)
+    click.echo(f"{icons} icons in {len(pages)} pages of {page_size}\n")
+    click.echo(f"{'decoder':>18} {'parse+decode':>13} {'decode only':>12} {'icons/s':>12} {'retained':>10}")
+
+    for name, decoder in DECODERS.items():
+        total, decode_only = measure_time(decoder, pages, repeat)
+        retained = measure_memory(decoder, pages)
+        click.echo(
+            f"{name:>18} {total * 1000:>10.0f} ms {decode_only * 1000:>9.0f} ms "
+            f"{icons / total:>12,.0f} {retained / 1024 / 1024:>7.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Derived sizes benchmark.
+
+Downloads every requested size of a style from the stand-in server (serving
+real PNGs) the usual way, then again with --derive-sizes, which fetches the
+largest size only and resizes it locally in a process pool. Reports files
+per second, image requests sent and the time of the download and resize
+phases.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+import click
+
+from run import scan_files
+from server import ServerConfig, StandInServer
+
+STYLE = "ios"
+
+
+def run_case(
+    server: StandInServer,
+    sizes: str,
+    workers: int,
+    extra_options: list[str],
+) -> dict:
+    """Run the CLI once in a fresh directory and measure it."""
+    with tempfile.TemporaryDirectory(prefix="icons8-derive-") as temp:
+        target_directory = Path(temp) / "icons"
+        stats_path = Path(temp) / "stats.json"
+        env = dict(
+            os.environ,
+            TMPDIR=temp,
+            ICONS8_API_BASE_URL=server.api_url,
+            ICONS8_DOWNLOAD_BASE_URL=server.download_url,
+        )
+        command = [
+            sys.executable,
+            "-c",
+            "from icons8_download_cli.cli import main; main()",
+            "download",
+            "--style",
+            STYLE,
+            "--size",
+            sizes,
+            "--workers",
+            str(workers),
+            "--target-directory",
+            str(target_directory),
+            "--no-cache",
+            "--no-resume",
+            "--progress",
+            "none",
+            "--stats-json",
+            str(stats_path),
+            *extra_options,
+        ]
+        requests_before = server.requests
+        started_at = time.perf_counter()
+        subprocess.run(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        wall_seconds = time.perf_counter() - started_at
+        files, _ = scan_files(target_directory)
+        phases = json.loads(stats_path.read_text(encoding="utf-8"))["phases_seconds"]
+    return {
+        "wall_seconds": wall_seconds,
+        "files": files,
+        "requests": server.requests - requests_before,
+        "download_seconds": phases.get("download", 0.0),
+        "resize_seconds": phases.get("resize"),
+    }
+
+
+@click.command()
+@click.option("--icons", type=click.IntRange(min=1), default=1000, help="Icons in the catalog (default: 1000)")
+@click.option("--sizes", default="24,48,96,192,512", help="Sizes to get (default: 24,48,96,192,512)")
+@click.option("--latency-ms", type=float, default=20.0, help="Delay the server adds to every response (default: 20)")
+@click.option("--workers", type=click.IntRange(min=1), default=16, help="Download workers (default: 16)")
+@click.option(
+    "--resize-workers",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Resize worker processes (default: number of CPUs)",
+)
+def main(icons: int, sizes: str, latency_ms: float, workers: int, resize_workers: Optional[int]) -> None:
+    """Compare fetching every size with deriving the smaller ones locally."""
+    derive_options = ["--derive-sizes"]
+    if resize_workers is not None:
+        derive_options += ["--resize-workers", str(resize_workers)]
+    cases = [("network, every size", []), ("derived from largest", derive_options)]
+
+    config = ServerConfig(icons=icons, latency_ms=latency_ms, png=True)
+    with StandInServer(config) as server:
+        # Render the served PNGs before anything is timed
+        for size in sizes.split(","):
+            server.image("warm-up", size.strip())
+
+        click.echo(f"{icons} icons x sizes {sizes}, {latency_ms:g} ms latency, {workers} download workers\n")
+        click.echo(
+            f"{'case':>22} {'wall':>8} {'files':>7} {'files/s':>9} {'requests':>9} "
+            f"{'download':>9} {'resize':>8}"
+        )
+        for name, options in cases:
+            result = run_case(server, sizes, workers, options)
+            resize = f"{result['resize_seconds']:.2f} s" if result["resize_seconds"] is not None else "-"
+            click.echo(
+                f"{name:>22} {result['wall_seconds']:>6.2f} s {result['files']:>7} "
+                f"{result['files'] / result['wall_seconds']:>9,.0f} {result['requests']:>9} "
+                f"{result['download_seconds']:>7.2f} s {resize:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Library-level benchmark scenarios, run in a child process by run.py.
+
+Prints one JSON object with the work done and per-phase timings.
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+import click
+from rich.progress import Progress
+
+from icons8_download_cli.api import fetch_all_icons
+from icons8_download_cli.client import HttpClient
+from icons8_download_cli.downloader import DownloadJob, download_jobs, resolve_filenames
+
+
+@click.command()
+@click.argument("scenario", type=click.Choice(["listing", "download"]))
+@click.option("--target-directory", type=click.Path(path_type=Path), required=True)
+@click.option("--style", default="ios")
+@click.option("--size", type=int, default=48)
+@click.option("--workers", type=int, default=8)
+@click.option("--list-concurrency", type=int, default=4)
+def main(
+    scenario: str,
+    target_directory: Path,
+    style: str,
+    size: int,
+    workers: int,
+    list_concurrency: int,
+) -> None:
+    """Run one library scenario against the server in ICONS8_API_BASE_URL."""
+    client = HttpClient(pool_size=max(workers, list_concurrency))
+    result: dict[str, object] = {"scenario": scenario}
+
+    started_at = time.perf_counter()
+    icons = fetch_all_icons(style, use_cache=False, concurrency=list_concurrency, client=client)
+    result["listing_seconds"] = time.perf_counter() - started_at
+    result["icons"] = len(icons)
+
+    if scenario == "download":
+        target_directory.mkdir(parents=True, exist_ok=True)
+        started_at = time.perf_counter()
+        filename_map = resolve_filenames(icons, target_directory)
+        with Progress(disable=True) as progress:
+            task_id = progress.add_task("download", total=len(icons))
+            successful, failed = download_jobs(
+                (DownloadJob(icon, size, filename_map[icon.id]) for icon in icons),
+                progress,
+                task_id,
+                max_workers=workers,
+                client=client,
+            )
+        result["download_seconds"] = time.perf_counter() - started_at
+        result["icons"] = successful
+        result["failed"] = failed
+
+    client.close()
+    json.dump(result, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Log file overhead benchmark.
+
+Worker threads log one line per icon, as downloads do, into the previous
+synchronous FileHandler setup and into the queue-based log file, with and
+without per-icon sampling. Reports how long the workers spend logging and
+how long until every line is on disk.
+"""
+
+import logging
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import click
+
+from icons8_download_cli.logfile import (
+    LOG_FORMAT,
+    icon_logger,
+    start_file_logging,
+    stop_file_logging,
+)
+
+
+def hammer(threads: int, lines: int) -> float:
+    """Seconds for all threads to log their lines."""
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(index: int) -> None:
+        barrier.wait()
+        for line in range(lines):
+            icon_logger.info("Downloaded: %s -> %s", f"icon {index}-{line}", f"icon {line}.png")
+
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    started_at = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - started_at
+
+
+def run_plain(path: Path, threads: int, lines: int) -> tuple[float, float]:
+    """Previous setup: a FileHandler on the root logger."""
+    handler = logging.FileHandler(path, encoding="utf-8")
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(handler)
+    icon_logger.configure("info", 1)
+    started_at = time.perf_counter()
+    try:
+        logging_seconds = hammer(threads, lines)
+    finally:
+        root.removeHandler(handler)
+        handler.close()
+    return logging_seconds, time.perf_counter() - started_at
+
+
+def run_queued(path: Path, threads: int, lines: int, sample: int) -> tuple[float, float]:
+    """Queue-based log file, optionally sampling per-icon lines."""
+    start_file_logging(path, icon_sample=sample)
+    started_at = time.perf_counter()
+    try:
+        logging_seconds = hammer(threads, lines)
+    finally:
+        stop_file_logging()
+    return logging_seconds, time.perf_counter() - started_at
+
+
+@click.command()
+@click.option("--threads", type=click.IntRange(min=1), default=32, help="Worker threads (default: 32)")
+@click.option("--lines", type=click.IntRange(min=1), default=5000, help="Lines per thread (default: 5000)")
+def main(threads: int, lines: int) -> None:
+    """Compare the synchronous and queue-based log files."""
+    click.echo(f"{threads} threads x {lines} lines\n")
+    click.echo(f"{'log file':>24} {'workers':>9} {'on disk':>9} {'lines':>9}")
+    with tempfile.TemporaryDirectory(prefix="icons8-log-") as directory:
+        cases = [
+            ("FileHandler", lambda path: run_plain(path, threads, lines)),
+            ("queued", lambda path: run_queued(path, threads, lines, 1)),
+            ("queued, 1 in 100", lambda path: run_queued(path, threads, lines, 100)),
+        ]
+        for index, (name, run) in enumerate(cases):
+            path = Path(directory) / f"{index}.log"
+            logging_seconds, total_seconds = run(path)
+            with path.open("rb") as f:
+                written = sum(1 for _ in f)
+            click.echo(f"{name:>24} {logging_seconds:>7.2f} s {total_seconds:>7.2f} s {written:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Progress reporting overhead benchmark.
+
+Worker threads report a completed step the way downloads do, either on a
+shared Rich progress bar (rendering to a terminal console backed by a
+buffer) or on the lock-free ProgressCounter rendered by a ticker thread.
+Reports the time per update under contention.
+"""
+
+import io
+import threading
+import time
+from typing import Any
+
+import click
+from rich.console import Console
+from rich.progress import BarColumn, Progress, TextColumn
+
+from icons8_download_cli.progress import RICH_INTERVAL, ProgressCounter, ProgressTicker
+
+
+def hammer(progress: Any, task_id: Any, threads: int, updates: int) -> float:
+    """Seconds for all threads to report their updates."""
+    barrier = threading.Barrier(threads + 1)
+
+    def worker() -> None:
+        barrier.wait()
+        for _ in range(updates):
+            progress.update(task_id, advance=1)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    started_at = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - started_at
+
+
+def make_progress(total: int, auto_refresh: bool = True) -> Progress:
+    """Progress bar rendering to an in-memory terminal."""
+    console = Console(file=io.StringIO(), force_terminal=True, width=100)
+    return Progress(
+        TextColumn("{task.description}"),
+        BarColumn(),
+        TextColumn("({task.completed}/{task.total})"),
+        console=console,
+        auto_refresh=auto_refresh,
+    )
+
+
+@click.command()
+@click.option("--threads", type=click.IntRange(min=1), default=32, help="Worker threads (default: 32)")
+@click.option("--updates", type=click.IntRange(min=1), default=20000, help="Updates per thread (default: 20000)")
+def main(threads: int, updates: int) -> None:
+    """Compare Rich progress updates with the lock-free counter."""
+    total = threads * updates
+    click.echo(f"{threads} threads x {updates} updates\n")
+
+    with make_progress(total) as progress:
+        task_id = progress.add_task("rich", total=total)
+        rich_seconds = hammer(progress, task_id, threads, updates)
+
+    with make_progress(total, auto_refresh=False) as progress:
+        task_id = progress.add_task("counter", total=total)
+        counter = ProgressCounter(total)
+
+        def render(counter: ProgressCounter) -> None:
+            progress.update(task_id, completed=counter.completed, refresh=True)
+
+        with ProgressTicker(counter, render, RICH_INTERVAL):
+            counter_seconds = hammer(counter, None, threads, updates)
+        assert progress.tasks[0].completed == total
+
+    for name, seconds in (("rich Progress.update", rich_seconds), ("ProgressCounter", counter_seconds)):
+        click.echo(f"{name:>22} {seconds:>7.2f} s {seconds / total * 1e9:>8.0f} ns/update")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""Offline benchmark harness for icons8-download.
+
+Starts the stand-in server from server.py, runs each scenario in a fresh
+child process with a cold cache and reports icons/s, MB/s, time to first
+file and peak RSS. Results are saved per commit so runs can be compared.
+"""
+
+import importlib.util
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+import click
+from rich.console import Console
+from rich.table import Table
+
+from server import ServerConfig, StandInServer
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+REPO_DIR = BENCHMARKS_DIR.parent
+RESULTS_DIR = BENCHMARKS_DIR / "results"
+STYLE = "ios"
+
+SCENARIOS = ["cli", "cli-stream", "cli-async", "library-listing", "library-download"]
+
+# Metric name, label and whether a higher value is better
+METRICS = [
+    ("icons_per_second", "icons/s", True),
+    ("mb_per_second", "MB/s", True),
+    ("ttff_seconds", "TTFF (s)", False),
+    ("wall_seconds", "wall (s)", False),
+    ("peak_rss_mb", "peak RSS (MB)", False),
+]
+
+console = Console()
+
+
+def build_command(scenario: str, target_directory: Path, options: dict[str, Any]) -> list[str]:
+    """Build the child process command line of a scenario."""
+    if scenario.startswith("library-"):
+        return [
+            sys.executable,
+            str(BENCHMARKS_DIR / "library.py"),
+            scenario.removeprefix("library-"),
+            "--target-directory",
+            str(target_directory),
+            "--style",
+            STYLE,
+            "--size",
+            str(options["size"]),
+            "--workers",
+            str(options["workers"]),
+        ]
+
+    command = [
+        sys.executable,
+        "-c",
+        "from icons8_download_cli.cli import main; main()",
+        "download",
+        "--style",
+        STYLE,
+        "--size",
+        str(options["size"]),
+        "--workers",
+        str(options["workers"]),
+        "--target-directory",
+        str(target_directory),
+        "--no-cache",
+        "--no-resume",
+    ]
+    if scenario == "cli-stream":
+        command.append("--stream")
+    elif scenario == "cli-async":
+        command += ["--engine", "async"]
+    return command
+
+
+def scan_files(directory: Path) -> tuple[int, int]:
+    """Count the icons written below a directory and their total size."""
+    count = 0
+    total = 0
+    for root, _dirs, files in os.walk(directory):
+        for name in files:
+            if name.endswith(".png"):
+                count += 1
+                total += os.path.getsize(os.path.join(root, name))
+    return count, total
+
+
+def has_file(directory: Path) -> bool:
+    """Check whether any icon was written below a directory yet."""
+    for _root, _dirs, files in os.walk(directory):
+        if any(name.endswith(".png") for name in files):
+            return True
+    return False
+
+
+def wait_for_child(process: subprocess.Popen) -> Optional[float]:
+    """
+    Wait for a child process and get its peak RSS.
+
+    Returns:
+        Peak RSS in MB, or None where wait4 is unavailable
+    """
+    if not hasattr(os, "wait4"):
+        process.wait()
+        return None
+
+    _pid, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return usage.ru_maxrss / divisor
+
+
+def run_scenario(scenario: str, env: dict[str, str], options: dict[str, Any]) -> dict[str, Any]:
+    """Run a scenario once in a fresh temporary directory and measure it."""
+    with tempfile.TemporaryDirectory(prefix="icons8-bench-") as temp:
+        target_directory = Path(temp) / "icons"
+        target_directory.mkdir()
+        # A private TMPDIR gives every run an empty listing cache
+        child_env = dict(env, TMPDIR=temp)
+
+        first_file_at: list[float] = []
+        done = threading.Event()
+
+        def watch() -> None:
+            while not done.wait(0.005):
+                if has_file(target_directory):
+                    first_file_at.append(time.perf_counter())
+                    return
+
+        watcher = threading.Thread(target=watch, daemon=True)
+        started_at = time.perf_counter()
+        process = subprocess.Popen(
+            build_command(scenario, target_directory, options),
+            env=child_env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        watcher.start()
+        output = process.stdout.read()
+        peak_rss_mb = wait_for_child(process)
+        wall_seconds = time.perf_counter() - started_at
+        done.set()
+        watcher.join()
+
+        icons, total_bytes = scan_files(target_directory)
+        details: dict[str, Any] = {}
+        if scenario.startswith("library-") and output.strip():
+            details = json.loads(output)
+            icons = details.get("icons", icons)
+
+    return {
+        "returncode": process.returncode,
+        "icons": icons,
+        "bytes": total_bytes,
+        "wall_seconds": wall_seconds,
+        "icons_per_second": icons / wall_seconds,
+        "mb_per_second": total_bytes / wall_seconds / 1e6 if total_bytes else None,
+        "ttff_seconds": first_file_at[0] - started_at if first_file_at else None,
+        "peak_rss_mb": peak_rss_mb,
+        "details": details,
+    }
+
+
+def median_run(runs: list[dict[str, Any]]) -> dict[str, Any]:
+    """Pick the run with the median wall time."""
+    ordered = sorted(runs, key=lambda run: run["wall_seconds"])
+    result = dict(ordered[(len(ordered) - 1) // 2])
+    result["repeats"] = len(runs)
+    result["wall_seconds_all"] = [run["wall_seconds"] for run in runs]
+    return result
+
+
+def get_commit() -> tuple[str, bool]:
+    """Get the short commit hash of the repository and whether it is dirty."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        dirty = bool(
+            subprocess.run(
+                ["git", "status", "--porcelain", "--untracked-files=no"],
+                cwd=REPO_DIR,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+    return commit, dirty
+
+
+def format_metric(value: Optional[float]) -> str:
+    """Format a metric value for the results table."""
+    if value is None:
+        return "-"
+    return f"{value:,.2f}" if value < 100 else f"{value:,.0f}"
+
+
+def format_change(value: Optional[float], baseline: Optional[float], higher_is_better: bool) -> str:
+    """Format the relative change against a baseline value, coloured by direction."""
+    if value is None or not baseline:
+        return ""
+    change = (value - baseline) / baseline
+    better = change > 0 if higher_is_better else change < 0
+    colour = "green" if better else "red"
+    if abs(change) < 0.02:
+        colour = "dim"
+    return f" [{colour}]({change:+.0%})[/{colour}]"
+
+
+def print_results(results: dict[str, Any], baseline: Optional[dict[str, Any]]) -> None:
+    """Print scenario results, with changes against a baseline if given."""
+    title = f"Benchmark results for {results['commit']}"
+    if baseline:
+        title += f" vs {baseline['commit']}"
+    table = Table(title=title)
+    table.add_column("Scenario", style="cyan")
+    table.add_column("Icons", justify="right")
+    for _key, label, _higher in METRICS:
+        table.add_column(label, justify="right")
+
+    for name, result in results["scenarios"].items():
+        base = (baseline or {}).get("scenarios", {}).get(name, {})
+        if result.get("returncode"):
+            table.add_row(name, "-", *[f"[red]exit {result['returncode']}[/red]"] + [""] * (len(METRICS) - 1))
+            continue
+        cells = [
+            format_metric(result.get(key)) + format_change(result.get(key), base.get(key), higher)
+            for key, _label, higher in METRICS
+        ]
+        table.add_row(name, str(result["icons"]), *cells)
+
+    console.print(table)
+
+
+@click.command()
+@click.option("--icons", type=click.IntRange(min=1), default=2000, help="Icons in the catalog (default: 2000)")
+@click.option("--latency-ms", type=float, default=5.0, help="Server latency per request (default: 5)")
+@click.option("--error-rate", type=click.FloatRange(0, 1), default=0.0, help="Share of 503 responses (default: 0)")
+@click.option("--payload-bytes", type=click.IntRange(min=64), default=2048, help="Image size (default: 2048)")
+@click.option("--size", type=int, default=48, help="Icon size requested (default: 48)")
+@click.option("--workers", type=int, default=16, help="Download workers (default: 16)")
+@click.option("--repeat", type=click.IntRange(min=1), default=1, help="Runs per scenario, median kept (default: 1)")
+@click.option(
+    "--scenario",
+    "scenarios",
+    type=click.Choice(SCENARIOS),
+    multiple=True,
+    help="Scenario to run; repeat for several (default: all)",
+)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Results file (default: benchmarks/results/<commit>.json)",
+)
+@click.option(
+    "--compare",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="Earlier results file to compare against",
+)
+def main(
+    icons: int,
+    latency_ms: float,
+    error_rate: float,
+    payload_bytes: int,
+    size: int,
+    workers: int,
+    repeat: int,
+    scenarios: tuple[str, ...],
+    output: Optional[Path],
+    compare: Optional[Path],
+) -> None:
+    """Benchmark the CLI and library against a local stand-in server."""
+    selected = list(scenarios or SCENARIOS)
+    if "cli-async" in selected and importlib.util.find_spec("aiohttp") is None:
+        console.print("[yellow]Skipping cli-async: aiohttp is not installed[/yellow]")
+        selected.remove("cli-async")
+
+    options = {"size": size, "workers": workers}
+    config = ServerConfig(icons, latency_ms, error_rate, payload_bytes)
+    commit, dirty = get_commit()
+
+    results: dict[str, Any] = {
+        "commit": commit + ("-dirty" if dirty else ""),
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {
+            "icons": icons,
+            "latency_ms": latency_ms,
+            "error_rate": error_rate,
+            "payload_bytes": payload_bytes,
+            "size": size,
+            "workers": workers,
+        },
+        "scenarios": {},
+    }
+
+    with StandInServer(config) as server:
+        env = dict(
+            os.environ,
+            ICONS8_API_BASE_URL=server.api_url,
+            ICONS8_DOWNLOAD_BASE_URL=server.download_url,
+            PYTHONPATH=os.pathsep.join(
+                filter(None, [str(REPO_DIR / "src"), os.environ.get("PYTHONPATH")])
+            ),
+        )
+        for scenario in selected:
+            console.print(f"Running [cyan]{scenario}[/cyan]...")
+            runs = [run_scenario(scenario, env, options) for _ in range(repeat)]
+            results["scenarios"][scenario] = median_run(runs)
+
+    baseline = json.loads(compare.read_text(encoding="utf-8")) if compare else None
+    if baseline and baseline.get("parameters") != results["parameters"]:
+        console.print("[yellow]Baseline was run with different parameters[/yellow]")
+    print_results(results, baseline)
+
+    output = output or RESULTS_DIR / f"{results['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    console.print(f"Saved results to {output}")
+
+
+if __name__ == "__main__":
+    main()
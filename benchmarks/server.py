@@ -0,0 +1,234 @@
+"""Local stand-in for the Icons8 listing API and image host."""
+
+import hashlib
+import json
+import random
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import click
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+API_PATH = "/siteApi/icons/v1/latest"
+
+
+@dataclass
+class ServerConfig:
+    """Shape of the simulated catalog and service."""
+
+    icons: int = 2000
+    latency_ms: float = 0.0
+    error_rate: float = 0.0
+    payload_bytes: int = 2048
+    seed: int = 0
+    # Serve decodable PNGs of the requested size instead of payload_bytes
+    png: bool = False
+
+
+class StandInServer:
+    """
+    Threaded HTTP server imitating API_BASE_URL pagination and image responses.
+
+    Every style has the same number of icons. Icon names repeat, like in the
+    real catalog, so filename conflict resolution is exercised. Image bodies
+    are distinct per icon and size (with png, every icon of a size shares one
+    decodable PNG), carry an ETag and honour If-None-Match.
+    A share of requests (error_rate) fails with 503.
+    """
+
+    def __init__(self, config: ServerConfig, host: str = "127.0.0.1", port: int = 0) -> None:
+        """
+        Create the server without starting it.
+
+        Args:
+            config: Catalog and service settings
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free port)
+        """
+        self.config = config
+        self.requests = 0
+        self._random = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self._payload = hashlib.shake_256(b"icons8").digest(max(config.payload_bytes, 64))
+        self._pngs: dict[int, bytes] = {}
+
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        """Root URL of the server."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_url(self) -> str:
+        """Listing endpoint, to be used as ICONS8_API_BASE_URL."""
+        return self.base_url + API_PATH
+
+    @property
+    def download_url(self) -> str:
+        """Image host, to be used as ICONS8_DOWNLOAD_BASE_URL."""
+        return self.base_url
+
+    def start(self) -> "StandInServer":
+        """Start serving in a background thread."""
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    def should_fail(self) -> bool:
+        """Count a request and decide whether it fails."""
+        with self._lock:
+            self.requests += 1
+            return self.config.error_rate > 0 and self._random.random() < self.config.error_rate
+
+    def listing_page(self, style: str, offset: int, amount: int) -> bytes:
+        """Build one listing page."""
+        unique_names = max(1, self.config.icons * 3 // 4)
+        icons = [
+            {
+                "id": f"{style}-{index}",
+                "name": f"icon {index % unique_names}",
+                "commonName": f"icon-{index % unique_names}",
+                "category": "Benchmark",
+                "platform": style,
+                "isColor": index % 2 == 0,
+                "isExplicit": False,
+                "sourceFormat": "svg",
+            }
+            for index in range(offset, min(self.config.icons, offset + amount))
+        ]
+        return json.dumps({"success": True, "icons": icons}).encode("utf-8")
+
+    def image(self, icon_id: str, size: str) -> bytes:
+        """Build the image body of an icon."""
+        if self.config.png:
+            pixels = int(size) if size.isdigit() else 512
+            with self._lock:
+                if pixels not in self._pngs:
+                    self._pngs[pixels] = make_png(pixels)
+                return self._pngs[pixels]
+        prefix = PNG_SIGNATURE + f"{icon_id}@{size}".encode("utf-8")
+        return prefix + self._payload[: max(0, self.config.payload_bytes - len(prefix))]
+
+
+def make_png(size: int) -> bytes:
+    """
+    Encode a square RGBA PNG looking roughly like an icon.
+
+    Draws an anti-aliased disc with a gradient on a transparent background,
+    so resampling and compression behave as they do on real icons.
+    """
+    center = (size - 1) / 2
+    radius = size * 0.42
+    rows = []
+    for y in range(size):
+        row = bytearray(b"\0")  # filter type: none
+        for x in range(size):
+            distance = ((x - center) ** 2 + (y - center) ** 2) ** 0.5
+            alpha = max(0.0, min(1.0, radius - distance + 0.5))
+            row += bytes((40 + 180 * x // size, 90, 220 - 160 * y // size, int(alpha * 255)))
+        rows.append(bytes(row))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", size, size, 8, 6, 0, 0, 0)
+    return (
+        PNG_SIGNATURE
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(b"".join(rows), 6))
+        + chunk(b"IEND", b"")
+    )
+
+
+def _make_handler(server: StandInServer) -> type[BaseHTTPRequestHandler]:
+    """Build a request handler class bound to a server."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            url = urlsplit(self.path)
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+            if server.config.latency_ms:
+                time.sleep(server.config.latency_ms / 1000)
+            if server.should_fail():
+                self._send(503, b"", "text/plain")
+                return
+
+            if url.path == API_PATH:
+                body = server.listing_page(
+                    query.get("style", "all"),
+                    int(query.get("offset", 0)),
+                    int(query.get("amount", 100)),
+                )
+                self._send(200, body, "application/json")
+                return
+
+            if "id" not in query:
+                self._send(404, b"", "text/plain")
+                return
+
+            etag = f'"{query["id"]}-{query.get("size", "512")}"'
+            if self.headers.get("If-None-Match") == etag:
+                self._send(304, b"", "image/png", etag)
+                return
+            self._send(200, server.image(query["id"], query.get("size", "512")), "image/png", etag)
+
+        def _send(self, status: int, body: bytes, content_type: str, etag: str | None = None) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            if etag:
+                self.send_header("ETag", etag)
+            self.end_headers()
+            if body:
+                self.wfile.write(body)
+
+    return Handler
+
+
+@click.command()
+@click.option("--icons", type=click.IntRange(min=0), default=2000, help="Icons per style")
+@click.option("--latency-ms", type=float, default=0.0, help="Delay added to every response")
+@click.option("--error-rate", type=click.FloatRange(0, 1), default=0.0, help="Share of 503 responses")
+@click.option("--payload-bytes", type=click.IntRange(min=64), default=2048, help="Image body size")
+@click.option("--png", is_flag=True, default=False, help="Serve decodable PNGs of the requested size")
+@click.option("--port", type=int, default=8808, help="Port to listen on")
+def main(icons: int, latency_ms: float, error_rate: float, payload_bytes: int, png: bool, port: int) -> None:
+    """Serve a stand-in catalog until interrupted."""
+    config = ServerConfig(icons, latency_ms, error_rate, payload_bytes, png=png)
+    with StandInServer(config, port=port) as server:
+        click.echo(f"export ICONS8_API_BASE_URL={server.api_url}")
+        click.echo(f"export ICONS8_DOWNLOAD_BASE_URL={server.download_url}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
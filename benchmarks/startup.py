@@ -0,0 +1,122 @@
+"""Startup time check for icons8-download.
+
+Checks that importing the CLI and answering --help and --version in fresh
+interpreters loads none of the heavy modules, and reports the time these
+take on top of a bare interpreter. Exits with status 1 when a heavy module
+is imported, or when a time budget is given and exceeded, so it can guard
+against regressions. The import check is the deterministic gate; wall times
+vary too much between machines and runs for a default budget.
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import click
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+# Modules that must only be imported once a command actually runs: heavy
+# dependencies, and stdlib modules only the cache and storage need
+HEAVY_MODULES = (
+    "requests",
+    "urllib3",
+    "pydantic",
+    "rich",
+    "aiohttp",
+    "sqlite3",
+    "zipfile",
+    "tarfile",
+)
+
+RUN_CLI = "from icons8_download_cli.cli import main; main()"
+CHECKS = {
+    "import": ["-c", "import icons8_download_cli.cli"],
+    "--help": ["-c", RUN_CLI, "--help"],
+    "--version": ["-c", RUN_CLI, "--version"],
+}
+
+
+def child_env() -> dict[str, str]:
+    """Environment running the package from this checkout."""
+    return dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join(
+            filter(None, [str(REPO_DIR / "src"), os.environ.get("PYTHONPATH")])
+        ),
+    )
+
+
+def time_command(args: list[str], repeat: int) -> float:
+    """Median wall time of a Python command in fresh interpreters, in ms."""
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        subprocess.run(
+            [sys.executable, *args],
+            env=child_env(),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+        timings.append((time.perf_counter() - started_at) * 1000)
+    return statistics.median(timings)
+
+
+def loaded_heavy_modules(args: list[str]) -> list[str]:
+    """Heavy modules imported by a CLI invocation, not already by site."""
+    code = (
+        "import sys, atexit\n"
+        "preloaded = set(sys.modules)\n"
+        f"atexit.register(lambda: print(','.join(m for m in {HEAVY_MODULES!r} "
+        "if m in sys.modules and m not in preloaded), file=sys.stderr))\n"
+        f"sys.argv = ['icons8-download', *{args[2:]!r}]\n"
+        f"{args[1]}\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        env=child_env(),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    last_line = result.stderr.strip().splitlines()[-1:] or [""]
+    return [name for name in last_line[0].split(",") if name]
+
+
+@click.command()
+@click.option(
+    "--budget-ms",
+    type=float,
+    default=None,
+    help="Also fail when a check takes longer than this on top of a bare "
+    "interpreter (default: report times only)",
+)
+@click.option("--repeat", type=click.IntRange(min=1), default=7, help="Runs per check (default: 7)")
+def main(budget_ms: float | None, repeat: int) -> None:
+    """Check CLI startup imports, and optionally time, against a budget."""
+    baseline = time_command(["-c", "pass"], repeat)
+    click.echo(f"bare interpreter: {baseline:.0f} ms")
+
+    failed = False
+    for name, args in CHECKS.items():
+        overhead = time_command(args, repeat) - baseline
+        heavy = loaded_heavy_modules(args)
+        ok = not heavy and (budget_ms is None or overhead <= budget_ms)
+        failed |= not ok
+        line = f"{name:>10}: +{overhead:.0f} ms"
+        if budget_ms is not None:
+            line += f" (budget {budget_ms:.0f} ms)"
+        if heavy:
+            line += f", imports {', '.join(heavy)}"
+        click.echo(f"{line}  {'ok' if ok else 'FAIL'}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Write path benchmark for downloaded icons.
+
+Writes synthetic icon bodies the way downloads are saved: the previous
+direct write of 8 KiB chunks into the final file, and the atomic buffered
+FileWriter with each fsync mode. Reports files per second and write()
+syscalls per file, read from /proc/self/io (Linux only).
+"""
+
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+import click
+
+from icons8_download_cli.downloader import CHUNK_SIZE
+from icons8_download_cli.storage import FileWriter, configure_fsync, sync_policy
+
+LEGACY_CHUNK_SIZE = 8192
+
+
+class DirectWriter:
+    """Previous write path: the destination file written in place."""
+
+    def __init__(self, file_path: Path, expected_size: Optional[int] = None) -> None:
+        file_path.unlink(missing_ok=True)
+        self._file = file_path.open("wb")
+
+    def write(self, chunk: bytes) -> None:
+        self._file.write(chunk)
+
+    def commit(self) -> None:
+        self._file.close()
+
+
+def write_syscalls() -> Optional[int]:
+    """Write syscalls of this process so far, None where not available."""
+    try:
+        with open("/proc/self/io", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("syscw:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def run_case(
+    open_writer: Callable[[Path, Optional[int]], object],
+    chunk_size: int,
+    directory: Path,
+    icons: int,
+    body: bytes,
+) -> tuple[float, Optional[int]]:
+    """Write all icons, returning seconds and write syscalls."""
+    syscalls_before = write_syscalls()
+    started_at = time.perf_counter()
+    for index in range(icons):
+        writer = open_writer(directory / f"icon {index}.png", len(body))
+        for offset in range(0, len(body), chunk_size):
+            writer.write(body[offset:offset + chunk_size])
+        writer.commit()
+    sync_policy.flush()
+    elapsed = time.perf_counter() - started_at
+    syscalls_after = write_syscalls()
+    if syscalls_before is None or syscalls_after is None:
+        return elapsed, None
+    return elapsed, syscalls_after - syscalls_before
+
+
+@click.command()
+@click.option("--icons", type=click.IntRange(min=1), default=2000, help="Files per case (default: 2000)")
+@click.option("--size-kb", type=click.IntRange(min=1), default=24, help="Size of each file (default: 24)")
+@click.option(
+    "--directory",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=None,
+    help="Directory to write in, e.g. on the disk to test (default: a temporary directory)",
+)
+def main(icons: int, size_kb: int, directory: Optional[Path]) -> None:
+    """Compare the direct and atomic write paths."""
+    body = bytes(range(256)) * (size_kb * 4)
+    cases = [
+        ("direct, 8 KiB chunks", "off", 1, DirectWriter, LEGACY_CHUNK_SIZE),
+        ("atomic, fsync off", "off", 1, FileWriter, CHUNK_SIZE),
+        ("atomic, fsync batch:64", "batch", 64, FileWriter, CHUNK_SIZE),
+        ("atomic, fsync always", "always", 1, FileWriter, CHUNK_SIZE),
+    ]
+
+    click.echo(f"{icons} files of {size_kb} KiB\n")
+    click.echo(f"{'write path':>24} {'seconds':>8} {'files/s':>9} {'write()/file':>13}")
+    for name, mode, batch_size, writer_class, chunk_size in cases:
+        configure_fsync(mode, batch_size)
+        case_directory = Path(tempfile.mkdtemp(dir=directory, prefix="icons8-write-"))
+        try:
+            elapsed, syscalls = run_case(writer_class, chunk_size, case_directory, icons, body)
+        finally:
+            configure_fsync("off")
+            shutil.rmtree(case_directory, ignore_errors=True)
+        per_file = f"{syscalls / icons:.1f}" if syscalls is not None else "n/a"
+        click.echo(f"{name:>24} {elapsed:>8.2f} {icons / elapsed:>9,.0f} {per_file:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,229 @@
 """API client for Icons8.com endpoints."""
 
+import json
 import logging
-from typing import Callable, Optional
+import os
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Generator, Iterator, Optional
 
 import requests
 
-from icons8_download_cli.cache import read_cache, write_cache
-from icons8_download_cli.models import Icon, IconResponse
+from icons8_download_cli.cache import (
+    read_cache_entry,
+    renew_cache,
+    stats as cache_stats,
+    validators_from_headers,
+    write_cache,
+)
+from icons8_download_cli.client import HttpClient, get_default_client
+from icons8_download_cli.defaults import PAGE_SIZE, STYLE_CONCURRENCY
+from icons8_download_cli.metrics import stats as run_stats
+from icons8_download_cli.models import IconRecord, ListingPage, decode_icon_page
+from icons8_download_cli.profiling import span
+from icons8_download_cli.retry import get_with_retries
 
 logger = logging.getLogger(__name__)
 
-API_BASE_URL = "https://api-icons.icons8.com/siteApi/icons/v1/latest"
-PAGE_SIZE = 100
+# Overridable to point the CLI at a stand-in server (see benchmarks/)
+API_BASE_URL = os.environ.get(
+    "ICONS8_API_BASE_URL",
+    "https://api-icons.icons8.com/siteApi/icons/v1/latest",
+)
+
+
+def build_page_params(
+    offset: int,
+    style: Optional[str] = None,
+    page_size: int = PAGE_SIZE,
+) -> dict[str, Any]:
+    """
+    Build query parameters for a single listing page.
+
+    Args:
+        offset: Offset of the first icon in the page
+        style: Optional style filter
+        page_size: Number of icons requested per page
+
+    Returns:
+        Query parameters for the listing endpoint
+    """
+    params: dict[str, Any] = {
+        "amount": page_size,
+        "offset": offset,
+        "ai": "true",
+        "language": "en-US",
+        "sortBy": "mostDownloaded",
+    }
+
+    if style:
+        params["style"] = style
+
+    return params
+
+
+def fetch_page(
+    offset: int,
+    style: Optional[str] = None,
+    page_size: int = PAGE_SIZE,
+    use_cache: bool = True,
+    client: Optional[HttpClient] = None,
+    revalidate: bool = False,
+) -> ListingPage:
+    """
+    Fetch a single listing page, consulting the cache first.
+
+    Expired cache entries (and, with revalidate, all cache entries) that
+    carry an ETag or Last-Modified validator are checked with a conditional
+    request; a 304 response reuses the cached body and renews the entry.
+    Timeouts, connection errors, 429s and 5xx responses are retried with
+    backoff (see retry.get_with_retries).
+
+    Args:
+        offset: Offset of the first icon in the page
+        style: Optional style filter
+        page_size: Number of icons requested per page
+        use_cache: Whether to use cached responses (default: True)
+        client: HTTP client to use (defaults to the shared client)
+        revalidate: Revalidate fresh cache entries too (default: False)
+
+    Returns:
+        Parsed API response for the page
+
+    Raises:
+        requests.RequestException: If API request fails
+    """
+    params = build_page_params(offset, style, page_size)
+    client = client or get_default_client()
+
+    # Construct full URL for cache key
+    prepared_request = requests.PreparedRequest()
+    prepared_request.prepare_url(API_BASE_URL, params)
+    full_url = prepared_request.url or API_BASE_URL
+
+    try:
+        # Check cache first
+        cached = read_cache_entry(full_url) if use_cache else None
+
+        if cached and not cached.expired and not revalidate:
+            logger.info("API request (cache hit): %s", full_url)
+            cache_stats.record_hit()
+            return _validate_page(cached.data)
+
+        headers = cached.conditional_headers() if cached else {}
+        if headers:
+            logger.info("API request (revalidate): %s", full_url)
+        elif use_cache:
+            logger.info("API request (cache miss): %s", full_url)
+        else:
+            logger.info("API request: %s", full_url)
+        with run_stats.in_flight("listing"):
+            response = get_with_retries(
+                client,
+                API_BASE_URL,
+                f"listing page at offset {offset}",
+                params=params,
+                headers=headers,
+            )
+        run_stats.record_response(
+            "listing",
+            response.elapsed.total_seconds(),
+            len(response.content),
+        )
+
+        if cached and headers and response.status_code == 304:
+            logger.info("API response not modified: %s", full_url)
+            renew_cache(full_url)
+            cache_stats.record_hit(revalidated=True)
+            return _validate_page(cached.data)
+
+        if use_cache:
+            cache_stats.record_miss(expired=bool(cached and cached.expired))
+
+        # Bytes go straight to the parser, skipping requests' text decoding
+        response_json = json.loads(response.content)
+
+        api_response = _validate_page(response_json)
+
+        # Cache the response, except empty pages past the end of the listing
+        # (requested ahead by the concurrent walk), which would only hide
+        # icons added later
+        if use_cache and (api_response.icons or offset == 0):
+            write_cache(full_url, response_json, validators_from_headers(response.headers))
+
+        return api_response
+
+    except requests.RequestException as e:
+        logger.error("Failed to fetch icons at offset %d: %s", offset, e)
+        raise
+    except Exception as e:
+        logger.error(
+            "Unexpected error processing API response at offset %d: %s",
+            offset,
+            e,
+        )
+        raise
+
+
+def _validate_page(data: Any) -> ListingPage:
+    """Decode a listing page, traced as its own span when profiling."""
+    with span("decode page", "listing"):
+        return decode_icon_page(data)
+
+
+def _is_last_page(api_response: ListingPage, offset: int, page_size: int) -> bool:
+    """
+    Check whether a page terminates the listing.
+
+    Args:
+        api_response: Parsed API response for the page
+        offset: Offset the page was requested at
+        page_size: Number of icons requested per page
+
+    Returns:
+        True if no further pages should be requested
+    """
+    if not api_response.success:
+        logger.warning(
+            "API returned non-success response at offset %d",
+            offset,
+        )
+        return True
+
+    if not api_response.icons:
+        logger.info("No more icons found at offset %d", offset)
+        return True
+
+    # If we got fewer icons than requested, we've reached the end
+    return len(api_response.icons) < page_size
+
+
+def _ends_listing(api_response: ListingPage, page_size: int) -> bool:
+    """Check whether a page is the last of the listing, without logging."""
+    return not api_response.success or len(api_response.icons) < page_size
+
+
+def _end_seen(pending: dict[int, Future[ListingPage]], page_size: int) -> bool:
+    """Check whether a finished page in the window ends the listing."""
+    return any(
+        future.done()
+        and not future.cancelled()
+        and future.exception() is None
+        and _ends_listing(future.result(), page_size)
+        for future in pending.values()
+    )
 
 
 def fetch_all_icons(
     style: Optional[str] = None,
     progress_callback: Optional[Callable[[int], None]] = None,
     use_cache: bool = True,
-) -> list[Icon]:
+    page_size: int = PAGE_SIZE,
+    concurrency: int = 1,
+    client: Optional[HttpClient] = None,
+    revalidate: bool = False,
+) -> list[IconRecord]:
     """
     Fetch all icons from Icons8 API with pagination.
 
@@ -26,6 +231,10 @@ def fetch_all_icons(
         style: Optional style filter
         progress_callback: Optional callback function for progress updates
         use_cache: Whether to use cached responses (default: True)
+        page_size: Number of icons requested per page (default: 100)
+        concurrency: Number of page requests kept in flight (default: 1)
+        client: HTTP client to use (defaults to the shared client)
+        revalidate: Revalidate fresh cache entries too (default: False)
 
     Returns:
         List of all Icon objects collected across all pages
@@ -33,83 +242,284 @@ def fetch_all_icons(
     Raises:
         requests.RequestException: If API request fails
     """
-    all_icons: list[Icon] = []
+    all_icons: list[IconRecord] = []
+
+    for icons in iter_icon_pages(
+        style,
+        use_cache,
+        page_size,
+        concurrency,
+        client,
+        revalidate,
+    ):
+        all_icons.extend(icons)
+
+        # Update progress if callback provided
+        if progress_callback:
+            progress_callback(len(all_icons))
+
+    return all_icons
+
+
+def iter_icon_pages(
+    style: Optional[str] = None,
+    use_cache: bool = True,
+    page_size: int = PAGE_SIZE,
+    concurrency: int = 1,
+    client: Optional[HttpClient] = None,
+    revalidate: bool = False,
+) -> Generator[list[IconRecord], None, None]:
+    """
+    Iterate over listing pages as soon as each one is available.
+
+    With concurrency greater than 1, up to that many page requests are kept
+    in flight at increasing offsets. Pages are still yielded in offset
+    order, so the result is identical to the serial walk. The listing has
+    no total count, so up to concurrency - 1 requests may go past its end;
+    none are sent once a finished page is known to be the last, and the
+    empty pages past the end are not cached.
+
+    Args:
+        style: Optional style filter
+        use_cache: Whether to use cached responses (default: True)
+        page_size: Number of icons requested per page (default: 100)
+        concurrency: Number of page requests kept in flight (default: 1)
+        client: HTTP client to use (defaults to the shared client)
+        revalidate: Revalidate fresh cache entries too (default: False)
+
+    Yields:
+        Non-empty lists of icons, one per page
+
+    Raises:
+        requests.RequestException: If API request fails
+    """
+    client = client or get_default_client()
+
+    if concurrency <= 1:
+        return _iter_pages_serial(style, use_cache, page_size, client, revalidate)
+
+    return _iter_pages_concurrent(
+        style,
+        use_cache,
+        page_size,
+        concurrency,
+        client,
+        revalidate,
+    )
+
+
+def _iter_pages_serial(
+    style: Optional[str],
+    use_cache: bool,
+    page_size: int,
+    client: HttpClient,
+    revalidate: bool,
+) -> Generator[list[IconRecord], None, None]:
+    """Walk the listing one page at a time."""
     offset = 0
 
     while True:
-        params = {
-            "amount": PAGE_SIZE,
-            "offset": offset,
-            "ai": "true",
-            "language": "en-US",
-            "sortBy": "mostDownloaded",
-        }
-
-        if style:
-            params["style"] = style
-
-        # Construct full URL for cache key
-        prepared_request = requests.PreparedRequest()
-        prepared_request.prepare_url(API_BASE_URL, params)
-        full_url = prepared_request.url or API_BASE_URL
+        api_response = fetch_page(
+            offset,
+            style,
+            page_size,
+            use_cache,
+            client,
+            revalidate,
+        )
 
-        try:
-            # Check cache first
-            cached_data = None
-            if use_cache:
-                cached_data = read_cache(full_url)
-
-            if cached_data:
-                logger.info("API request (cache hit): %s", full_url)
-                api_response = IconResponse.model_validate(cached_data)
-            else:
-                if use_cache:
-                    logger.info("API request (cache miss): %s", full_url)
-                else:
-                    logger.info("API request: %s", full_url)
-                response = requests.get(API_BASE_URL, params=params, timeout=30)
-                response.raise_for_status()
-                response_json = response.json()
-
-                # Cache the response
-                if use_cache:
-                    write_cache(full_url, response_json)
-
-                api_response = IconResponse.model_validate(response_json)
-
-            if not api_response.success:
-                logger.warning(
-                    "API returned non-success response at offset %d",
-                    offset,
+        if api_response.success and api_response.icons:
+            yield api_response.icons
+
+        if _is_last_page(api_response, offset, page_size):
+            break
+
+        offset += page_size
+
+
+def _iter_pages_concurrent(
+    style: Optional[str],
+    use_cache: bool,
+    page_size: int,
+    concurrency: int,
+    client: HttpClient,
+    revalidate: bool,
+) -> Generator[list[IconRecord], None, None]:
+    """Walk the listing with a sliding window of in-flight page requests."""
+    pending: dict[int, Future[ListingPage]] = {}
+    next_offset = 0
+    offset = 0
+
+    executor = ThreadPoolExecutor(
+        max_workers=concurrency,
+        thread_name_prefix="icons8-listing",
+    )
+    try:
+        while True:
+            # Keep the window full, but request nothing past a page known to
+            # end the listing
+            while len(pending) < concurrency and not _end_seen(pending, page_size):
+                pending[next_offset] = executor.submit(
+                    fetch_page,
+                    next_offset,
+                    style,
+                    page_size,
+                    use_cache,
+                    client,
+                    revalidate,
                 )
-                break
+                next_offset += page_size
+
+            api_response = pending.pop(offset).result()
+
+            if api_response.success and api_response.icons:
+                yield api_response.icons
 
-            if not api_response.icons:
-                logger.info("No more icons found at offset %d", offset)
+            if _is_last_page(api_response, offset, page_size):
                 break
 
-            all_icons.extend(api_response.icons)
+            offset += page_size
+    finally:
+        # Drop requests past the end of the listing (or after a failure)
+        for future in pending.values():
+            future.cancel()
+        executor.shutdown(wait=True, cancel_futures=True)
 
-            # Update progress if callback provided
-            if progress_callback:
-                progress_callback(len(all_icons))
 
-            # If we got fewer icons than requested, we've reached the end
-            if len(api_response.icons) < PAGE_SIZE:
-                break
+def iter_style_pages(
+    styles: list[str],
+    use_cache: bool = True,
+    page_size: int = PAGE_SIZE,
+    concurrency: int = 1,
+    client: Optional[HttpClient] = None,
+    revalidate: bool = False,
+    style_concurrency: int = STYLE_CONCURRENCY,
+) -> Iterator[tuple[str, list[IconRecord]]]:
+    """
+    Iterate over listing pages of several styles listed concurrently.
 
-            offset += PAGE_SIZE
+    Up to style_concurrency styles are listed at the same time, each one
+    walking its own pages as in iter_icon_pages. Pages of one style are
+    yielded in offset order, while pages of different styles interleave.
+    A bounded queue between the listing threads and the consumer pauses
+    the listing when the consumer falls behind.
 
-        except requests.RequestException as e:
-            logger.error("Failed to fetch icons at offset %d: %s", offset, e)
-            raise
-        except Exception as e:
-            logger.error(
-                "Unexpected error processing API response at offset %d: %s",
-                offset,
-                e,
+    Args:
+        styles: Style filters to list
+        use_cache: Whether to use cached responses (default: True)
+        page_size: Number of icons requested per page (default: 100)
+        concurrency: Number of page requests kept in flight per style
+        client: HTTP client to use (defaults to the shared client)
+        revalidate: Revalidate fresh cache entries too (default: False)
+        style_concurrency: Number of styles listed at the same time
+
+    Yields:
+        Tuples of (style, non-empty list of icons), one per page
+
+    Raises:
+        requests.RequestException: If API request fails
+    """
+    client = client or get_default_client()
+    style_concurrency = max(1, min(style_concurrency, len(styles)))
+    pages: queue.Queue = queue.Queue(maxsize=style_concurrency * 2)
+    stop = threading.Event()
+
+    def put(item: tuple) -> bool:
+        """Queue an item unless the consumer has gone away."""
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def list_style(style: str) -> None:
+        """List one style into the queue, ending with a None page."""
+        try:
+            style_pages = iter_icon_pages(
+                style,
+                use_cache,
+                page_size,
+                concurrency,
+                client,
+                revalidate,
             )
-            raise
+            for icons in style_pages:
+                if not put((style, icons)):
+                    style_pages.close()
+                    return
+            put((style, None))
+        except Exception as e:
+            put((style, e))
 
-    return all_icons
+    executor = ThreadPoolExecutor(
+        max_workers=style_concurrency,
+        thread_name_prefix="icons8-styles",
+    )
+    try:
+        for style in styles:
+            executor.submit(list_style, style)
+
+        remaining = len(styles)
+        while remaining:
+            style, icons = pages.get()
+            if icons is None:
+                remaining -= 1
+            elif isinstance(icons, Exception):
+                raise icons
+            else:
+                yield style, icons
+    finally:
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def fetch_icons_by_style(
+    styles: list[str],
+    progress_callback: Optional[Callable[[int], None]] = None,
+    use_cache: bool = True,
+    page_size: int = PAGE_SIZE,
+    concurrency: int = 1,
+    client: Optional[HttpClient] = None,
+    revalidate: bool = False,
+    style_concurrency: int = STYLE_CONCURRENCY,
+) -> dict[str, list[IconRecord]]:
+    """
+    Fetch all icons of several styles, listing the styles concurrently.
+
+    Args:
+        styles: Style filters to list
+        progress_callback: Optional callback with the total number found
+        use_cache: Whether to use cached responses (default: True)
+        page_size: Number of icons requested per page (default: 100)
+        concurrency: Number of page requests kept in flight per style
+        client: HTTP client to use (defaults to the shared client)
+        revalidate: Revalidate fresh cache entries too (default: False)
+        style_concurrency: Number of styles listed at the same time
+
+    Returns:
+        Mapping of style to its icons, in the order of styles
+
+    Raises:
+        requests.RequestException: If API request fails
+    """
+    icons_by_style: dict[str, list[IconRecord]] = {style: [] for style in styles}
+    found_count = 0
+
+    for style, icons in iter_style_pages(
+        styles,
+        use_cache,
+        page_size,
+        concurrency,
+        client,
+        revalidate,
+        style_concurrency,
+    ):
+        icons_by_style[style].extend(icons)
+        found_count += len(icons)
+
+        if progress_callback:
+            progress_callback(found_count)
 
+    return icons_by_style
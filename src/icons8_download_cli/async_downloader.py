@@ -0,0 +1,390 @@
+"""Asyncio download engine built on aiohttp."""
+
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import Iterable, Iterator, Mapping, Optional
+
+from rich.progress import TaskID
+
+from icons8_download_cli.cache import validators_from_headers
+from icons8_download_cli.concurrency import parse_retry_after
+from icons8_download_cli.deadletter import DeadLetterFile
+from icons8_download_cli.downloader import (
+    CHUNK_SIZE,
+    DownloadJob,
+    build_download_url,
+    get_content_length,
+    image_stats,
+)
+from icons8_download_cli.journal import ResumeJournal
+from icons8_download_cli.logfile import icon_logger
+from icons8_download_cli.metrics import stats as run_stats
+from icons8_download_cli.models import IconRecord
+from icons8_download_cli.progress import ProgressSink
+from icons8_download_cli.retry import (
+    classify_status,
+    get_retry_delay,
+    log_retry,
+    should_retry,
+    stats as retry_stats,
+)
+from icons8_download_cli.storage import FileStore, Writer, open_writer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 30
+
+
+def check_async_engine() -> None:
+    """
+    Ensure the optional dependencies of the async engine are installed.
+
+    Raises:
+        RuntimeError: If aiohttp is not installed
+    """
+    try:
+        import aiohttp  # noqa: F401
+    except ImportError as e:
+        raise RuntimeError(
+            "The async engine requires aiohttp. "
+            "Install it with: pip install 'icons8-download-cli[async]'"
+        ) from e
+
+
+def download_jobs_async(
+    jobs: Iterable[DownloadJob],
+    progress: ProgressSink,
+    task_id: Optional[TaskID],
+    max_concurrency: int = 100,
+    max_connections_per_host: Optional[int] = None,
+    journal: Optional[ResumeJournal] = None,
+    revalidate: bool = False,
+    dead_letter: Optional[DeadLetterFile] = None,
+    store: Optional[FileStore] = None,
+) -> tuple[int, int]:
+    """
+    Run download jobs concurrently on a single asyncio event loop.
+
+    Drop-in alternative to downloader.download_jobs. The jobs iterable must
+    not block, since it is consumed from inside the event loop.
+
+    Args:
+        jobs: Iterable of (icon, size, file_path) download jobs
+        progress: Progress bar, or a ProgressCounter, advanced per icon
+        task_id: Task ID for progress updates (unused by a ProgressCounter)
+        max_concurrency: Maximum number of in-flight downloads
+        max_connections_per_host: Optional limit of connections per host
+        journal: Optional resume journal to record completed downloads in
+        revalidate: Revalidate journaled files with conditional requests
+        dead_letter: Optional dead-letter file to record failed downloads in
+        store: Optional content store or archive to save icons through
+
+    Returns:
+        Tuple of (successful_count, failed_count)
+
+    Raises:
+        RuntimeError: If aiohttp is not installed
+    """
+    check_async_engine()
+
+    return asyncio.run(
+        _download_all(
+            jobs,
+            progress,
+            task_id,
+            max(1, max_concurrency),
+            max_connections_per_host,
+            journal,
+            revalidate,
+            dead_letter,
+            store,
+        )
+    )
+
+
+async def _download_all(
+    jobs: Iterable[DownloadJob],
+    progress: ProgressSink,
+    task_id: Optional[TaskID],
+    max_concurrency: int,
+    max_connections_per_host: Optional[int],
+    journal: Optional[ResumeJournal],
+    revalidate: bool,
+    dead_letter: Optional[DeadLetterFile],
+    store: Optional[FileStore],
+) -> tuple[int, int]:
+    """Run a bounded pool of download coroutines over all jobs."""
+    import aiohttp
+
+    counts = {"downloaded": 0, "failed": 0}
+    pending: Iterator[DownloadJob] = iter(jobs)
+
+    connector = aiohttp.TCPConnector(
+        limit=max_concurrency,
+        limit_per_host=max_connections_per_host or 0,
+    )
+    timeout = aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+
+        async def worker() -> None:
+            # The iterator is shared; next() never yields to the loop
+            for job in pending:
+                success = await _download_icon(
+                    session,
+                    job.icon,
+                    job.file_path,
+                    job.size,
+                    journal,
+                    revalidate,
+                    dead_letter,
+                    store,
+                )
+                counts["downloaded" if success else "failed"] += 1
+                progress.update(task_id, advance=1)
+
+        await asyncio.gather(*(worker() for _ in range(max_concurrency)))
+
+    return counts["downloaded"], counts["failed"]
+
+
+def _classify_async_error(error: Exception) -> str:
+    """
+    Classify a failed aiohttp request like retry.classify_error.
+
+    Args:
+        error: Exception raised by the request
+
+    Returns:
+        One of "timeout", "connection", "rate_limited", "server", "http"
+        or "other"
+    """
+    import aiohttp
+
+    if isinstance(error, asyncio.TimeoutError):
+        return "timeout"
+    if isinstance(error, aiohttp.ClientResponseError):
+        return classify_status(error.status)
+    if isinstance(error, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError)):
+        return "connection"
+    return "other"
+
+
+async def _download_icon(
+    session,
+    icon: IconRecord,
+    file_path: Path,
+    size: int,
+    journal: Optional[ResumeJournal],
+    revalidate: bool,
+    dead_letter: Optional[DeadLetterFile],
+    store: Optional[FileStore],
+) -> bool:
+    """
+    Download a single icon, retrying retryable errors with backoff.
+
+    Args:
+        session: aiohttp client session
+        icon: Icon to download
+        file_path: Destination file path
+        size: Icon size parameter
+        journal: Optional resume journal to record the completed download in
+        revalidate: Send a conditional request for journaled files
+        dead_letter: Optional dead-letter file to record a failed download in
+        store: Optional content store or archive to save the icon through
+
+    Returns:
+        True if download succeeded or the file is unchanged, False otherwise
+    """
+    import aiohttp
+
+    download_url = build_download_url(icon.id, size)
+
+    headers = {}
+    if revalidate and journal:
+        # Stats the downloaded file, so it runs off the event loop
+        headers = await asyncio.to_thread(journal.get_conditional_headers, icon.id, size, file_path)
+
+    attempt = 1
+    while True:
+        try:
+            await _download_once(
+                session,
+                icon,
+                file_path,
+                size,
+                download_url,
+                headers,
+                journal,
+                store,
+            )
+            if attempt > 1:
+                retry_stats.record_recovered()
+            return True
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error_class = _classify_async_error(e)
+            if should_retry(error_class, attempt):
+                retry_after = None
+                if isinstance(e, aiohttp.ClientResponseError) and e.headers:
+                    retry_after = parse_retry_after(e.headers.get("Retry-After"))
+                delay = get_retry_delay(error_class, attempt, retry_after)
+                log_retry(f"{icon.name} ({icon.id})", error_class, attempt, delay, e)
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            icon_logger.error("Failed to download %s (%s): %s", icon.name, icon.id, e)
+            error = str(e) or type(e).__name__
+        except Exception as e:
+            error_class = "other"
+            error = str(e)
+            icon_logger.error(
+                "Unexpected error downloading %s (%s): %s",
+                icon.name,
+                icon.id,
+                e,
+            )
+
+        if dead_letter:
+            await asyncio.to_thread(
+                dead_letter.record, icon, size, file_path, error_class, error, attempt
+            )
+        return False
+
+
+async def _download_once(
+    session,
+    icon: IconRecord,
+    file_path: Path,
+    size: int,
+    download_url: str,
+    headers: Mapping[str, str],
+    journal: Optional[ResumeJournal],
+    store: Optional[FileStore],
+) -> None:
+    """
+    Make one download attempt, streaming the body to disk.
+
+    The body is read in chunks on the event loop and written on worker
+    threads, so a slow disk, fsync or a full archive queue never stalls the
+    other downloads. Chunks are buffered up to CHUNK_SIZE before a write is
+    handed to a thread: most icons fit in one buffer and are opened, written,
+    committed and journaled in a single call, while large bodies never hold
+    more than about CHUNK_SIZE in memory.
+
+    Raises:
+        aiohttp.ClientError: If the request fails or the body is shorter or
+            longer than its Content-Length
+        asyncio.TimeoutError: If the request times out
+    """
+    import aiohttp
+
+    started_at = time.perf_counter()
+    writer: Optional[Writer] = None
+    chunks: list[bytes] = []
+    buffered = 0
+    byte_count = 0
+    try:
+        with run_stats.in_flight("image"):
+            async with session.get(download_url, headers=headers) as response:
+                latency = time.perf_counter() - started_at
+                if headers and response.status == 304:
+                    run_stats.record_response("image", latency, 0)
+                    image_stats.record_hit(revalidated=True)
+                    icon_logger.info("Not modified: %s -> %s", icon.name, file_path.name)
+                    return
+
+                response.raise_for_status()
+
+                expected_size = get_content_length(response.headers)
+                async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                    chunks.append(chunk)
+                    buffered += len(chunk)
+                    byte_count += len(chunk)
+                    if buffered >= CHUNK_SIZE:
+                        if writer is None:
+                            writer = await asyncio.to_thread(
+                                open_writer, file_path, store, expected_size
+                            )
+                        await asyncio.to_thread(_write_chunks, writer, chunks)
+                        chunks = []
+                        buffered = 0
+                if expected_size is not None and byte_count != expected_size:
+                    raise aiohttp.ClientPayloadError(
+                        f"Received {byte_count} of {expected_size} bytes"
+                    )
+
+        run_stats.record_response("image", latency, byte_count)
+
+        await asyncio.to_thread(
+            _save_icon,
+            icon,
+            file_path,
+            size,
+            writer,
+            chunks,
+            byte_count,
+            validators_from_headers(response.headers),
+            journal,
+            store,
+        )
+    except BaseException:
+        # Only removes a temporary file, so it is not worth a thread
+        if writer is not None:
+            writer.abort()
+        raise
+    if headers:
+        image_stats.record_miss(expired=True)
+
+    icon_logger.info("Downloaded: %s -> %s", icon.name, file_path.name)
+
+
+def _write_chunks(writer: Writer, chunks: list[bytes]) -> None:
+    """Write buffered chunks of a response body; runs in a thread."""
+    for chunk in chunks:
+        writer.write(chunk)
+
+
+def _save_icon(
+    icon: IconRecord,
+    file_path: Path,
+    size: int,
+    writer: Optional[Writer],
+    chunks: list[bytes],
+    byte_count: int,
+    validators: Mapping[str, str],
+    journal: Optional[ResumeJournal],
+    store: Optional[FileStore],
+) -> None:
+    """
+    Write the rest of a downloaded icon, commit it and record it in the
+    journal; runs in a thread.
+
+    Args:
+        icon: Downloaded icon
+        file_path: Destination file path
+        size: Icon size parameter
+        writer: Writer opened for earlier chunks, None if the whole body is
+            still buffered
+        chunks: Chunks of the body not written yet
+        byte_count: Size of the whole body
+        validators: Validators of the response, recorded in the journal
+        journal: Optional resume journal to record the download in
+        store: Optional content store or archive to save the icon through
+
+    Raises:
+        OSError: If the icon cannot be saved
+    """
+    if writer is None:
+        writer = open_writer(file_path, store, byte_count)
+    try:
+        _write_chunks(writer, chunks)
+    except BaseException:
+        writer.abort()
+        raise
+    writer.commit()
+
+    if journal:
+        journal.record(icon.id, size, file_path, validators)
@@ -3,12 +3,464 @@
 import hashlib
 import json
 import logging
+import os
+import sqlite3
 import tempfile
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Iterator, Mapping, Optional
+
+from icons8_download_cli.defaults import CACHE_BACKENDS
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+DEFAULT_MAX_SIZE_BYTES = 1024 * 1024 * 1024
+SQLITE_FILENAME = "cache.sqlite3"
+# PRAGMA auto_vacuum value of incremental mode
+_INCREMENTAL_VACUUM = 2
+
+
+@dataclass
+class CacheSettings:
+    """
+    Expiration and size limits applied to cached responses.
+
+    Sizes are measured as stored: JSON files for the file backend, and
+    compressed payloads for the SQLite backend.
+    """
+
+    ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS
+    max_size_bytes: Optional[int] = DEFAULT_MAX_SIZE_BYTES
+    backend: str = "file"
+
+
+@dataclass
+class CacheInfo:
+    """Snapshot of the cache contents."""
+
+    entries: int
+    total_bytes: int
+    expired_entries: int
+    oldest: Optional[float]
+    newest: Optional[float]
+
+
+@dataclass
+class CachedResponse:
+    """Cached response data with its freshness and HTTP validators."""
+
+    data: dict[str, Any]
+    created_at: float
+    validators: dict[str, str]
+    expired: bool
+
+    def conditional_headers(self) -> dict[str, str]:
+        """
+        Build headers for a conditional request revalidating this entry.
+
+        Returns:
+            If-None-Match / If-Modified-Since headers, empty if no validators
+        """
+        return conditional_headers(self.validators)
+
+
+@dataclass
+class CacheEntry:
+    """Stored metadata of a cached response."""
+
+    key: str
+    # Bytes stored: the file size, or the compressed payload size in SQLite
+    size: int
+    created_at: float
+    accessed_at: float
+
+
+class CacheStats:
+    """Thread-safe hit/miss counters for the current process."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.revalidated = 0
+
+    def record_hit(self, revalidated: bool = False) -> None:
+        """
+        Count a cache hit.
+
+        Args:
+            revalidated: Whether the entry was confirmed by a 304 response
+        """
+        with self._lock:
+            self.hits += 1
+            if revalidated:
+                self.revalidated += 1
+
+    def record_miss(self, expired: bool = False) -> None:
+        """
+        Count a cache miss.
+
+        Args:
+            expired: Whether the entry existed but had expired
+        """
+        with self._lock:
+            self.misses += 1
+            if expired:
+                self.expired += 1
+
+    @property
+    def hit_ratio(self) -> float:
+        """Fraction of lookups served from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class FileCacheBackend:
+    """One JSON file per cached URL in the cache directory."""
+
+    def __init__(self, cache_dir: Path) -> None:
+        self.cache_dir = cache_dir
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def load(self, key: str) -> Optional[tuple[dict[str, Any], float, dict[str, str]]]:
+        """
+        Load a cached response.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Tuple of (response data, created_at, validators), or None if not
+            found
+
+        Raises:
+            ValueError: If the stored entry cannot be decoded
+        """
+        cache_path = self._path(key)
+
+        try:
+            created_at = cache_path.stat().st_mtime
+            stored = json.loads(cache_path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except (json.JSONDecodeError, UnicodeDecodeError, IOError) as e:
+            raise ValueError(f"Failed to read cache file {cache_path}: {e}") from e
+
+        # Entries written before validators were stored hold the bare response
+        if isinstance(stored, dict) and set(stored) == {"response", "validators"}:
+            return stored["response"], created_at, stored["validators"]
+        return stored, created_at, {}
+
+    def touch(self, key: str, created_at: float, accessed_at: float) -> None:
+        """Record an access without changing the creation time."""
+        try:
+            os.utime(self._path(key), (accessed_at, created_at))
+        except OSError:
+            pass
+
+    def renew(self, key: str, now: float) -> None:
+        """Reset the creation time after a successful revalidation."""
+        try:
+            os.utime(self._path(key), (now, now))
+        except OSError:
+            pass
+
+    def store(
+        self,
+        key: str,
+        url: str,
+        response_data: dict[str, Any],
+        validators: Mapping[str, str],
+    ) -> None:
+        """
+        Store a response.
+
+        Raises:
+            IOError: If the cache file cannot be written
+        """
+        stored: dict[str, Any] = response_data
+        if validators:
+            stored = {"response": response_data, "validators": dict(validators)}
+
+        # Compact JSON: cached pages are parsed on every cache hit
+        with self._path(key).open("w", encoding="utf-8") as f:
+            json.dump(stored, f, separators=(",", ":"))
+
+    def entries(self) -> list[CacheEntry]:
+        """List metadata of all cached responses."""
+        entries = []
+        for cache_path in self.cache_dir.glob("*.json"):
+            try:
+                stat = cache_path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append(
+                CacheEntry(cache_path.stem, stat.st_size, stat.st_mtime, stat.st_atime)
+            )
+        return entries
+
+    def delete(self, keys: list[str]) -> None:
+        """Delete cached responses."""
+        for key in keys:
+            self._path(key).unlink(missing_ok=True)
+
+
+class SqliteCacheBackend:
+    """
+    All cached responses in a single SQLite database.
+
+    Payloads are stored as zlib-compressed compact JSON under an indexed key;
+    the size of an entry, and so the size limit of the cache, counts the
+    compressed payload. The database runs in WAL mode with a busy timeout,
+    so listing threads and concurrent processes can read and write it at the
+    same time. It uses incremental auto-vacuum, and delete() hands the pages
+    of deleted entries back to the file system, so the file shrinks when
+    entries are pruned. Threads
+    borrow a connection from a pool of idle ones for each operation, so
+    listing threads coming and going reuse connections instead of each
+    opening its own; close() closes them all.
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._idle: list[sqlite3.Connection] = []
+        self._idle_lock = threading.Lock()
+
+        with self._connection() as connection:
+            # Switching an existing database, even an empty one already in WAL
+            # mode, takes a full VACUUM; it runs once per database
+            if connection.execute("PRAGMA auto_vacuum").fetchone()[0] != _INCREMENTAL_VACUUM:
+                connection.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                connection.execute("VACUUM")
+
+        with self._connection() as connection, connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " url TEXT NOT NULL,"
+                " payload BLOB NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL,"
+                " validators TEXT"
+                ")"
+            )
+            columns = {
+                row[1] for row in connection.execute("PRAGMA table_info(responses)")
+            }
+            if "validators" not in columns:
+                connection.execute("ALTER TABLE responses ADD COLUMN validators TEXT")
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed_at"
+                " ON responses (accessed_at)"
+            )
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow an idle connection, opening a new one if all are in use."""
+        with self._idle_lock:
+            connection = self._idle.pop() if self._idle else None
+        if connection is None:
+            # Used by one thread at a time, but not always the same one
+            connection = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+        try:
+            yield connection
+        finally:
+            with self._idle_lock:
+                self._idle.append(connection)
+
+    def close(self) -> None:
+        """
+        Close all connections.
+
+        Closing the last connection to the database checkpoints the WAL into
+        it. Connections are opened again if the cache is used afterwards.
+        """
+        with self._idle_lock:
+            connections, self._idle = self._idle, []
+        for connection in connections:
+            try:
+                connection.close()
+            except sqlite3.Error as e:
+                logger.warning("Failed to close cache database: %s", e)
+
+    def load(self, key: str) -> Optional[tuple[dict[str, Any], float, dict[str, str]]]:
+        """
+        Load a cached response.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Tuple of (response data, created_at, validators), or None if not
+            found
+
+        Raises:
+            ValueError: If the stored entry cannot be decoded
+        """
+        with self._connection() as connection:
+            row = connection.execute(
+                "SELECT payload, created_at, validators FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+
+        payload, created_at, validators = row
+        try:
+            return (
+                json.loads(zlib.decompress(payload)),
+                created_at,
+                json.loads(validators) if validators else {},
+            )
+        except (zlib.error, json.JSONDecodeError) as e:
+            raise ValueError(f"Failed to decode cache entry {key}: {e}") from e
+
+    def touch(self, key: str, created_at: float, accessed_at: float) -> None:
+        """Record an access without changing the creation time."""
+        with self._connection() as connection, connection:
+            connection.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                (accessed_at, key),
+            )
+
+    def renew(self, key: str, now: float) -> None:
+        """Reset the creation time after a successful revalidation."""
+        with self._connection() as connection, connection:
+            connection.execute(
+                "UPDATE responses SET created_at = ?, accessed_at = ? WHERE key = ?",
+                (now, now, key),
+            )
+
+    def store(
+        self,
+        key: str,
+        url: str,
+        response_data: dict[str, Any],
+        validators: Mapping[str, str],
+    ) -> None:
+        """
+        Store a response.
+
+        Raises:
+            sqlite3.Error: If the entry cannot be written
+        """
+        payload = zlib.compress(
+            json.dumps(response_data, separators=(",", ":")).encode("utf-8")
+        )
+        now = time.time()
+        with self._connection() as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO responses"
+                " (key, url, payload, size, created_at, accessed_at, validators)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    url,
+                    payload,
+                    len(payload),
+                    now,
+                    now,
+                    json.dumps(dict(validators)) if validators else None,
+                ),
+            )
+
+    def entries(self) -> list[CacheEntry]:
+        """List metadata of all cached responses."""
+        with self._connection() as connection:
+            rows = connection.execute(
+                "SELECT key, size, created_at, accessed_at FROM responses"
+            )
+            return [CacheEntry(*row) for row in rows]
+
+    def delete(self, keys: list[str]) -> None:
+        """Delete cached responses and shrink the database file."""
+        with self._connection() as connection:
+            with connection:
+                connection.executemany(
+                    "DELETE FROM responses WHERE key = ?",
+                    [(key,) for key in keys],
+                )
+            # Frees one page per step; execute() steps it only once, while
+            # executescript() runs it to completion
+            connection.executescript("PRAGMA incremental_vacuum;")
+
+
+settings = CacheSettings()
+stats = CacheStats()
+
+_backend: Optional[FileCacheBackend | SqliteCacheBackend] = None
+_backend_lock = threading.Lock()
+
+
+def configure_cache(
+    ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS,
+    max_size_bytes: Optional[int] = DEFAULT_MAX_SIZE_BYTES,
+    backend: str = "file",
+) -> None:
+    """
+    Configure cache expiration, size limits and storage backend.
+
+    Args:
+        ttl_seconds: Maximum age of a cached response, or None to never expire
+        max_size_bytes: Maximum total cache size, or None for no limit
+        backend: Storage backend, "file" (one JSON file per URL) or "sqlite"
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    global _backend
+
+    if backend not in CACHE_BACKENDS:
+        raise ValueError(f"Unknown cache backend: {backend}")
+
+    with _backend_lock:
+        settings.ttl_seconds = ttl_seconds
+        settings.max_size_bytes = max_size_bytes
+        if backend != settings.backend:
+            settings.backend = backend
+            if isinstance(_backend, SqliteCacheBackend):
+                _backend.close()
+            _backend = None
+
+
+def get_backend() -> FileCacheBackend | SqliteCacheBackend:
+    """
+    Get the configured cache backend, creating it on first use.
+
+    Returns:
+        Active cache backend
+    """
+    global _backend
+
+    with _backend_lock:
+        if _backend is None:
+            if settings.backend == "sqlite":
+                _backend = SqliteCacheBackend(get_cache_dir() / SQLITE_FILENAME)
+            else:
+                _backend = FileCacheBackend(get_cache_dir())
+        return _backend
+
+
+def close_cache() -> None:
+    """Close the database connections of the cache backend, if it has any."""
+    with _backend_lock:
+        backend = _backend
+    if isinstance(backend, SqliteCacheBackend):
+        backend.close()
+
 
 def get_cache_dir() -> Path:
     """
@@ -38,7 +490,7 @@ def generate_cache_key(url: str) -> str:
 
 def get_cache_path(url: str) -> Path:
     """
-    Get the cache file path for a given URL.
+    Get the cache file path for a given URL (file backend).
 
     Args:
         url: Full GET URL string
@@ -51,45 +503,209 @@ def get_cache_path(url: str) -> Path:
     return cache_dir / f"{cache_key}.json"
 
 
+def _is_expired(created_at: float, now: float) -> bool:
+    """Check whether an entry written at created_at is past the TTL."""
+    return settings.ttl_seconds is not None and now - created_at > settings.ttl_seconds
+
+
+def validators_from_headers(headers: Mapping[str, str]) -> dict[str, str]:
+    """
+    Extract HTTP validators from response headers.
+
+    Args:
+        headers: Response headers (case-insensitive mapping)
+
+    Returns:
+        Mapping with any of "etag", "last_modified" and "content_length"
+    """
+    validators = {}
+    for key, header in (
+        ("etag", "ETag"),
+        ("last_modified", "Last-Modified"),
+        ("content_length", "Content-Length"),
+    ):
+        value = headers.get(header)
+        if value:
+            validators[key] = value
+    return validators
+
+
+def conditional_headers(validators: Mapping[str, str]) -> dict[str, str]:
+    """
+    Build headers for a conditional request from stored validators.
+
+    Args:
+        validators: Validators as returned by validators_from_headers
+
+    Returns:
+        If-None-Match / If-Modified-Since headers, empty if no validators
+    """
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+def read_cache_entry(url: str) -> Optional[CachedResponse]:
+    """
+    Read a cached response together with its freshness and validators.
+
+    Unlike read_cache, expired entries are returned (flagged as expired) so
+    they can be revalidated with a conditional request. Hit/miss counters
+    are left to the caller.
+
+    Args:
+        url: Full GET URL string
+
+    Returns:
+        Cached response, or None if not found or invalid
+    """
+    backend = get_backend()
+    cache_key = generate_cache_key(url)
+
+    try:
+        entry = backend.load(cache_key)
+    except (ValueError, sqlite3.Error) as e:
+        logger.warning("Failed to read cache entry for %s: %s", url, e)
+        return None
+
+    if entry is None:
+        return None
+
+    data, created_at, validators = entry
+    now = time.time()
+    expired = _is_expired(created_at, now)
+
+    if not expired:
+        try:
+            backend.touch(cache_key, created_at, now)
+        except sqlite3.Error as e:
+            logger.debug("Failed to update cache access time for %s: %s", url, e)
+
+    return CachedResponse(data, created_at, validators, expired)
+
+
 def read_cache(url: str) -> Optional[dict[str, Any]]:
     """
     Read cached response for a given URL.
 
+    Entries older than the configured TTL are treated as missing. A hit
+    refreshes the entry's access time, which drives LRU eviction.
+
     Args:
         url: Full GET URL string
 
     Returns:
-        Cached response data as dict, or None if not found or invalid
+        Cached response data as dict, or None if not found, expired or invalid
     """
-    cache_path = get_cache_path(url)
+    entry = read_cache_entry(url)
 
-    if not cache_path.exists():
+    if entry is None:
+        stats.record_miss()
         return None
 
-    try:
-        with cache_path.open("r", encoding="utf-8") as f:
-            data = json.load(f)
-        logger.debug("Cache hit for URL: %s", url)
-        return data
-    except (json.JSONDecodeError, IOError) as e:
-        logger.warning("Failed to read cache file %s: %s", cache_path, e)
+    if entry.expired:
+        logger.debug("Cache entry expired for URL: %s", url)
+        stats.record_miss(expired=True)
         return None
 
+    logger.debug("Cache hit for URL: %s", url)
+    stats.record_hit()
+    return entry.data
+
+
+def renew_cache(url: str) -> None:
+    """
+    Mark a cached response as fresh again after a 304 Not Modified.
+
+    Args:
+        url: Full GET URL string
+    """
+    try:
+        get_backend().renew(generate_cache_key(url), time.time())
+    except sqlite3.Error as e:
+        logger.warning("Failed to renew cache entry for %s: %s", url, e)
+
 
-def write_cache(url: str, response_data: dict[str, Any]) -> None:
+def write_cache(
+    url: str,
+    response_data: dict[str, Any],
+    validators: Optional[Mapping[str, str]] = None,
+) -> None:
     """
     Write response data to cache.
 
     Args:
         url: Full GET URL string
         response_data: Response data to cache (dict)
+        validators: Optional HTTP validators of the response
     """
-    cache_path = get_cache_path(url)
-
     try:
-        with cache_path.open("w", encoding="utf-8") as f:
-            json.dump(response_data, f, indent=2)
+        get_backend().store(generate_cache_key(url), url, response_data, validators or {})
         logger.debug("Cached response for URL: %s", url)
-    except IOError as e:
-        logger.warning("Failed to write cache file %s: %s", cache_path, e)
+    except (IOError, sqlite3.Error) as e:
+        logger.warning("Failed to write cache entry for %s: %s", url, e)
+
+
+def get_cache_info() -> CacheInfo:
+    """
+    Summarize the cache contents.
+
+    Returns:
+        Number of entries, total size, expired entries and age range
+    """
+    entries = get_backend().entries()
+    now = time.time()
+    created_times = [entry.created_at for entry in entries]
+
+    return CacheInfo(
+        entries=len(entries),
+        total_bytes=sum(entry.size for entry in entries),
+        expired_entries=sum(1 for created_at in created_times if _is_expired(created_at, now)),
+        oldest=min(created_times, default=None),
+        newest=max(created_times, default=None),
+    )
+
+
+def prune_cache() -> tuple[int, int]:
+    """
+    Remove expired entries, then evict least recently used entries until the
+    cache fits within the configured maximum size.
+
+    Returns:
+        Tuple of (expired_count, evicted_count)
+    """
+    backend = get_backend()
+    now = time.time()
+    expired: list[str] = []
+    evicted: list[str] = []
+    remaining: list[CacheEntry] = []
+
+    for entry in backend.entries():
+        if _is_expired(entry.created_at, now):
+            expired.append(entry.key)
+        else:
+            remaining.append(entry)
+
+    if settings.max_size_bytes is not None:
+        total_bytes = sum(entry.size for entry in remaining)
+
+        # Least recently used first
+        remaining.sort(key=lambda entry: entry.accessed_at)
+        for entry in remaining:
+            if total_bytes <= settings.max_size_bytes:
+                break
+            evicted.append(entry.key)
+            total_bytes -= entry.size
+
+    if expired or evicted:
+        backend.delete(expired + evicted)
+        logger.info(
+            "Pruned cache: %d expired, %d evicted",
+            len(expired),
+            len(evicted),
+        )
 
+    return len(expired), len(evicted)
@@ -1,22 +1,75 @@
 """CLI entry point and command definitions."""
 
+from __future__ import annotations
+
 import logging
 import os
 import platform
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, NamedTuple
 
 import click
 
-from icons8_download_cli.api import fetch_all_icons
-from icons8_download_cli.downloader import download_icons_parallel, resolve_filenames
-from icons8_download_cli.models import Icon
+from icons8_download_cli.concurrency import DEFAULT_MAX_CONCURRENCY, DEFAULT_MIN_CONCURRENCY
+from icons8_download_cli.defaults import (
+    CACHE_BACKENDS,
+    DEAD_LETTER_FILENAME,
+    DEFAULT_FSYNC_BATCH,
+    DEFAULT_MAX_RETRIES,
+    LAYOUTS,
+    PAGE_SIZE,
+    STORE_DIRNAME,
+    STYLE_CONCURRENCY,
+)
+from icons8_download_cli.logfile import ICON_LOG_LEVELS, start_file_logging, stop_file_logging
+from icons8_download_cli.metrics import (
+    build_report,
+    stats as run_stats,
+    write_prometheus_textfile,
+    write_stats_json,
+)
+from icons8_download_cli.profiling import PROFILE_MODES
+from icons8_download_cli.progress import PROGRESS_MODES
+
+# Modules that load requests, pydantic or rich, or the stdlib's sqlite3,
+# zipfile and tarfile, are imported where they are used, so --help and
+# --version stay fast
+if TYPE_CHECKING:
+    from rich.console import Console
+
+    from icons8_download_cli.client import HttpClient
+    from icons8_download_cli.deadletter import DeadLetterFile
+    from icons8_download_cli.downloader import DownloadJob, FilenameResolver
+    from icons8_download_cli.journal import ResumeJournal
+    from icons8_download_cli.models import IconRecord
+    from icons8_download_cli.progress import ProgressCounter
+    from icons8_download_cli.resize import DeriveJob
+    from icons8_download_cli.shards import ManifestWriter, Shard
+    from icons8_download_cli.storage import FileStore
 
 
-def _get_console():
-    """Lazy import rich console to avoid slow startup."""
+def _get_console(stderr: bool = False, quiet: bool = False):
+    """
+    Lazy import rich console to avoid slow startup.
+
+    Args:
+        stderr: Print to stderr, keeping stdout for machine-readable output
+        quiet: Print error messages (those starting with "[red]") only, on
+            stderr
+    """
     from rich.console import Console
-    return Console()
+
+    if not quiet:
+        return Console(stderr=stderr)
+
+    class ErrorConsole(Console):
+        def print(self, *objects, **kwargs) -> None:
+            if objects and isinstance(objects[0], str) and objects[0].startswith("[red]"):
+                super().print(*objects, **kwargs)
+
+    return ErrorConsole(stderr=True)
 
 
 def _get_progress():
@@ -73,13 +126,186 @@ def get_version() -> str:
     raise RuntimeError("Unable to determine package version")
 
 
-# Get version at module level for use in CLI
-_VERSION = get_version()
+def _print_version(ctx: click.Context, param: click.Parameter, value: bool) -> None:
+    """Print the version and exit; resolved only when --version is given."""
+    if not value or ctx.resilient_parsing:
+        return
+    click.echo(f"icons8-download, version {get_version()}")
+    ctx.exit()
+
 
 # Size choices enum
 SIZE_CHOICES = click.Choice(["24", "48", "96", "192", "384", "512"], case_sensitive=False)
 
 
+class SizeListType(click.ParamType):
+    """Comma-separated icon sizes from SIZE_CHOICES, or 'all'."""
+
+    name = "sizes"
+
+    def convert(self, value, param, ctx):
+        if isinstance(value, list):
+            return value
+        text = str(value).strip().lower()
+        if text == "all":
+            return [int(choice) for choice in SIZE_CHOICES.choices]
+
+        sizes: list[int] = []
+        for part in text.split(","):
+            part = part.strip().removesuffix("px")
+            if part not in SIZE_CHOICES.choices:
+                self.fail(
+                    f"{part!r} is not one of {', '.join(SIZE_CHOICES.choices)} or 'all'",
+                    param,
+                    ctx,
+                )
+            if int(part) not in sizes:
+                sizes.append(int(part))
+        return sizes
+
+
+class StyleListType(click.ParamType):
+    """Comma-separated icon styles."""
+
+    name = "styles"
+
+    def convert(self, value, param, ctx):
+        if isinstance(value, list):
+            return value
+
+        styles: list[str] = []
+        for part in str(value).split(","):
+            part = part.strip()
+            if part and part not in styles:
+                styles.append(part)
+        if not styles:
+            self.fail("at least one style must be given", param, ctx)
+        return styles
+
+
+class FsyncType(click.ParamType):
+    """Fsync mode: always, off, batch or batch:N, converted to (mode, N)."""
+
+    name = "mode"
+
+    def convert(self, value, param, ctx):
+        if isinstance(value, tuple):
+            return value
+        text = str(value).strip().lower()
+        if text in ("always", "off"):
+            return text, DEFAULT_FSYNC_BATCH
+        mode, _, count = text.partition(":")
+        if mode == "batch":
+            if not count:
+                return mode, DEFAULT_FSYNC_BATCH
+            if count.isdigit() and int(count) > 0:
+                return mode, int(count)
+        self.fail(f"{value!r} is not one of always, off, batch or batch:N", param, ctx)
+
+
+class ShardType(click.ParamType):
+    """Shard i/N of a run split across N invocations, converted to a Shard."""
+
+    name = "i/N"
+
+    def convert(self, value, param, ctx):
+        from icons8_download_cli.shards import Shard, parse_shard
+
+        if isinstance(value, Shard):
+            return value
+        try:
+            return parse_shard(str(value))
+        except ValueError as e:
+            self.fail(str(e), param, ctx)
+
+
+class DurationType(click.ParamType):
+    """Duration such as 90, 30m, 12h or 7d, converted to seconds."""
+
+    name = "duration"
+    _UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+    def convert(self, value, param, ctx):
+        if isinstance(value, (int, float)):
+            return float(value)
+        text = str(value).strip().lower()
+        if text in ("none", "never"):
+            return None
+        unit = self._UNITS.get(text[-1:], None)
+        number = text[:-1] if unit else text
+        try:
+            return float(number) * (unit or 1)
+        except ValueError:
+            self.fail(f"{value!r} is not a valid duration (e.g. 30m, 12h, 7d)", param, ctx)
+
+
+class ByteSizeType(click.ParamType):
+    """Size such as 500MB or 2GB, converted to bytes."""
+
+    name = "size"
+    _UNITS = {"": 1, "b": 1, "kb": 1024, "mb": 1024**2, "gb": 1024**3, "tb": 1024**4}
+
+    def convert(self, value, param, ctx):
+        if isinstance(value, int):
+            return value
+        text = str(value).strip().lower()
+        if text in ("none", "unlimited"):
+            return None
+        number = text.rstrip("kmgtb").strip()
+        unit = self._UNITS.get(text[len(number):].strip())
+        try:
+            if unit is not None:
+                return int(float(number) * unit)
+        except ValueError:
+            pass
+        self.fail(f"{value!r} is not a valid size (e.g. 500MB, 2GB)", param, ctx)
+
+
+def cache_options(command):
+    """Add options shared by commands that use the response cache."""
+    command = click.option(
+        "--cache-backend",
+        type=click.Choice(CACHE_BACKENDS, case_sensitive=False),
+        default="file",
+        envvar="ICONS8_CACHE_BACKEND",
+        show_envvar=True,
+        help="Cache storage: one JSON file per URL, or a single compressed "
+        "SQLite database (default: file)",
+    )(command)
+    command = click.option(
+        "--cache-max-size",
+        type=ByteSizeType(),
+        default="1GB",
+        envvar="ICONS8_CACHE_MAX_SIZE",
+        show_envvar=True,
+        help="Maximum cache size before least recently used entries are "
+        "evicted, or 'unlimited' (default: 1GB)",
+    )(command)
+    command = click.option(
+        "--cache-ttl",
+        type=DurationType(),
+        default="7d",
+        envvar="ICONS8_CACHE_TTL",
+        show_envvar=True,
+        help="Maximum age of cached listing responses, or 'never' to keep "
+        "them forever (default: 7d)",
+    )(command)
+    return command
+
+
+class DefaultCommandGroup(click.Group):
+    """Command group that runs a default command when none is named."""
+
+    def __init__(self, *args, default_command: str, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.default_command = default_command
+
+    def parse_args(self, ctx, args):
+        if not args or (args[0] not in self.commands and args[0] not in ("--help", "--version")):
+            args.insert(0, self.default_command)
+        return super().parse_args(ctx, args)
+
+
 def get_default_downloads_dir() -> Path:
     """
     Get OS-specific Downloads directory respecting non-standard paths.
@@ -211,30 +437,47 @@ def _get_macos_downloads_dir() -> Path:
     return Path.home() / "Downloads"
 
 
-def setup_file_logging(target_directory: Path) -> None:
+def setup_file_logging(
+    target_directory: Path,
+    icon_log_level: str = "info",
+    icon_log_sample: int = 1,
+) -> None:
     """
     Setup file logging to target directory.
 
+    The log file is written by a background thread until the command
+    finishes (see the logfile module).
+
     Args:
         target_directory: Directory where log file will be created
+        icon_log_level: Lowest level of per-icon log lines
+        icon_log_sample: Log one in this many per-icon info lines
     """
     timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
     log_file = target_directory / f"icons8-download-log-{timestamp}.log"
 
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.FileHandler(log_file, encoding="utf-8"),
-        ],
-    )
+    start_file_logging(log_file, icon_log_level.lower(), icon_log_sample)
+    click.get_current_context().call_on_close(stop_file_logging)
 
-    logger = logging.getLogger(__name__)
-    logger.info("Logging initialized. Log file: %s", log_file)
+
+@click.group(cls=DefaultCommandGroup, default_command="download")
+@click.option(
+    "--version",
+    is_flag=True,
+    expose_value=False,
+    is_eager=True,
+    callback=_print_version,
+    help="Show the version and exit.",
+)
+def cli() -> None:
+    """
+    Download icons from Icons8.com.
+
+    Runs the download command unless another command is named.
+    """
 
 
-@click.command()
-@click.version_option(version=_VERSION, prog_name="icons8-download")
+@cli.command()
 @click.option(
     "--target-directory",
     "-d",
@@ -245,23 +488,58 @@ def setup_file_logging(target_directory: Path) -> None:
 @click.option(
     "--size",
     "-s",
-    type=SIZE_CHOICES,
+    "sizes",
+    type=SizeListType(),
     default="512",
-    help="Icon size (default: 512)",
+    help="Icon size, comma-separated sizes such as 24,48,512, or 'all' "
+    "(default: 512)",
 )
 @click.option(
     "--style",
     "-S",
-    type=str,
+    "styles",
+    type=StyleListType(),
     default=None,
-    help="Icon style filter",
+    help="Icon style filter, or comma-separated styles such as ios,color",
+)
+@click.option(
+    "--all-styles",
+    is_flag=True,
+    default=False,
+    help="Download every style listed in styles.json",
+)
+@click.option(
+    "--style-concurrency",
+    type=click.IntRange(min=1),
+    default=STYLE_CONCURRENCY,
+    help=f"Number of styles listed at the same time (default: {STYLE_CONCURRENCY})",
 )
 @click.option(
     "--workers",
     "-w",
     type=int,
     default=10,
-    help="Number of parallel download threads (default: 10)",
+    help="Number of parallel downloads: threads, or coroutines with --engine "
+    "async (default: 10)",
+)
+@click.option(
+    "--adaptive",
+    is_flag=True,
+    default=False,
+    help="Adapt the number of requests in flight to 429s, errors and latency, "
+    "starting at --workers (thread engine only)",
+)
+@click.option(
+    "--min-workers",
+    type=click.IntRange(min=1),
+    default=DEFAULT_MIN_CONCURRENCY,
+    help=f"Lowest concurrency in --adaptive mode (default: {DEFAULT_MIN_CONCURRENCY})",
+)
+@click.option(
+    "--max-workers",
+    type=click.IntRange(min=1),
+    default=DEFAULT_MAX_CONCURRENCY,
+    help=f"Highest concurrency in --adaptive mode (default: {DEFAULT_MAX_CONCURRENCY})",
 )
 @click.option(
     "--no-cache",
@@ -270,150 +548,1894 @@ def setup_file_logging(target_directory: Path) -> None:
     default=False,
     help="Disable response caching",
 )
+@click.option(
+    "--page-size",
+    type=click.IntRange(min=1),
+    default=PAGE_SIZE,
+    help=f"Number of icons requested per listing page (default: {PAGE_SIZE})",
+)
+@click.option(
+    "--list-concurrency",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of listing page requests kept in flight (default: 1)",
+)
+@click.option(
+    "--max-connections-per-host",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Hard limit of simultaneous connections per host (default: no limit)",
+)
+@click.option(
+    "--engine",
+    type=click.Choice(["thread", "async"], case_sensitive=False),
+    default="thread",
+    help="Download engine: thread pool or asyncio (default: thread)",
+)
+@click.option(
+    "--stream",
+    is_flag=True,
+    default=False,
+    help="Start downloading while the listing is still being fetched",
+)
+@click.option(
+    "--queue-size",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Maximum queued downloads in --stream mode (default: 4 x workers)",
+)
+@click.option(
+    "--no-resume",
+    is_flag=True,
+    default=False,
+    help="Ignore the resume journal and download every icon again",
+)
+@click.option(
+    "--revalidate",
+    is_flag=True,
+    default=False,
+    help="Check cached listings and previously downloaded icons with "
+    "conditional requests and refresh only what changed",
+)
+@click.option(
+    "--retries",
+    type=click.IntRange(min=0),
+    default=DEFAULT_MAX_RETRIES,
+    help="Retries of requests failing with timeouts, connection errors, 429 or "
+    f"5xx, with exponential backoff (default: {DEFAULT_MAX_RETRIES})",
+)
+@click.option(
+    "--retry-failed",
+    type=click.Path(exists=True, file_okay=True, dir_okay=False, path_type=Path),
+    default=None,
+    help=f"Download only the icons listed in a {DEAD_LETTER_FILENAME} file "
+    "of a previous run, without listing styles again",
+)
+@click.option(
+    "--dedupe",
+    is_flag=True,
+    default=False,
+    help="Keep one copy of byte-identical icons in a content-addressed store "
+    "and hardlink the downloaded files to it",
+)
+@click.option(
+    "--store-dir",
+    type=click.Path(file_okay=False, dir_okay=True, path_type=Path),
+    default=None,
+    help=f"Content store used by --dedupe (default: <target>/{STORE_DIRNAME})",
+)
+@click.option(
+    "--output-archive",
+    type=click.Path(file_okay=True, dir_okay=False, path_type=Path),
+    default=None,
+    help="Write icons into a .zip, .tar, .tar.gz, .tar.xz or .tar.zst archive "
+    "instead of loose files (disables the resume journal)",
+)
+@click.option(
+    "--fsync",
+    type=FsyncType(),
+    default="off",
+    help="Flush downloaded files to disk before they are renamed into place "
+    f"(always), in groups of N files (batch:N, default N: {DEFAULT_FSYNC_BATCH}) "
+    "or leave it to the OS (off) (default: off)",
+)
+@click.option(
+    "--layout",
+    type=click.Choice(LAYOUTS, case_sensitive=False),
+    default="flat",
+    help="Save icons in one directory (flat), or in subdirectories by the "
+    "first two characters of their name (prefix) or by a hash of their id "
+    "(hash), for styles with very many icons (default: flat)",
+)
+@click.option(
+    "--shard",
+    type=ShardType(),
+    default=None,
+    envvar="ICONS8_SHARD",
+    show_envvar=True,
+    help="Download only shard i of N (e.g. 2/4), picked by a hash of the icon "
+    "id, so N runs on different machines cover every icon once; combine their "
+    "outputs with the merge command",
+)
+@click.option(
+    "--derive-sizes",
+    is_flag=True,
+    default=False,
+    help="Download only the largest of the requested sizes and resize it "
+    "locally to the others, one worker process per CPU (requires Pillow: "
+    "pip install 'icons8-download-cli[resize]')",
+)
+@click.option(
+    "--resize-workers",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Worker processes resizing icons for --derive-sizes (default: number "
+    "of CPUs)",
+)
+@click.option(
+    "--progress",
+    "progress_mode",
+    type=click.Choice(PROGRESS_MODES, case_sensitive=False),
+    default="rich",
+    envvar="ICONS8_PROGRESS",
+    show_envvar=True,
+    help="Progress output: a progress bar (rich), one JSON record per second "
+    "on stdout with all other output on stderr (jsonl), or none (default: rich)",
+)
+@click.option(
+    "--quiet",
+    "-q",
+    is_flag=True,
+    default=False,
+    help="Print errors only; the progress bar is hidden unless --progress jsonl "
+    "is given",
+)
+@click.option(
+    "--icon-log-level",
+    type=click.Choice(ICON_LOG_LEVELS, case_sensitive=False),
+    default="info",
+    help="Lowest level of per-icon lines in the log file: info logs every "
+    "download, warning or error only failures (default: info)",
+)
+@click.option(
+    "--icon-log-sample",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Log one in N per-icon info lines; failures are always logged "
+    "(default: 1)",
+)
+@click.option(
+    "--stats-json",
+    type=click.Path(file_okay=True, dir_okay=False, path_type=Path),
+    default=None,
+    envvar="ICONS8_STATS_JSON",
+    show_envvar=True,
+    help="Write run statistics (request latencies, bytes, cache hits, retries, "
+    "phase times, peak concurrency) to a JSON file",
+)
+@click.option(
+    "--prometheus-textfile",
+    type=click.Path(file_okay=True, dir_okay=False, path_type=Path),
+    default=None,
+    envvar="ICONS8_PROMETHEUS_TEXTFILE",
+    show_envvar=True,
+    help="Write run metrics to a file in the Prometheus text format, e.g. for "
+    "the node_exporter textfile collector",
+)
+@click.option(
+    "--profile",
+    type=click.Path(file_okay=True, dir_okay=False, path_type=Path),
+    default=None,
+    help="Write a Chrome trace of the run's phases, requests and downloads, "
+    "viewable in Perfetto or chrome://tracing",
+)
+@click.option(
+    "--profile-mode",
+    type=click.Choice(PROFILE_MODES, case_sensitive=False),
+    default="spans",
+    help="With --profile, also write a cProfile profile per phase (cprofile) "
+    "or sampled stacks per phase and thread for flame graphs (sample) "
+    "(default: spans)",
+)
+@cache_options
 def download(
     target_directory: Path | None,
-    size: str,
-    style: str | None,
+    sizes: list[int],
+    styles: list[str] | None,
+    all_styles: bool,
+    style_concurrency: int,
     workers: int,
+    adaptive: bool,
+    min_workers: int,
+    max_workers: int,
     no_cache: bool,
+    page_size: int,
+    list_concurrency: int,
+    max_connections_per_host: int | None,
+    engine: str,
+    stream: bool,
+    queue_size: int | None,
+    no_resume: bool,
+    revalidate: bool,
+    retries: int,
+    retry_failed: Path | None,
+    dedupe: bool,
+    store_dir: Path | None,
+    output_archive: Path | None,
+    fsync: tuple[str, int],
+    layout: str,
+    shard: Shard | None,
+    derive_sizes: bool,
+    resize_workers: int | None,
+    progress_mode: str,
+    quiet: bool,
+    icon_log_level: str,
+    icon_log_sample: int,
+    stats_json: Path | None,
+    prometheus_textfile: Path | None,
+    profile: Path | None,
+    profile_mode: str,
+    cache_ttl: float | None,
+    cache_max_size: int | None,
+    cache_backend: str,
 ) -> None:
     """
     Download icons from Icons8.com API.
 
-    --style must be provided.
+    --style or --all-styles must be provided, unless --retry-failed
+    re-downloads the failures of a previous run.
     """
     # Determine target directory
-    if target_directory is None:
+    if target_directory is None and retry_failed is not None:
+        target_directory = retry_failed.resolve().parent
+    elif target_directory is None:
         target_directory = get_default_downloads_dir()
     else:
         target_directory = Path(target_directory).resolve()
         target_directory.mkdir(parents=True, exist_ok=True)
 
     # Lazy load rich components (only when actually needed)
-    console = _get_console()
-    Progress, SpinnerColumn, TextColumn, BarColumn = _get_progress()
-    Table = _get_table()
+    progress_mode = progress_mode.lower()
+    if quiet and progress_mode == "rich":
+        progress_mode = "none"
+    console = _get_console(stderr=progress_mode == "jsonl", quiet=quiet)
+
+    # A single size has nothing to derive
+    derive_sizes = derive_sizes and len(sizes) > 1
+    _check_download_options(
+        console,
+        styles=styles,
+        all_styles=all_styles,
+        retry_failed=retry_failed,
+        stream=stream,
+        shard=shard,
+        output_archive=output_archive,
+        dedupe=dedupe,
+        derive_sizes=derive_sizes,
+        engine=engine,
+        adaptive=adaptive,
+        min_workers=min_workers,
+        max_workers=max_workers,
+    )
+    styles, style_labels = _load_styles(console, styles, all_styles)
+    if output_archive is not None:
+        # Nothing is saved as files, so there is nothing to resume from
+        no_resume = True
 
-    # Validate that style is provided
-    if not style:
-        console.print(
-            "[red]Error:[/red] --style must be provided",
-        )
-        raise click.Abort()
+    from icons8_download_cli import cache as response_cache, retry
+    from icons8_download_cli.client import HttpClient
+    from icons8_download_cli.deadletter import DeadLetterFile
+    from icons8_download_cli.journal import ResumeJournal
+    from icons8_download_cli.storage import configure_fsync, sync_policy
 
     # Setup logging
-    setup_file_logging(target_directory)
+    setup_file_logging(target_directory, icon_log_level, icon_log_sample)
+    if profile is not None:
+        _start_profile(console, profile, profile_mode)
+    response_cache.configure_cache(cache_ttl, cache_max_size, cache_backend)
+    click.get_current_context().call_on_close(response_cache.close_cache)
+    retry.configure_retries(retries)
+    configure_fsync(*fsync)
+    click.get_current_context().call_on_close(sync_policy.flush)
 
     logger = logging.getLogger(__name__)
     logger.info("Starting download to: %s", target_directory)
     logger.info(
-        "Parameters: size=%s, style=%s, workers=%s",
-        size,
-        style,
+        "Parameters: sizes=%s, styles=%s, style_concurrency=%s, workers=%s, "
+        "adaptive=%s (%s-%s), page_size=%s, list_concurrency=%s, "
+        "max_connections_per_host=%s, engine=%s, stream=%s, resume=%s, "
+        "revalidate=%s, retries=%s, retry_failed=%s, dedupe=%s, "
+        "output_archive=%s, fsync=%s, layout=%s, shard=%s, derive_sizes=%s, "
+        "progress=%s",
+        sizes,
+        styles,
+        style_concurrency,
         workers,
+        adaptive,
+        min_workers,
+        max_workers,
+        page_size,
+        list_concurrency,
+        max_connections_per_host,
+        engine,
+        stream,
+        not no_resume,
+        revalidate,
+        retries,
+        retry_failed,
+        dedupe,
+        output_archive,
+        fsync,
+        layout,
+        shard,
+        derive_sizes,
+        progress_mode,
     )
 
     console.print(f"\n[bold]Icons8 Download CLI[/bold]")
     console.print(f"Target directory: [cyan]{target_directory}[/cyan]")
-    console.print(f"Size: [cyan]{size}[/cyan]px")
-    console.print(f"Style: [cyan]{style}[/cyan]")
-    console.print(f"Parallel workers: [cyan]{workers}[/cyan]")
+    if output_archive is not None:
+        console.print(f"Archive: [cyan]{output_archive}[/cyan]")
+    if retry_failed is not None:
+        console.print(f"Retrying failures from: [cyan]{retry_failed}[/cyan]")
+    else:
+        console.print(f"Size: [cyan]{', '.join(str(size) for size in sizes)}[/cyan]px")
+        if derive_sizes:
+            console.print(f"Derived sizes: [cyan]resized from {max(sizes)}px[/cyan]")
+        if all_styles:
+            console.print(f"Style: [cyan]all ({len(styles)} styles)[/cyan]")
+        else:
+            console.print(f"Style: [cyan]{', '.join(styles)}[/cyan]")
+        if layout != "flat":
+            console.print(f"Layout: [cyan]{layout}[/cyan]")
+        if shard is not None:
+            console.print(f"Shard: [cyan]{shard}[/cyan]")
+    if adaptive:
+        console.print(
+            f"Parallel workers: [cyan]adaptive {min_workers}-{max_workers}[/cyan] "
+            f"(starting at {workers}, {engine} engine)"
+        )
+    else:
+        console.print(f"Parallel workers: [cyan]{workers}[/cyan] ({engine} engine)")
     console.print()
 
-    # Fetch all icons with progress
-    console.print("[yellow]Collecting icons...[/yellow]")
-    all_icons: list[Icon] = []
-    try:
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=console,
-        ) as progress:
-            task = progress.add_task("Fetching icons from API...", total=None)
+    # One pooled client shared by the listing and download paths
+    client = HttpClient(
+        pool_size=max(workers, list_concurrency * min(style_concurrency, len(styles))),
+        max_connections_per_host=max_connections_per_host,
+        adaptive=adaptive,
+        min_concurrency=min_workers,
+        max_concurrency=max_workers,
+        # Adaptive limits start at the download workers, not the listing fan-out
+        initial_concurrency=workers,
+    )
+    click.get_current_context().call_on_close(client.close)
+
+    # In adaptive mode threads are the upper bound; the client limits requests
+    if adaptive:
+        workers = max_workers
+
+    # Journal of completed downloads, so reruns only fetch what is missing
+    journal = None
+    if not no_resume:
+        journal = ResumeJournal(target_directory)
+        click.get_current_context().call_on_close(journal.close)
+
+    # Downloads that still fail after retries, replaced once the run finishes
+    dead_letter = DeadLetterFile(retry_failed or target_directory / DEAD_LETTER_FILENAME)
+    click.get_current_context().call_on_close(dead_letter.close)
+
+    run = _DownloadRun(
+        console,
+        target_directory,
+        client,
+        engine,
+        workers,
+        max_connections_per_host,
+        journal,
+        revalidate,
+        dead_letter,
+        _open_store(console, target_directory, dedupe, store_dir, output_archive),
+        progress_mode,
+        stats_json,
+        prometheus_textfile,
+    )
 
-            def update_progress(count: int) -> None:
-                progress.update(
-                    task,
-                    description=f"Fetching icons from API... ({count} found)",
-                )
+    if retry_failed is not None:
+        _retry_failed_downloads(run, retry_failed)
+        return
 
-            all_icons = fetch_all_icons(
-                style=style,
-                progress_callback=update_progress,
-                use_cache=not no_cache,
+    resolvers = _create_resolvers(
+        target_directory,
+        styles,
+        style_labels,
+        sizes,
+        layout,
+        journal,
+        archived=output_archive is not None,
+    )
+
+    if stream:
+        # Listing, resolving and downloading overlap, so they are one phase
+        with run_stats.phase("stream"):
+            found_count, duplicate_count, skipped_count, downloaded_count, failed_count = (
+                _download_streaming(
+                    run,
+                    resolvers,
+                    style_concurrency,
+                    queue_size,
+                    no_cache,
+                    page_size,
+                    list_concurrency,
+                )
             )
-            progress.update(
-                task,
-                description=f"Found {len(all_icons)} icons",
+        if not no_cache:
+            response_cache.prune_cache()
+        _finish_run(
+            run,
+            sizes,
+            styles,
+            found=found_count,
+            downloaded=downloaded_count,
+            failed=failed_count,
+            skipped=skipped_count,
+            duplicates=duplicate_count,
+        )
+        return
+
+    icons_by_style, listed_count, found_count, duplicate_count = _fetch_listing(
+        run,
+        styles,
+        shard,
+        no_cache,
+        page_size,
+        list_concurrency,
+        style_concurrency,
+    )
+    if not listed_count:
+        console.print("[yellow]No icons found. Exiting.[/yellow]")
+        _write_reports(
+            console,
+            stats_json,
+            prometheus_textfile,
+            client,
+            progress_mode,
+            found=0,
+            duplicates=duplicate_count,
+        )
+        return
+
+    jobs, derive_jobs, skipped_count = _plan_downloads(
+        run,
+        icons_by_style,
+        resolvers,
+        listed_count,
+        shard,
+        styles,
+        sizes,
+        layout,
+        derive_sizes,
+    )
+
+    with run_stats.phase("download"):
+        downloaded_count, failed_count = _download_planned(run, jobs)
+    derived_count = 0
+    if derive_jobs:
+        with run_stats.phase("resize"):
+            derived_count, derive_failed_count = _derive_planned(run, derive_jobs, resize_workers)
+        failed_count += derive_failed_count
+
+    _finish_run(
+        run,
+        sizes,
+        styles,
+        found=found_count,
+        downloaded=downloaded_count,
+        failed=failed_count,
+        skipped=skipped_count,
+        duplicates=duplicate_count,
+        derived=derived_count,
+    )
+
+
+class _DownloadRun(NamedTuple):
+    """Settings and shared objects of a download run, passed to its phases."""
+
+    console: Console
+    target_directory: Path
+    client: HttpClient
+    engine: str
+    workers: int
+    max_connections_per_host: int | None
+    journal: ResumeJournal | None
+    revalidate: bool
+    dead_letter: DeadLetterFile
+    store: FileStore | None
+    progress_mode: str
+    stats_json: Path | None
+    prometheus_textfile: Path | None
+
+
+def _check_download_options(
+    console,
+    *,
+    styles: list[str] | None,
+    all_styles: bool,
+    retry_failed: Path | None,
+    stream: bool,
+    shard: Shard | None,
+    output_archive: Path | None,
+    dedupe: bool,
+    derive_sizes: bool,
+    engine: str,
+    adaptive: bool,
+    min_workers: int,
+    max_workers: int,
+) -> None:
+    """
+    Reject download options that cannot be combined.
+
+    Args:
+        console: Rich console for user-facing output
+        styles: Styles given with --style
+        all_styles: Whether --all-styles was given
+        retry_failed: Dead-letter file given with --retry-failed
+        stream: Whether --stream was given
+        shard: Shard given with --shard
+        output_archive: Archive given with --output-archive
+        dedupe: Whether --dedupe was given
+        derive_sizes: Whether smaller sizes are resized from the largest
+        engine: Download engine, "thread" or "async"
+        adaptive: Whether --adaptive was given
+        min_workers: Lower bound of adaptive concurrency
+        max_workers: Upper bound of adaptive concurrency
+
+    Raises:
+        click.Abort: If the options conflict or a required dependency is missing
+    """
+    # Validate that styles are provided
+    if styles and all_styles:
+        console.print("[red]Error:[/red] --style and --all-styles cannot be combined")
+        raise click.Abort()
+    if not styles and not all_styles and retry_failed is None:
+        console.print(
+            "[red]Error:[/red] --style or --all-styles must be provided",
+        )
+        raise click.Abort()
+    if retry_failed is not None and (
+        styles or all_styles or stream or shard or output_archive is not None
+    ):
+        # An archive is written anew and replaces the previous one, which
+        # would then hold only the retried icons
+        console.print(
+            "[red]Error:[/red] --retry-failed cannot be combined with "
+            "--style, --all-styles, --stream, --shard or --output-archive"
+        )
+        raise click.Abort()
+    if shard is not None and (stream or output_archive is not None):
+        # Streamed styles interleave in arrival order, so names could differ
+        # between shards; archives cannot be merged
+        console.print(
+            "[red]Error:[/red] --shard cannot be combined with --stream or --output-archive"
+        )
+        raise click.Abort()
+
+    if stream and engine == "async":
+        console.print("[red]Error:[/red] --stream is only supported by the thread engine")
+        raise click.Abort()
+
+    if adaptive and engine == "async":
+        console.print("[red]Error:[/red] --adaptive is only supported by the thread engine")
+        raise click.Abort()
+
+    if output_archive is not None:
+        if dedupe:
+            console.print("[red]Error:[/red] --output-archive cannot be combined with --dedupe")
+            raise click.Abort()
+        from icons8_download_cli.storage import get_archive_mode
+
+        try:
+            get_archive_mode(output_archive)
+        except ValueError as e:
+            console.print(f"[red]Error:[/red] {e}")
+            raise click.Abort()
+
+    if derive_sizes:
+        if stream or output_archive is not None or retry_failed is not None:
+            # Resizing reads the downloaded files once all are planned
+            console.print(
+                "[red]Error:[/red] --derive-sizes cannot be combined with --stream, "
+                "--output-archive or --retry-failed"
             )
+            raise click.Abort()
+        from icons8_download_cli.resize import check_resize_support
 
-        console.print(f"[green]✓[/green] Found [bold]{len(all_icons)}[/bold] icons\n")
+        try:
+            check_resize_support()
+        except RuntimeError as e:
+            console.print(f"[red]Error:[/red] {e}")
+            raise click.Abort()
 
-    except Exception as e:
-        console.print(f"[red]✗[/red] Failed to fetch icons: {e}")
-        logger.exception("Failed to fetch icons")
+    if min_workers > max_workers:
+        console.print("[red]Error:[/red] --min-workers cannot exceed --max-workers")
         raise click.Abort()
 
-    if not all_icons:
-        console.print("[yellow]No icons found. Exiting.[/yellow]")
-        return
+    if engine == "async":
+        from icons8_download_cli.async_downloader import check_async_engine
 
-    # Resolve filenames
-    console.print("[yellow]Resolving filenames...[/yellow]")
-    filename_map = resolve_filenames(all_icons, target_directory)
-    console.print(f"[green]✓[/green] Resolved {len(filename_map)} filenames\n")
+        try:
+            check_async_engine()
+        except RuntimeError as e:
+            console.print(f"[red]Error:[/red] {e}")
+            raise click.Abort()
 
-    # Download icons with progress (parallel)
-    console.print("[yellow]Downloading icons...[/yellow]")
 
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        BarColumn(),
-        TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
-        TextColumn("({task.completed}/{task.total})"),
-        console=console,
-    ) as progress:
-        task = progress.add_task(
-            "Downloading...",
-            total=len(all_icons),
-        )
+def _load_styles(
+    console,
+    styles: list[str] | None,
+    all_styles: bool,
+) -> tuple[list[str], dict[str, str]]:
+    """
+    Get the styles to download and the labels naming their directories.
 
-        downloaded_count, failed_count = download_icons_parallel(
-            all_icons,
-            filename_map,
-            int(size),
-            progress,
-            task,
-            max_workers=workers,
-        )
+    The styles catalog (validated by pydantic) is only needed to expand
+    --all-styles and to name the directories of several styles.
 
-    # Summary
-    console.print()
-    summary_table = Table(title="Download Summary", show_header=True, header_style="bold")
-    summary_table.add_column("Metric", style="cyan")
-    summary_table.add_column("Value", style="green")
+    Args:
+        console: Rich console for user-facing output
+        styles: Styles given with --style
+        all_styles: Whether --all-styles was given
 
-    summary_table.add_row("Total icons found", str(len(all_icons)))
-    summary_table.add_row("Successfully downloaded", str(downloaded_count))
-    if failed_count > 0:
-        summary_table.add_row(
-            "Failed",
-            str(failed_count),
-            style="red",
-        )
+    Returns:
+        Tuple of (styles, label per style id); the labels are empty when
+        the catalog is not needed or cannot be loaded for several styles
 
-    console.print(summary_table)
-    console.print(f"\n[green]✓[/green] Download complete! Files saved to: [cyan]{target_directory}[/cyan]")
+    Raises:
+        click.Abort: If --all-styles was given and the catalog cannot be loaded
+    """
+    style_labels: dict[str, str] = {}
+    if all_styles or len(styles or ()) > 1:
+        from icons8_download_cli.styles import get_style_labels
 
-    logger.info(
-        "Download completed: %d succeeded, %d failed",
+        try:
+            style_labels = get_style_labels()
+        except RuntimeError as e:
+            if all_styles:
+                console.print(f"[red]Error:[/red] {e}")
+                raise click.Abort()
+    if all_styles:
+        return list(style_labels), style_labels
+    return styles or [], style_labels
+
+
+def _open_store(
+    console,
+    target_directory: Path,
+    dedupe: bool,
+    store_dir: Path | None,
+    output_archive: Path | None,
+) -> FileStore | None:
+    """
+    Open the content store or output archive icons are saved through.
+
+    Args:
+        console: Rich console for user-facing output
+        target_directory: Directory where icons will be saved
+        dedupe: Whether byte-identical icons share a content-addressed blob
+        store_dir: Directory of the content store, by default inside the
+            target directory
+        output_archive: Optional archive to write instead of loose files
+
+    Returns:
+        Store or archive, None to save icons as plain files
+
+    Raises:
+        click.Abort: If the archive cannot be created
+    """
+    from icons8_download_cli.storage import ArchiveStore, ContentStore
+
+    # Content-addressed store shared by byte-identical icons
+    if dedupe:
+        return ContentStore((store_dir or target_directory / STORE_DIRNAME).resolve())
+
+    # Archive written by a single thread instead of loose files
+    if output_archive is not None:
+        try:
+            store = ArchiveStore(output_archive.resolve(), target_directory)
+        except Exception as e:
+            console.print(f"[red]Error:[/red] Cannot create {output_archive}: {e}")
+            raise click.Abort()
+        click.get_current_context().call_on_close(store.close)
+        return store
+
+    return None
+
+
+def _retry_failed_downloads(run: _DownloadRun, retry_failed: Path) -> None:
+    """
+    Download again the failures recorded in a dead-letter file.
+
+    Args:
+        run: Download run
+        retry_failed: Dead-letter file of a previous run; rewritten with the
+            downloads that fail again
+
+    Raises:
+        click.Abort: If the dead-letter file cannot be read
+    """
+    from icons8_download_cli.deadletter import load_failed_downloads
+    from icons8_download_cli.downloader import DownloadJob
+
+    try:
+        failed_downloads = load_failed_downloads(retry_failed)
+    except OSError as e:
+        run.console.print(f"[red]Error:[/red] Failed to read {retry_failed}: {e}")
+        raise click.Abort()
+
+    retry_jobs = [
+        DownloadJob(failed.icon, failed.size, failed.file_path)
+        for failed in failed_downloads
+    ]
+    run.console.print(
+        f"[green]✓[/green] Retrying [bold]{len(retry_jobs)}[/bold] failed downloads\n"
+    )
+    with run_stats.phase("download"):
+        downloaded_count, failed_count = _download_planned(run, retry_jobs)
+    _finish_run(
+        run,
+        None,
+        None,
+        found=len({job.icon.id for job in retry_jobs}),
+        downloaded=downloaded_count,
+        failed=failed_count,
+    )
+
+
+def _create_resolvers(
+    target_directory: Path,
+    styles: list[str],
+    style_labels: dict[str, str],
+    sizes: list[int],
+    layout: str,
+    journal: ResumeJournal | None,
+    archived: bool,
+) -> dict[str, dict[int, FilenameResolver]]:
+    """
+    Create the filename resolvers of every style and size.
+
+    Each style and size gets its own subdirectory when several are
+    downloaded. All resolvers share one index of the names in use.
+
+    Args:
+        target_directory: Directory where icons will be saved
+        styles: Styles to download
+        style_labels: Label per style id, naming the style directories
+        sizes: Icon sizes to download
+        layout: Directory layout, see layout.LAYOUTS
+        journal: Optional resume journal, whose paths completed icons keep
+        archived: Whether icons are written to an archive instead of files
+
+    Returns:
+        Filename resolver per icon style and size
+    """
+    from icons8_download_cli.downloader import FilenameResolver, sanitize_filename
+    from icons8_download_cli.layout import NameIndex
+
+    # Names used below the target directory. The sharded layouts keep them
+    # between runs so their many directories are not listed again; the flat
+    # layout lists its directories every run, noticing files added by hand
+    name_index = NameIndex(
+        target_directory,
+        persist=not archived and layout != "flat",
+        scan=not archived,
+    )
+
+    known_paths = {size: journal.get_paths(size) if journal else None for size in sizes}
+    resolvers: dict[str, dict[int, FilenameResolver]] = {}
+    for style in styles:
+        style_directory = target_directory
+        if len(styles) > 1:
+            style_directory /= sanitize_filename(style_labels.get(style, style))
+        resolvers[style] = {
+            size: FilenameResolver(
+                style_directory if len(sizes) == 1 else style_directory / f"{size}px",
+                known_paths[size],
+                layout=layout,
+                name_index=name_index,
+            )
+            for size in sizes
+        }
+    return resolvers
+
+
+def _fetch_listing(
+    run: _DownloadRun,
+    styles: list[str],
+    shard: Shard | None,
+    no_cache: bool,
+    page_size: int,
+    list_concurrency: int,
+    style_concurrency: int,
+) -> tuple[dict[str, list[IconRecord]], int, int, int]:
+    """
+    List the icons of every style with a progress spinner.
+
+    Icons listed under several styles are kept by the first one.
+
+    Args:
+        run: Download run
+        styles: Styles to list
+        shard: Optional shard of the run, whose icons are counted as found
+        no_cache: Whether response caching is disabled
+        page_size: Number of icons requested per listing page
+        list_concurrency: Number of listing page requests kept in flight
+        style_concurrency: Number of styles listed at the same time
+
+    Returns:
+        Tuple of (icons per style, listed_count, found_count,
+        duplicate_count); found_count only counts the icons of the shard
+
+    Raises:
+        click.Abort: If the listing fails
+    """
+    from icons8_download_cli import cache as response_cache
+    from icons8_download_cli.api import fetch_icons_by_style
+
+    console = run.console
+    Progress, SpinnerColumn, TextColumn, BarColumn = _get_progress()
+
+    console.print("[yellow]Collecting icons...[/yellow]")
+    try:
+        with run_stats.phase("fetch"), Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            console=console,
+            disable=run.progress_mode != "rich",
+        ) as progress:
+            task = progress.add_task("Fetching icons from API...", total=None)
+
+            def update_progress(count: int) -> None:
+                progress.update(
+                    task,
+                    description=f"Fetching icons from API... ({count} found)",
+                )
+
+            icons_by_style = fetch_icons_by_style(
+                styles,
+                progress_callback=update_progress,
+                use_cache=not no_cache,
+                page_size=page_size,
+                concurrency=list_concurrency,
+                client=run.client,
+                revalidate=run.revalidate,
+                style_concurrency=style_concurrency,
+            )
+            # Icons listed under several styles are kept by the first one
+            seen_ids: set[str] = set()
+            duplicate_count = 0
+            for style, icons in icons_by_style.items():
+                icons_by_style[style], style_duplicate_count = _dedupe_icons(icons, seen_ids)
+                duplicate_count += style_duplicate_count
+            found_count = len(seen_ids)
+            progress.update(
+                task,
+                description=f"Found {found_count} icons",
+            )
+
+        console.print(f"[green]✓[/green] Found [bold]{found_count}[/bold] icons\n")
+        if duplicate_count:
+            console.print(
+                f"[green]✓[/green] Skipping [bold]{duplicate_count}[/bold] icons "
+                "listed under more than one style\n"
+            )
+        listed_count = found_count
+        if shard is not None:
+            found_count = sum(shard.owns(icon_id) for icon_id in seen_ids)
+            console.print(
+                f"[green]✓[/green] Shard {shard} downloads [bold]{found_count}[/bold] "
+                "of them\n"
+            )
+        if not no_cache:
+            response_cache.prune_cache()
+
+    except Exception as e:
+        console.print(f"[red]✗[/red] Failed to fetch icons: {e}")
+        logging.getLogger(__name__).exception("Failed to fetch icons")
+        raise click.Abort()
+
+    return icons_by_style, listed_count, found_count, duplicate_count
+
+
+def _plan_downloads(
+    run: _DownloadRun,
+    icons_by_style: dict[str, list[IconRecord]],
+    resolvers: dict[str, dict[int, FilenameResolver]],
+    listed_count: int,
+    shard: Shard | None,
+    styles: list[str],
+    sizes: list[int],
+    layout: str,
+    derive_sizes: bool,
+) -> tuple[list[DownloadJob], list[DeriveJob], int]:
+    """
+    Resolve filenames and plan the downloads and resizes of a run.
+
+    Filenames are resolved once per size, skipping icons completed by a
+    previous run (revalidated instead if requested). Shards resolve the full
+    listing, so every shard gives an icon the same name, and write the
+    manifest of their files.
+
+    Args:
+        run: Download run
+        icons_by_style: Listed icons per style
+        resolvers: Filename resolver per icon style and size
+        listed_count: Number of listed icons, across all shards
+        shard: Optional shard of the run
+        styles: Styles of the run
+        sizes: Icon sizes of the run
+        layout: Directory layout, see layout.LAYOUTS
+        derive_sizes: Whether smaller sizes are resized from the largest
+
+    Returns:
+        Tuple of (download jobs, resize jobs, number of skipped completed
+        downloads)
+
+    Raises:
+        click.Abort: If the shard manifest cannot be written
+    """
+    console = run.console
+    console.print("[yellow]Resolving filenames...[/yellow]")
+    jobs: list[DownloadJob] = []
+    derive_jobs: list[DeriveJob] = []
+    skipped_count = 0
+    manifest = None
+    if shard is not None:
+        from icons8_download_cli.shards import ManifestWriter
+
+        manifest = ManifestWriter(run.target_directory, shard, styles, sizes, layout)
+    with run_stats.phase("resolve"):
+        for style, icons in icons_by_style.items():
+            style_jobs, style_skipped_count = _plan_jobs(
+                icons,
+                resolvers[style],
+                run.journal,
+                run.revalidate,
+                shard,
+                manifest,
+            )
+            if derive_sizes:
+                style_jobs, style_derive_jobs = _split_derived_jobs(
+                    style_jobs,
+                    resolvers[style],
+                    run.journal,
+                    run.revalidate,
+                )
+                derive_jobs.extend(style_derive_jobs)
+            jobs.extend(style_jobs)
+            skipped_count += style_skipped_count
+    console.print(
+        f"[green]✓[/green] Resolved {listed_count * len(sizes)} filenames\n"
+    )
+    if manifest is not None:
+        from icons8_download_cli.shards import get_listing_digest
+
+        try:
+            manifest_path = manifest.write(
+                listed_count,
+                get_listing_digest(icon for icons in icons_by_style.values() for icon in icons),
+            )
+        except OSError as e:
+            console.print(f"[red]Error:[/red] Failed to write the shard manifest: {e}")
+            raise click.Abort()
+        console.print(f"[green]✓[/green] Wrote manifest [cyan]{manifest_path.name}[/cyan]\n")
+    if skipped_count:
+        console.print(
+            f"[green]✓[/green] Skipping [bold]{skipped_count}[/bold] icons "
+            "already downloaded\n"
+        )
+    return jobs, derive_jobs, skipped_count
+
+
+def _finish_run(
+    run: _DownloadRun,
+    sizes: list[int] | None,
+    styles: list[str] | None,
+    **counts: int,
+) -> None:
+    """
+    Commit the outputs of a run, then print its summary and write its reports.
+
+    Args:
+        run: Download run
+        sizes: Icon sizes that were downloaded, None when retrying failures
+        styles: Icon styles that were downloaded, None when retrying failures
+        **counts: Icon counts by outcome, as passed to _write_reports
+    """
+    with run_stats.phase("commit"):
+        _commit_outputs(run.console, run.dead_letter, run.store)
+    _print_summary(
+        run.console,
+        run.target_directory,
+        counts["found"],
+        counts["downloaded"],
+        counts["failed"],
+        counts.get("skipped", 0),
+        sizes,
+        styles,
+        counts.get("duplicates", 0),
+        run.store,
+        counts.get("derived", 0),
+    )
+    _print_dead_letter_hint(run.console, run.dead_letter)
+    _write_reports(
+        run.console,
+        run.stats_json,
+        run.prometheus_textfile,
+        run.client,
+        run.progress_mode,
+        **counts,
+    )
+
+
+def _download_planned(run: _DownloadRun, jobs: list[DownloadJob]) -> tuple[int, int]:
+    """
+    Run planned download jobs on the selected engine with a progress bar.
+
+    Args:
+        run: Download run, whose engine, workers, client, journal,
+            dead-letter file and store are used
+        jobs: Download jobs to run
+
+    Returns:
+        Tuple of (successful_count, failed_count)
+    """
+    # Download icons with progress (parallel)
+    run.console.print("[yellow]Downloading icons...[/yellow]")
+
+    with _download_progress(run.console, run.progress_mode, run.client, len(jobs)) as progress:
+        if run.engine == "async":
+            from icons8_download_cli.async_downloader import download_jobs_async
+
+            downloaded_count, failed_count = download_jobs_async(
+                jobs,
+                progress,
+                None,
+                max_concurrency=run.workers,
+                max_connections_per_host=run.max_connections_per_host,
+                journal=run.journal,
+                revalidate=run.revalidate,
+                dead_letter=run.dead_letter,
+                store=run.store,
+            )
+        else:
+            from icons8_download_cli.downloader import download_jobs
+
+            downloaded_count, failed_count = download_jobs(
+                jobs,
+                progress,
+                None,
+                max_workers=run.workers,
+                client=run.client,
+                journal=run.journal,
+                revalidate=run.revalidate,
+                dead_letter=run.dead_letter,
+                store=run.store,
+            )
+
+    return downloaded_count, failed_count
+
+
+def _derive_planned(
+    run: _DownloadRun,
+    jobs: list[DeriveJob],
+    workers: int | None,
+) -> tuple[int, int]:
+    """
+    Resize downloaded icons to the derived sizes with a progress bar.
+
+    Args:
+        run: Download run, whose journal, dead-letter file and store are used
+        jobs: Icons to render smaller sizes of
+        workers: Worker processes, None for one per CPU
+
+    Returns:
+        Tuple of (resized_count, failed_count)
+    """
+    from icons8_download_cli.resize import derive_icons
+
+    run.console.print("[yellow]Resizing icons...[/yellow]")
+    total = sum(len(job.targets) for job in jobs)
+    with _download_progress(
+        run.console, run.progress_mode, None, total, phase="resize"
+    ) as progress:
+        return derive_icons(
+            jobs,
+            progress,
+            None,
+            max_workers=workers,
+            journal=run.journal,
+            dead_letter=run.dead_letter,
+            store=run.store,
+        )
+
+
+@contextmanager
+def _download_progress(
+    console,
+    progress_mode: str,
+    client: HttpClient | None,
+    total: int | None,
+    phase: str = "download",
+) -> Iterator[ProgressCounter]:
+    """
+    Count download progress and report it at a fixed rate.
+
+    Workers only advance a lock-free counter; a ticker thread renders it into
+    a Rich progress bar ten times a second ("rich"), writes a JSON-lines
+    record every second ("jsonl"), or nothing reports it ("none").
+
+    Args:
+        console: Rich console for user-facing output
+        progress_mode: "rich", "jsonl" or "none"
+        client: HTTP client whose adaptive concurrency is shown, if any
+        total: Number of downloads, None while it is still growing
+        phase: Phase named in the progress bar and JSON-lines records,
+            "download" or "resize"
+
+    Yields:
+        Counter to pass to the download functions as their progress
+    """
+    from icons8_download_cli.progress import (
+        JSONL_INTERVAL,
+        RICH_INTERVAL,
+        JsonlProgressWriter,
+        ProgressCounter,
+        ProgressTicker,
+    )
+
+    concurrency_columns, concurrency_fields = _concurrency_columns(client) if client else ([], {})
+    counter = ProgressCounter(total, **concurrency_fields)
+
+    if progress_mode == "jsonl":
+        with ProgressTicker(counter, JsonlProgressWriter(phase), JSONL_INTERVAL):
+            yield counter
+        return
+    if progress_mode != "rich":
+        yield counter
+        return
+
+    Progress, SpinnerColumn, TextColumn, BarColumn = _get_progress()
+    # A percentage only makes sense once the total is known up front
+    percentage_columns = []
+    if total is not None:
+        percentage_columns.append(TextColumn("[progress.percentage]{task.percentage:>3.0f}%"))
+
+    with Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        *percentage_columns,
+        TextColumn("({task.completed}/{task.total})"),
+        *concurrency_columns,
+        console=console,
+        # Refreshed by the ticker instead of on every update
+        auto_refresh=False,
+    ) as progress:
+        description = "Resizing..." if phase == "resize" else "Downloading..."
+        task = progress.add_task(description, total=total, **concurrency_fields)
+
+        def render(counter: ProgressCounter) -> None:
+            progress.update(
+                task,
+                completed=counter.completed,
+                total=counter.total,
+                refresh=True,
+                **counter.fields.copy(),
+            )
+
+        with ProgressTicker(counter, render, RICH_INTERVAL):
+            yield counter
+
+
+def _commit_outputs(console, dead_letter: DeadLetterFile, store: FileStore | None) -> None:
+    """
+    Sync the last batch of files and finalize the dead-letter file and, if
+    used, the output archive.
+
+    Args:
+        console: Rich console for user-facing output
+        dead_letter: Dead-letter file of the run
+        store: Content store or archive icons were saved through, if any
+    """
+    from icons8_download_cli.storage import ArchiveStore, sync_policy
+
+    sync_policy.flush()
+    dead_letter.commit()
+
+    if isinstance(store, ArchiveStore):
+        try:
+            store.commit()
+        except OSError as e:
+            console.print(f"[red]✗[/red] {e}")
+            logging.getLogger(__name__).error("%s", e)
+            raise click.Abort()
+
+
+def _start_profile(console, path: Path, mode: str) -> None:
+    """
+    Start profiling, writing the profile when the command finishes.
+
+    Args:
+        console: Rich console for user-facing output
+        path: Path of the Chrome trace file
+        mode: Profile mode, see profiling.PROFILE_MODES
+    """
+    from icons8_download_cli.profiling import start_profiling, stop_profiling
+
+    def write_profile() -> None:
+        try:
+            written = stop_profiling()
+        except OSError as e:
+            console.print(f"[red]✗[/red] Cannot write profile {path}: {e}")
+            logging.getLogger(__name__).error("Cannot write profile %s: %s", path, e)
+            return
+        for written_path in written:
+            console.print(f"Profile written to: [cyan]{written_path}[/cyan]")
+
+    start_profiling(path.resolve(), mode.lower())
+    click.get_current_context().call_on_close(write_profile)
+
+
+def _write_reports(
+    console,
+    stats_json: Path | None,
+    prometheus_textfile: Path | None,
+    client: HttpClient,
+    progress_mode: str,
+    **counts: int,
+) -> None:
+    """
+    Write the requested machine-readable reports of the run.
+
+    A report that cannot be written is reported but does not fail the run.
+    With JSON-lines progress, a final "done" record with the icon counts is
+    written to stdout.
+
+    Args:
+        console: Rich console for user-facing output
+        stats_json: Optional path of the JSON report
+        prometheus_textfile: Optional path of the Prometheus textfile
+        client: HTTP client of the run, for adaptive concurrency limits
+        progress_mode: "rich", "jsonl" or "none"
+        **counts: Icon counts by outcome, e.g. found=10, downloaded=9
+    """
+    if progress_mode == "jsonl":
+        from icons8_download_cli.progress import write_record
+
+        write_record(
+            {"event": "done", "duration_seconds": round(run_stats.elapsed, 3), **counts}
+        )
+
+    if stats_json is None and prometheus_textfile is None:
+        return
+
+    report = build_report(counts, client.get_limiters())
+    for path, write in (
+        (stats_json, write_stats_json),
+        (prometheus_textfile, write_prometheus_textfile),
+    ):
+        if path is None:
+            continue
+        try:
+            write(path, report)
+        except OSError as e:
+            console.print(f"[red]✗[/red] Cannot write {path}: {e}")
+            logging.getLogger(__name__).error("Cannot write %s: %s", path, e)
+
+
+def _print_dead_letter_hint(console, dead_letter: DeadLetterFile) -> None:
+    """Point to the dead-letter file if downloads failed for good."""
+    if dead_letter.count:
+        console.print(
+            f"[yellow]![/yellow] {dead_letter.count} failed downloads were written to "
+            f"[cyan]{dead_letter.path}[/cyan]\n"
+            f"  Retry them with: icons8-download --retry-failed \"{dead_letter.path}\""
+        )
+
+
+def _dedupe_icons(icons: list[IconRecord], seen_ids: set[str]) -> tuple[list[IconRecord], int]:
+    """
+    Drop icons whose id was already seen, recording the new ids.
+
+    Args:
+        icons: Icons to filter
+        seen_ids: Ids of icons kept so far, updated in place
+
+    Returns:
+        Tuple of (unseen icons, number of dropped duplicates)
+    """
+    unique_icons: list[IconRecord] = []
+    for icon in icons:
+        if icon.id not in seen_ids:
+            seen_ids.add(icon.id)
+            unique_icons.append(icon)
+    return unique_icons, len(icons) - len(unique_icons)
+
+
+def _concurrency_columns(client: HttpClient) -> tuple[list, dict]:
+    """
+    Build progress columns showing the adaptive download concurrency.
+
+    Args:
+        client: HTTP client used for downloads
+
+    Returns:
+        Tuple of (extra progress columns, initial task fields), both empty
+        unless the client is adaptive
+    """
+    from icons8_download_cli.downloader import DOWNLOAD_BASE_URL
+
+    limiter = client.get_limiter(DOWNLOAD_BASE_URL)
+    if limiter is None:
+        return [], {}
+
+    _, _, TextColumn, _ = _get_progress()
+    return (
+        [TextColumn("concurrency [cyan]{task.fields[concurrency]}[/cyan]")],
+        {"concurrency": limiter.limit},
+    )
+
+
+def _plan_jobs(
+    icons: list[IconRecord],
+    resolvers: dict[int, FilenameResolver],
+    journal: ResumeJournal | None,
+    revalidate: bool,
+    shard: Shard | None = None,
+    manifest: ManifestWriter | None = None,
+) -> tuple[list[DownloadJob], int]:
+    """
+    Resolve file paths for every (icon, size) pair and drop completed ones.
+
+    Args:
+        icons: Icons to download
+        resolvers: Filename resolver per icon size
+        journal: Optional resume journal of completed downloads
+        revalidate: Keep completed downloads so they are revalidated
+        shard: Optional shard of the run; names are still resolved for all
+            icons, but only the shard's icons are planned
+        manifest: Optional shard manifest to add the planned files to
+
+    Returns:
+        Tuple of (download jobs, number of skipped completed downloads)
+    """
+    from icons8_download_cli.downloader import DownloadJob
+
+    jobs: list[DownloadJob] = []
+    skipped_count = 0
+
+    for size, resolver in resolvers.items():
+        for position, icon in enumerate(icons):
+            file_path = resolver.resolve(icon)
+            if shard is not None and not shard.owns(icon.id):
+                continue
+            if manifest is not None:
+                manifest.add(position, icon, size, file_path)
+            if journal and not revalidate and journal.is_complete(icon.id, size):
+                skipped_count += 1
+                continue
+            jobs.append(DownloadJob(icon, size, file_path))
+        resolver.flush()
+
+    return jobs, skipped_count
+
+
+def _split_derived_jobs(
+    jobs: list[DownloadJob],
+    resolvers: dict[int, FilenameResolver],
+    journal: ResumeJournal | None,
+    revalidate: bool,
+) -> tuple[list[DownloadJob], list[DeriveJob]]:
+    """
+    Keep downloads of the largest size and derive the smaller sizes from it.
+
+    When revalidating, icons whose smaller sizes are all complete carry the
+    stamp of their source, so they are only resized again if the largest
+    size is downloaded anew rather than answered with 304.
+
+    Args:
+        jobs: Planned downloads of one style
+        resolvers: Filename resolver per icon size of the style
+        journal: Optional resume journal of completed downloads
+        revalidate: Whether completed downloads are revalidated
+
+    Returns:
+        Tuple of (downloads of the largest size, icons to resize)
+    """
+    from icons8_download_cli.resize import DeriveJob, get_file_stamp
+
+    largest = max(resolvers)
+    download_jobs: list[DownloadJob] = []
+    targets: dict[str, tuple[IconRecord, list[tuple[int, Path]]]] = {}
+    for job in jobs:
+        if job.size == largest:
+            download_jobs.append(job)
+        else:
+            targets.setdefault(job.icon.id, (job.icon, []))[1].append((job.size, job.file_path))
+
+    # The source is where the largest size is saved, by this run or an earlier one
+    derive_jobs = []
+    for icon, icon_targets in targets.values():
+        source_path = resolvers[largest].resolve(icon)
+        source_stamp = None
+        if revalidate and journal and all(
+            journal.is_complete(icon.id, size) for size, _ in icon_targets
+        ):
+            source_stamp = get_file_stamp(source_path)
+        derive_jobs.append(DeriveJob(icon, source_path, tuple(icon_targets), source_stamp))
+    return download_jobs, derive_jobs
+
+
+def _download_streaming(
+    run: _DownloadRun,
+    resolvers: dict[str, dict[int, FilenameResolver]],
+    style_concurrency: int,
+    queue_size: int | None,
+    no_cache: bool,
+    page_size: int,
+    list_concurrency: int,
+) -> tuple[int, int, int, int, int]:
+    """
+    Fetch, resolve and download icons as a single streaming pipeline.
+
+    Styles are listed concurrently and all of them feed one download pool.
+    An icon listed under several styles is downloaded once, for the style
+    whose page arrives first.
+
+    Args:
+        run: Download run, whose thread workers, client, journal,
+            dead-letter file and store are used
+        resolvers: Filename resolver per icon style and size
+        style_concurrency: Number of styles listed at the same time
+        queue_size: Maximum number of queued downloads
+        no_cache: Whether response caching is disabled
+        page_size: Number of icons requested per listing page
+        list_concurrency: Number of listing page requests kept in flight
+
+    Returns:
+        Tuple of (found_count, duplicate_count, skipped_count,
+        successful_count, failed_count)
+    """
+    from icons8_download_cli.api import iter_style_pages
+    from icons8_download_cli.downloader import download_jobs
+
+    console = run.console
+    logger = logging.getLogger(__name__)
+
+    console.print("[yellow]Collecting and downloading icons...[/yellow]")
+    seen_ids: set[str] = set()
+    duplicate_count = 0
+    skipped_count = 0
+    sizes_count = len(next(iter(resolvers.values())))
+
+    with _download_progress(console, run.progress_mode, run.client, None) as progress:
+
+        def planned_jobs():
+            """Turn listing pages into jobs, growing the progress total."""
+            nonlocal duplicate_count, skipped_count
+            for style, icons in iter_style_pages(
+                list(resolvers),
+                use_cache=not no_cache,
+                page_size=page_size,
+                concurrency=list_concurrency,
+                client=run.client,
+                revalidate=run.revalidate,
+                style_concurrency=style_concurrency,
+            ):
+                icons, page_duplicate_count = _dedupe_icons(icons, seen_ids)
+                duplicate_count += page_duplicate_count
+                jobs, page_skipped_count = _plan_jobs(
+                    icons,
+                    resolvers[style],
+                    run.journal,
+                    run.revalidate,
+                )
+                skipped_count += page_skipped_count
+
+                progress.update(total=len(seen_ids) * sizes_count - skipped_count)
+                yield from jobs
+
+        try:
+            downloaded_count, failed_count = download_jobs(
+                planned_jobs(),
+                progress,
+                None,
+                max_workers=run.workers,
+                max_pending=queue_size,
+                client=run.client,
+                journal=run.journal,
+                revalidate=run.revalidate,
+                dead_letter=run.dead_letter,
+                store=run.store,
+            )
+        except Exception as e:
+            console.print(f"[red]✗[/red] Failed to fetch icons: {e}")
+            logger.exception("Failed to fetch icons")
+            raise click.Abort()
+
+    return len(seen_ids), duplicate_count, skipped_count, downloaded_count, failed_count
+
+
+def _print_summary(
+    console,
+    target_directory: Path,
+    found_count: int,
+    downloaded_count: int,
+    failed_count: int,
+    skipped_count: int = 0,
+    sizes: list[int] | None = None,
+    styles: list[str] | None = None,
+    duplicate_count: int = 0,
+    store: FileStore | None = None,
+    derived_count: int = 0,
+) -> None:
+    """
+    Print the download summary table and log the result.
+
+    Args:
+        console: Rich console for user-facing output
+        target_directory: Directory where icons were saved
+        found_count: Number of icons found in the listing
+        downloaded_count: Number of successfully downloaded icons
+        failed_count: Number of failed downloads
+        skipped_count: Number of icons skipped as already downloaded
+        sizes: Icon sizes that were downloaded
+        styles: Icon styles that were downloaded
+        duplicate_count: Number of icons listed under more than one style
+        store: Content store or archive icons were saved through, if any
+        derived_count: Number of files resized from a larger downloaded size
+    """
+    from icons8_download_cli import cache as response_cache, retry
+    from icons8_download_cli.downloader import image_stats
+    from icons8_download_cli.storage import ArchiveStore
+
+    Table = _get_table()
+    cache_stats = response_cache.stats
+
+    console.print()
+    summary_table = Table(title="Download Summary", show_header=True, header_style="bold")
+    summary_table.add_column("Metric", style="cyan")
+    summary_table.add_column("Value", style="green")
+
+    summary_table.add_row("Total icons found", str(found_count))
+    if styles and len(styles) > 1:
+        summary_table.add_row("Styles", str(len(styles)))
+    if duplicate_count > 0:
+        summary_table.add_row("Listed under several styles", str(duplicate_count))
+    if sizes and len(sizes) > 1:
+        summary_table.add_row(
+            "Sizes",
+            f"{', '.join(str(size) for size in sizes)} "
+            f"({found_count * len(sizes)} files)",
+        )
+    if skipped_count > 0:
+        summary_table.add_row("Already downloaded", str(skipped_count))
+    summary_table.add_row("Successfully downloaded", str(downloaded_count))
+    if derived_count > 0:
+        summary_table.add_row("Resized from a larger size", str(derived_count))
+    if failed_count > 0:
+        summary_table.add_row(
+            "Failed",
+            str(failed_count),
+            style="red",
+        )
+    if cache_stats.hits or cache_stats.misses:
+        summary_table.add_row(
+            "Cache hits / misses",
+            f"{cache_stats.hits} / {cache_stats.misses} "
+            f"({cache_stats.hit_ratio:.0%} hit ratio)",
+        )
+    if cache_stats.revalidated:
+        summary_table.add_row("Listing pages not modified", str(cache_stats.revalidated))
+    if image_stats.hits or image_stats.misses:
+        summary_table.add_row(
+            "Icons not modified / changed",
+            f"{image_stats.hits} / {image_stats.misses}",
+        )
+    if isinstance(store, ArchiveStore):
+        summary_table.add_row(
+            "Archive entries",
+            f"{store.entries} ({_format_bytes(store.bytes_written)})",
+        )
+    elif store is not None:
+        saved = (
+            "files copied"
+            if store.link_mode == "copy"
+            else f"{_format_bytes(store.bytes_deduplicated)} saved"
+        )
+        summary_table.add_row(
+            "Stored / deduplicated files",
+            f"{store.blobs_added} / {store.duplicates} ({saved})",
+        )
+    if retry.stats.total:
+        summary_table.add_row(
+            "Retries",
+            f"{retry.stats.total} ("
+            + ", ".join(
+                f"{error_class} {count}"
+                for error_class, count in sorted(retry.stats.retries.items())
+            )
+            + f"), {retry.stats.recovered} recovered",
+        )
+
+    console.print(summary_table)
+    saved_to = store.path if isinstance(store, ArchiveStore) else target_directory
+    console.print(f"\n[green]✓[/green] Download complete! Files saved to: [cyan]{saved_to}[/cyan]")
+
+    logger = logging.getLogger(__name__)
+    logger.info(
+        "Download completed: %d succeeded, %d resized, %d failed, %d skipped",
         downloaded_count,
+        derived_count,
         failed_count,
+        skipped_count,
+    )
+    logger.info(
+        "Cache: %d hits (%d revalidated), %d misses (%d expired)",
+        cache_stats.hits,
+        cache_stats.revalidated,
+        cache_stats.misses,
+        cache_stats.expired,
+    )
+    if image_stats.hits or image_stats.misses:
+        logger.info(
+            "Icons revalidated: %d not modified, %d changed",
+            image_stats.hits,
+            image_stats.misses,
+        )
+    if isinstance(store, ArchiveStore):
+        logger.info(
+            "Archive %s: %d entries, %d bytes",
+            store.path,
+            store.entries,
+            store.bytes_written,
+        )
+    elif store is not None:
+        logger.info(
+            "Content store %s: %d blobs added, %d duplicates (%d bytes saved), "
+            "files linked by %s",
+            store.root,
+            store.blobs_added,
+            store.duplicates,
+            store.bytes_deduplicated,
+            store.link_mode,
+        )
+    if retry.stats.total:
+        logger.info(
+            "Retries: %d (%s), %d requests recovered",
+            retry.stats.total,
+            retry.stats.retries,
+            retry.stats.recovered,
+        )
+
+
+def _format_bytes(count: int) -> str:
+    """Format a byte count for display."""
+    if count < 1024:
+        return f"{count} B"
+    size = count / 1024
+    for unit in ("KB", "MB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+@cli.group()
+def cache() -> None:
+    """Inspect and manage the listing response cache."""
+
+
+@cache.command("stats")
+@cache_options
+def cache_stats_command(
+    cache_ttl: float | None,
+    cache_max_size: int | None,
+    cache_backend: str,
+) -> None:
+    """Show cache size, entry count and expired entries."""
+    from icons8_download_cli import cache as response_cache
+
+    console = _get_console()
+    Table = _get_table()
+    response_cache.configure_cache(cache_ttl, cache_max_size, cache_backend)
+    click.get_current_context().call_on_close(response_cache.close_cache)
+    info = response_cache.get_cache_info()
+
+    table = Table(title="Cache Statistics", show_header=True, header_style="bold")
+    table.add_column("Metric", style="cyan")
+    table.add_column("Value", style="green")
+    table.add_row("Location", str(response_cache.get_cache_dir()))
+    table.add_row("Backend", cache_backend)
+    table.add_row("Entries", str(info.entries))
+    table.add_row("Total size", _format_bytes(info.total_bytes))
+    table.add_row("Expired entries", str(info.expired_entries))
+    if info.oldest is not None and info.newest is not None:
+        table.add_row("Oldest entry", datetime.fromtimestamp(info.oldest).isoformat(" ", "seconds"))
+        table.add_row("Newest entry", datetime.fromtimestamp(info.newest).isoformat(" ", "seconds"))
+    table.add_row("TTL", "never" if cache_ttl is None else f"{cache_ttl:.0f}s")
+    table.add_row(
+        "Max size",
+        "unlimited" if cache_max_size is None else _format_bytes(cache_max_size),
     )
 
+    console.print(table)
+
+
+@cache.command("prune")
+@cache_options
+def cache_prune_command(
+    cache_ttl: float | None,
+    cache_max_size: int | None,
+    cache_backend: str,
+) -> None:
+    """Remove expired entries and evict least recently used ones."""
+    from icons8_download_cli import cache as response_cache
+
+    console = _get_console()
+    response_cache.configure_cache(cache_ttl, cache_max_size, cache_backend)
+    click.get_current_context().call_on_close(response_cache.close_cache)
+
+    expired_count, evicted_count = response_cache.prune_cache()
+    console.print(
+        f"[green]✓[/green] Removed [bold]{expired_count}[/bold] expired and "
+        f"evicted [bold]{evicted_count}[/bold] least recently used entries"
+    )
+
+
+@cache.command("warm")
+@click.option(
+    "--style",
+    "-S",
+    "styles",
+    type=str,
+    multiple=True,
+    required=True,
+    help="Icon style to pre-fetch (can be repeated)",
+)
+@click.option(
+    "--page-size",
+    type=click.IntRange(min=1),
+    default=PAGE_SIZE,
+    help=f"Number of icons requested per listing page (default: {PAGE_SIZE})",
+)
+@click.option(
+    "--list-concurrency",
+    type=click.IntRange(min=1),
+    default=4,
+    help="Number of listing page requests kept in flight (default: 4)",
+)
+@cache_options
+def cache_warm_command(
+    styles: tuple[str, ...],
+    page_size: int,
+    list_concurrency: int,
+    cache_ttl: float | None,
+    cache_max_size: int | None,
+    cache_backend: str,
+) -> None:
+    """Pre-fetch style listings into the cache ahead of a scheduled run."""
+    from icons8_download_cli import cache as response_cache
+    from icons8_download_cli.api import fetch_icons_by_style
+    from icons8_download_cli.client import HttpClient
+
+    console = _get_console()
+    response_cache.configure_cache(cache_ttl, cache_max_size, cache_backend)
+    click.get_current_context().call_on_close(response_cache.close_cache)
+
+    with HttpClient(pool_size=list_concurrency * STYLE_CONCURRENCY) as client:
+        try:
+            icons_by_style = fetch_icons_by_style(
+                list(dict.fromkeys(styles)),
+                use_cache=True,
+                page_size=page_size,
+                concurrency=list_concurrency,
+                client=client,
+            )
+        except Exception as e:
+            console.print(f"[red]✗[/red] Failed to warm the cache: {e}")
+            raise click.Abort()
+
+    for style, icons in icons_by_style.items():
+        console.print(
+            f"[green]✓[/green] Cached [bold]{len(icons)}[/bold] icons "
+            f"for style [cyan]{style}[/cyan]"
+        )
+
+    response_cache.prune_cache()
+    stats = response_cache.stats
+    console.print(
+        f"Cache hits: [cyan]{stats.hits}[/cyan], misses: [cyan]{stats.misses}[/cyan]"
+    )
+
+
+@cli.command()
+@click.argument(
+    "shard_directories",
+    nargs=-1,
+    required=True,
+    type=click.Path(exists=True, file_okay=False, dir_okay=True, path_type=Path),
+)
+@click.option(
+    "--target-directory",
+    "-d",
+    type=click.Path(file_okay=False, dir_okay=True, path_type=Path),
+    required=True,
+    help="Directory to merge the shards into",
+)
+@click.option(
+    "--move",
+    is_flag=True,
+    default=False,
+    help="Move files out of the shard directories instead of hardlinking them "
+    "(or copying them across filesystems)",
+)
+def merge(shard_directories: tuple[Path, ...], target_directory: Path, move: bool) -> None:
+    """
+    Merge the target directories of --shard runs into one directory.
+
+    Files keep the names they got in their shard. Name conflicts, e.g. when
+    the listing changed between shard runs, are resolved with the usual
+    name(n).png suffixes. Resume journals, failed downloads and manifests
+    are merged too.
+    """
+    from icons8_download_cli.shards import merge_shards
+
+    console = _get_console()
+    target_directory = target_directory.resolve()
+    shard_directories = tuple(dict.fromkeys(directory.resolve() for directory in shard_directories))
+    if target_directory in shard_directories:
+        console.print("[red]Error:[/red] The target directory cannot be one of the shard directories")
+        raise click.Abort()
+
+    target_directory.mkdir(parents=True, exist_ok=True)
+    setup_file_logging(target_directory)
+    try:
+        result = merge_shards(list(shard_directories), target_directory, move=move)
+    except (OSError, ValueError) as e:
+        console.print(f"[red]Error:[/red] {e}")
+        raise click.Abort()
+
+    missing_shards = sorted(set(range(1, result.shard_count + 1)) - set(result.shards))
+    console.print(
+        f"[green]✓[/green] Merged [bold]{result.merged}[/bold] files from "
+        f"{len(result.shards)} of {result.shard_count} shards into "
+        f"[cyan]{target_directory}[/cyan]"
+    )
+    if result.renamed:
+        console.print(
+            f"[yellow]![/yellow] Renamed [bold]{result.renamed}[/bold] files to "
+            "avoid name conflicts"
+        )
+    if result.missing:
+        console.print(
+            f"[yellow]![/yellow] [bold]{result.missing}[/bold] listed files are "
+            f"missing from their shard ({result.failed} failed downloads, see "
+            f"{DEAD_LETTER_FILENAME})"
+        )
+    if missing_shards:
+        console.print(
+            f"[yellow]![/yellow] Not merged: shard "
+            f"{', '.join(f'{index}/{result.shard_count}' for index in missing_shards)}"
+        )
+    if not result.consistent:
+        console.print(
+            "[yellow]![/yellow] The shards saw different listings; rerun them "
+            "to make sure every icon is covered"
+        )
+
 
 def main() -> None:
     """Main entry point for CLI."""
-    download()
+    cli()
 
@@ -0,0 +1,206 @@
+"""Shared HTTP client with pooled keep-alive connections."""
+
+import logging
+import threading
+import time
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from icons8_download_cli.concurrency import (
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MIN_CONCURRENCY,
+    AdaptiveLimiter,
+    parse_retry_after,
+)
+from icons8_download_cli.profiling import span
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = 30
+
+# Number of distinct hosts to keep connection pools for (listing API + images)
+_HOST_POOLS = 4
+
+_default_client: Optional["HttpClient"] = None
+_default_client_lock = threading.Lock()
+
+
+class HttpClient:
+    """
+    HTTP client owning keep-alive connection pools shared between threads.
+
+    One client is meant to be created per run and passed to both the listing
+    and download paths, so every request to the same host reuses an already
+    established TCP/TLS connection instead of paying a fresh handshake.
+
+    In adaptive mode every host gets an AdaptiveLimiter, and each request
+    waits for a slot of its host's limiter until the response headers
+    arrive, so both the listing and download paths back off when a host
+    answers with 429s, 5xx errors or growing latency.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        max_connections_per_host: Optional[int] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        adaptive: bool = False,
+        min_concurrency: int = DEFAULT_MIN_CONCURRENCY,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        initial_concurrency: Optional[int] = None,
+    ) -> None:
+        """
+        Create a client with connection pools sized for the given concurrency.
+
+        Args:
+            pool_size: Number of connections kept alive per host, usually the
+                number of worker threads
+            max_connections_per_host: Optional hard limit of simultaneous
+                connections per host; requests beyond it wait for a free one
+            timeout: Default request timeout in seconds
+            adaptive: Adapt the concurrency per host to server feedback,
+                starting at initial_concurrency
+            min_concurrency: Lowest adaptive concurrency per host
+            max_concurrency: Highest adaptive concurrency per host
+            initial_concurrency: Starting adaptive concurrency per host,
+                usually the number of download workers (default: pool_size)
+        """
+        self.timeout = timeout
+        self.pool_size = max(1, pool_size)
+        self.max_connections_per_host = max_connections_per_host
+        self.adaptive = adaptive
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self._limiters: dict[str, AdaptiveLimiter] = {}
+        self._limiters_lock = threading.Lock()
+
+        # Adaptive limits start at initial_concurrency but may grow to
+        # max_concurrency
+        self._initial_concurrency = min(initial_concurrency or self.pool_size, max_concurrency)
+        if adaptive:
+            self.pool_size = max(self.pool_size, max_concurrency)
+
+        adapter = HTTPAdapter(
+            pool_connections=_HOST_POOLS,
+            pool_maxsize=max_connections_per_host or self.pool_size,
+            pool_block=max_connections_per_host is not None,
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        """
+        Send a GET request over the pooled session.
+
+        Args:
+            url: Request URL
+            **kwargs: Extra arguments passed to requests.Session.get
+
+        Returns:
+            HTTP response
+        """
+        kwargs.setdefault("timeout", self.timeout)
+
+        limiter = self.get_limiter(url)
+        if limiter is None:
+            with span("GET", "http", url=url):
+                return self.session.get(url, **kwargs)
+
+        started_at = limiter.acquire()
+        response = None
+        try:
+            with span("GET", "http", url=url):
+                response = self.session.get(url, **kwargs)
+        finally:
+            # Any exception, even KeyboardInterrupt, must give the slot back
+            if response is None:
+                limiter.release(started_at)
+            else:
+                limiter.release(
+                    started_at,
+                    status=response.status_code,
+                    latency=time.monotonic() - started_at,
+                    retry_after=parse_retry_after(response.headers.get("Retry-After")),
+                )
+        return response
+
+    def get_limiter(self, url: str) -> Optional[AdaptiveLimiter]:
+        """
+        Get the adaptive concurrency limiter of a URL's host.
+
+        Args:
+            url: Request URL
+
+        Returns:
+            Limiter of the host, or None if the client is not adaptive
+        """
+        if not self.adaptive:
+            return None
+
+        host = urlsplit(url).netloc
+        with self._limiters_lock:
+            limiter = self._limiters.get(host)
+            if limiter is None:
+                limiter = AdaptiveLimiter(
+                    host,
+                    min_limit=self.min_concurrency,
+                    max_limit=self.max_concurrency,
+                    initial_limit=self._initial_concurrency,
+                )
+                self._limiters[host] = limiter
+            return limiter
+
+    def get_limiters(self) -> list[AdaptiveLimiter]:
+        """
+        Get the adaptive limiters of all hosts that completed requests.
+
+        Returns:
+            Limiters in the order their hosts were first contacted
+        """
+        with self._limiters_lock:
+            return [limiter for limiter in self._limiters.values() if limiter.completed]
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        for limiter in self.get_limiters():
+            logger.info(
+                "Adaptive concurrency for %s: final %d, peak %d, "
+                "latency p50 %s, p90 %s",
+                limiter.name,
+                limiter.limit,
+                limiter.peak_limit,
+                _format_latency(limiter.latency_percentile(50)),
+                _format_latency(limiter.latency_percentile(90)),
+            )
+        self.session.close()
+
+    def __enter__(self) -> "HttpClient":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def _format_latency(latency: Optional[float]) -> str:
+    """Format a latency in seconds for the log."""
+    return "n/a" if latency is None else f"{latency * 1000:.0f}ms"
+
+
+def get_default_client() -> HttpClient:
+    """
+    Get the process-wide client used when none is passed explicitly.
+
+    Returns:
+        Shared HttpClient instance
+    """
+    global _default_client
+
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
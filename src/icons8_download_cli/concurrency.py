@@ -0,0 +1,241 @@
+"""Adaptive (AIMD) concurrency limits driven by server feedback."""
+
+import logging
+import statistics
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIN_CONCURRENCY = 1
+DEFAULT_MAX_CONCURRENCY = 64
+
+# Number of recent requests used for error rates and latency percentiles
+WINDOW_SIZE = 100
+# Minimum number of latency samples before latency is judged
+MIN_LATENCY_SAMPLES = 20
+# Median latency this many times above the best median seen means queueing
+LATENCY_TOLERANCE = 2.0
+# Share of failed requests in the window that triggers a decrease
+ERROR_RATE_THRESHOLD = 0.1
+# Multiplicative decrease on errors and on latency growth
+ERROR_DECREASE_FACTOR = 0.5
+LATENCY_DECREASE_FACTOR = 0.9
+# Longest pause honoured from a Retry-After header, in seconds
+MAX_RETRY_AFTER = 60.0
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header value.
+
+    Args:
+        value: Header value, either delay seconds or an HTTP date
+
+    Returns:
+        Delay in seconds, or None if the value is missing or invalid
+    """
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    # HTTP dates are rare; email.utils is slow to import
+    from email.utils import parsedate_to_datetime
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def is_congestion_status(status: Optional[int]) -> bool:
+    """
+    Check whether a request outcome signals an overloaded server.
+
+    Args:
+        status: HTTP status code, or None if no response was received
+
+    Returns:
+        True for 429, 5xx and failed requests (timeouts, connection errors)
+    """
+    return status is None or status == 429 or status >= 500
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit for one host that adapts to server feedback (AIMD).
+
+    Every successful request sent while the limit was fully used raises it
+    by 1/limit, so it grows by one per round of requests. A 429 response, an
+    error rate above ERROR_RATE_THRESHOLD or a median latency well above the
+    best median seen cuts the limit multiplicatively. Only requests started after the last
+    cut can cut it again, so one burst of errors counts once. A Retry-After
+    header pauses new requests until the server asks to be contacted again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        min_limit: int = DEFAULT_MIN_CONCURRENCY,
+        max_limit: int = DEFAULT_MAX_CONCURRENCY,
+        initial_limit: Optional[int] = None,
+    ) -> None:
+        """
+        Create a limiter.
+
+        Args:
+            name: Name used in log messages, usually the host
+            min_limit: Lowest concurrency the limit may drop to
+            max_limit: Highest concurrency the limit may grow to
+            initial_limit: Starting concurrency (default: min_limit)
+        """
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self._limit = float(self._clamp(initial_limit or self.min_limit))
+        self.peak_limit = self.limit
+        self.completed = 0
+
+        self._active = 0
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._latencies: deque[float] = deque(maxlen=WINDOW_SIZE)
+        self._errors: deque[bool] = deque(maxlen=WINDOW_SIZE)
+        self._baseline_latency: Optional[float] = None
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        """Current number of requests allowed in flight."""
+        return int(self._limit)
+
+    def _clamp(self, limit: float) -> float:
+        """Keep a limit between min_limit and max_limit."""
+        return min(float(self.max_limit), max(float(self.min_limit), limit))
+
+    def acquire(self) -> float:
+        """
+        Wait until a request may be sent.
+
+        Returns:
+            Monotonic start time to pass back to release()
+        """
+        with self._condition:
+            while True:
+                pause = self._paused_until - time.monotonic()
+                if pause <= 0 and self._active < self.limit:
+                    break
+                self._condition.wait(timeout=pause if pause > 0 else None)
+            self._active += 1
+            return time.monotonic()
+
+    def release(
+        self,
+        started_at: float,
+        status: Optional[int] = None,
+        latency: Optional[float] = None,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        """
+        Finish a request and adapt the limit to its outcome.
+
+        Args:
+            started_at: Start time returned by acquire()
+            status: HTTP status code, or None if no response was received
+            latency: Time until the response headers arrived, in seconds
+            retry_after: Delay requested by a Retry-After header, in seconds
+        """
+        with self._condition:
+            self._active -= 1
+            self.completed += 1
+            congested = is_congestion_status(status)
+            self._errors.append(congested)
+
+            if retry_after:
+                pause = min(retry_after, MAX_RETRY_AFTER)
+                self._paused_until = max(self._paused_until, time.monotonic() + pause)
+                logger.info("Pausing requests to %s for %.1fs (Retry-After)", self.name, pause)
+
+            # Only outcomes of requests sent after the last cut may cut again
+            can_decrease = started_at >= self._last_decrease
+
+            if congested:
+                if can_decrease and status == 429:
+                    self._decrease(ERROR_DECREASE_FACTOR, "rate limited")
+                elif can_decrease and self._error_rate() >= ERROR_RATE_THRESHOLD:
+                    self._decrease(
+                        ERROR_DECREASE_FACTOR,
+                        f"error rate {self._error_rate():.0%}",
+                    )
+            else:
+                if latency is not None:
+                    self._latencies.append(latency)
+                if can_decrease and self._latency_inflated():
+                    self._decrease(LATENCY_DECREASE_FACTOR, "latency increased")
+                elif self._active + 1 >= self.limit:
+                    # Only grow while the current limit is actually used
+                    self._increase()
+
+            self._condition.notify_all()
+
+    def _error_rate(self) -> float:
+        """Share of failed requests in the window."""
+        return sum(self._errors) / len(self._errors) if self._errors else 0.0
+
+    def _latency_inflated(self) -> bool:
+        """Check the median latency against the best median seen so far."""
+        if len(self._latencies) < MIN_LATENCY_SAMPLES:
+            return False
+
+        median = statistics.median(self._latencies)
+        if self._baseline_latency is None or median < self._baseline_latency:
+            self._baseline_latency = median
+        return median > self._baseline_latency * LATENCY_TOLERANCE
+
+    def _increase(self) -> None:
+        """Additive increase: one more request per round of requests."""
+        old_limit = self.limit
+        self._limit = self._clamp(self._limit + 1 / self._limit)
+        if self.limit != old_limit:
+            self.peak_limit = max(self.peak_limit, self.limit)
+            logger.debug("Concurrency for %s: %d -> %d", self.name, old_limit, self.limit)
+
+    def _decrease(self, factor: float, reason: str) -> None:
+        """Multiplicative decrease, starting a new latency window."""
+        old_limit = self.limit
+        self._limit = self._clamp(self._limit * factor)
+        self._last_decrease = time.monotonic()
+        self._latencies.clear()
+        logger.info(
+            "Concurrency for %s: %d -> %d (%s)",
+            self.name,
+            old_limit,
+            self.limit,
+            reason,
+        )
+
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        """
+        Get a latency percentile of the current window.
+
+        Args:
+            percentile: Percentile between 0 and 100
+
+        Returns:
+            Latency in seconds, or None without samples
+        """
+        with self._condition:
+            latencies = sorted(self._latencies)
+        if not latencies:
+            return None
+        index = min(len(latencies) - 1, int(len(latencies) * percentile / 100))
+        return latencies[index]
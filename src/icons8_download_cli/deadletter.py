@@ -0,0 +1,157 @@
+"""Dead-letter file of downloads that still failed after all retries."""
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import NamedTuple, Optional, TextIO
+
+from icons8_download_cli.models import IconRecord, validate_icon
+
+logger = logging.getLogger(__name__)
+
+
+class FailedDownload(NamedTuple):
+    """Download recorded in a dead-letter file."""
+
+    icon: IconRecord
+    size: int
+    file_path: Path
+    error_class: str
+    error: str
+    attempts: int
+
+
+class DeadLetterFile:
+    """
+    JSON lines file listing the downloads that failed in a run.
+
+    Records are written to a temporary file next to the dead-letter file,
+    which replaces it once the run is committed. A committed run without
+    failures removes the file, so it always lists exactly what the last
+    completed run could not fetch and can be fed back with --retry-failed.
+    An interrupted run leaves the previous file untouched. File paths are
+    stored relative to the directory of the dead-letter file.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """
+        Prepare a dead-letter file; nothing is written before a failure.
+
+        Args:
+            path: Path of the dead-letter file
+        """
+        self.path = path
+        self.count = 0
+        self._temp_path = path.with_name(path.name + ".tmp")
+        self._file: Optional[TextIO] = None
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        icon: IconRecord,
+        size: int,
+        file_path: Path,
+        error_class: str,
+        error: str,
+        attempts: int,
+    ) -> None:
+        """
+        Record a failed download.
+
+        Args:
+            icon: Icon that failed
+            size: Icon size
+            file_path: Path the icon was meant to be saved to
+            error_class: Error class of the last attempt, e.g. "timeout"
+            error: Error message of the last attempt
+            attempts: Number of attempts made
+        """
+        try:
+            relative_path = file_path.relative_to(self.path.parent)
+        except ValueError:
+            relative_path = file_path
+
+        entry = {
+            "id": icon.id,
+            "name": icon.name,
+            "size": size,
+            "path": relative_path.as_posix(),
+            "error_class": error_class,
+            "error": error,
+            "attempts": attempts,
+        }
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+
+        with self._lock:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = self._temp_path.open("w", encoding="utf-8")
+            self._file.write(line)
+            self._file.flush()
+            self.count += 1
+
+    def commit(self) -> None:
+        """Replace the dead-letter file with this run's failures, if any."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                os.replace(self._temp_path, self.path)
+                logger.info("Wrote %d failed downloads to %s", self.count, self.path)
+            elif self.path.exists():
+                self.path.unlink()
+                logger.info("Removed dead-letter file %s", self.path)
+
+    def close(self) -> None:
+        """Discard uncommitted records, keeping the previous file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                self._temp_path.unlink(missing_ok=True)
+
+    def __enter__(self) -> "DeadLetterFile":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def load_failed_downloads(path: Path) -> list[FailedDownload]:
+    """
+    Load the downloads recorded in a dead-letter file.
+
+    Args:
+        path: Path of the dead-letter file
+
+    Returns:
+        Failed downloads in file order, with absolute file paths
+
+    Raises:
+        OSError: If the file cannot be read
+    """
+    failed: list[FailedDownload] = []
+    skipped = 0
+
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+                failed.append(
+                    FailedDownload(
+                        validate_icon(entry),
+                        int(entry["size"]),
+                        path.parent / entry["path"],
+                        entry.get("error_class", "other"),
+                        entry.get("error", ""),
+                        int(entry.get("attempts", 1)),
+                    )
+                )
+            except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+                skipped += 1
+
+    if skipped:
+        logger.warning("Skipped %d unreadable dead-letter lines in %s", skipped, path)
+    return failed
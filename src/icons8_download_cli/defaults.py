@@ -0,0 +1,22 @@
+"""Default settings shared by the CLI and the library.
+
+Kept free of third-party imports, so the CLI can build its options and
+answer --help and --version without loading requests, pydantic or rich.
+"""
+
+# Number of icons requested per listing page
+PAGE_SIZE = 100
+# Number of styles listed at the same time
+STYLE_CONCURRENCY = 4
+# Retries of failed requests after the first attempt
+DEFAULT_MAX_RETRIES = 3
+# Dead-letter file of downloads that failed for good, in the target directory
+DEAD_LETTER_FILENAME = "icons8-failed.jsonl"
+# Storage of the listing response cache
+CACHE_BACKENDS = ("file", "sqlite")
+# Output directory layouts, see layout.shard_name
+LAYOUTS = ("flat", "prefix", "hash")
+# Content store used by --dedupe, in the target directory
+STORE_DIRNAME = ".icons8-store"
+# Files synced at once in "batch" fsync mode unless a batch size is given
+DEFAULT_FSYNC_BATCH = 64
@@ -1,20 +1,90 @@
 """File download and naming conflict resolution."""
 
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Mapping
+from typing import Iterable, Mapping, NamedTuple, Optional
 
 import requests
-from rich.console import Console
-from rich.progress import Progress, TaskID
-
-from icons8_download_cli.models import Icon
+from rich.progress import TaskID
+
+from icons8_download_cli.cache import CacheStats, validators_from_headers
+from icons8_download_cli.client import HttpClient, get_default_client
+from icons8_download_cli.deadletter import DeadLetterFile
+from icons8_download_cli.journal import ResumeJournal
+from icons8_download_cli.logfile import icon_logger
+from icons8_download_cli.layout import LAYOUTS, NameIndex, shard_name
+from icons8_download_cli.metrics import stats as run_stats
+from icons8_download_cli.models import IconRecord
+from icons8_download_cli.profiling import span
+from icons8_download_cli.progress import ProgressSink
+from icons8_download_cli.retry import (
+    classify_error,
+    get_retry_after,
+    get_retry_delay,
+    log_retry,
+    should_retry,
+    stats as retry_stats,
+)
+from icons8_download_cli.storage import FileStore, open_writer
 
 logger = logging.getLogger(__name__)
-console = Console()
 
-DOWNLOAD_BASE_URL = "https://img.icons8.com"
+# Overridable to point the CLI at a stand-in server (see benchmarks/)
+DOWNLOAD_BASE_URL = os.environ.get("ICONS8_DOWNLOAD_BASE_URL", "https://img.icons8.com")
+
+# Bytes read from a response body at a time
+CHUNK_SIZE = 65536
+
+# Outcome of conditional image requests: hits are 304 Not Modified responses
+image_stats = CacheStats()
+
+
+class DownloadJob(NamedTuple):
+    """Single icon download: which icon, at which size, to which file."""
+
+    icon: IconRecord
+    size: int
+    file_path: Path
+
+
+def build_download_url(icon_id: str, size: int) -> str:
+    """
+    Build the image URL for an icon.
+
+    Args:
+        icon_id: Icon identifier
+        size: Icon size parameter
+
+    Returns:
+        PNG download URL
+    """
+    return f"{DOWNLOAD_BASE_URL}/?size={size}&id={icon_id}&format=png"
+
+
+def get_content_length(headers: Mapping[str, str]) -> Optional[int]:
+    """
+    Get the body size announced by a response.
+
+    Args:
+        headers: Response headers (case-insensitive mapping)
+
+    Returns:
+        Content-Length in bytes, or None if missing, invalid or describing
+        an encoded (e.g. gzip) body that is decoded while it is read
+    """
+    encoding = headers.get("Content-Encoding")
+    if encoding and encoding.lower() != "identity":
+        return None
+    try:
+        length = int(headers.get("Content-Length", ""))
+    except ValueError:
+        return None
+    return length if length >= 0 else None
 
 
 def sanitize_filename(name: str) -> str:
@@ -35,9 +105,90 @@ def sanitize_filename(name: str) -> str:
     return sanitized
 
 
+class FilenameResolver:
+    """
+    Incremental unique filename resolution for a target directory.
+
+    Names are tracked in a NameIndex, which scans a directory once on first
+    use and remembers every resolved name, so icons can be resolved page by
+    page while a listing is still being fetched. Icons with a known path
+    (e.g. from the resume journal) keep it instead of being resolved again.
+    With a sharded layout every icon is saved in a subdirectory picked by
+    its name or id, keeping directories small for huge styles.
+    """
+
+    def __init__(
+        self,
+        target_directory: Path,
+        known_paths: Optional[Mapping[str, Path]] = None,
+        scan_existing: bool = True,
+        layout: str = "flat",
+        name_index: Optional[NameIndex] = None,
+    ) -> None:
+        """
+        Create a resolver for the given directory.
+
+        Args:
+            target_directory: Directory where icons will be saved
+            known_paths: Optional mapping of icon.id to previously used path
+            scan_existing: Avoid names of files already in the directory;
+                disable when icons are not saved as files (e.g. archives).
+                Ignored when a name_index is given.
+            layout: "flat", "prefix" or "hash" (see shard_name)
+            name_index: Optional index shared by resolvers of one target
+                directory, e.g. persisted between runs; by default names
+                are tracked in memory only
+
+        Raises:
+            ValueError: If the layout is unknown
+        """
+        if layout not in LAYOUTS:
+            raise ValueError(f"Unknown layout {layout!r}, expected one of: {', '.join(LAYOUTS)}")
+
+        self.target_directory = target_directory
+        self.layout = layout
+        self._known_paths = known_paths or {}
+        self._name_index = name_index or NameIndex(
+            target_directory,
+            persist=False,
+            scan=scan_existing,
+        )
+
+        # Reserve known names even if their files have been removed since
+        for icon_id, file_path in self._known_paths.items():
+            self._name_index.reserve(file_path, icon_id)
+
+    def resolve(self, icon: IconRecord) -> Path:
+        """
+        Resolve a unique file path for an icon.
+
+        Args:
+            icon: Icon to generate a filename for
+
+        Returns:
+            Final file path for the icon
+        """
+        known_path = self._known_paths.get(icon.id)
+        if known_path is not None:
+            return known_path
+
+        base_name = sanitize_filename(icon.name)
+        directory = self.target_directory
+        shard = shard_name(self.layout, base_name, icon.id)
+        if shard:
+            directory /= shard
+        return self._name_index.assign(directory, base_name, icon.id)
+
+    def flush(self) -> None:
+        """Persist the names resolved so far; call before downloading them."""
+        self._name_index.flush()
+
+
 def resolve_filenames(
-    icons: list[Icon],
+    icons: list[IconRecord],
     target_directory: Path,
+    known_paths: Optional[Mapping[str, Path]] = None,
+    layout: str = "flat",
 ) -> Mapping[str, Path]:
     """
     Resolve unique filenames for all icons, checking existing files once.
@@ -45,150 +196,249 @@ def resolve_filenames(
     Args:
         icons: List of icons to generate filenames for
         target_directory: Directory where icons will be saved
+        known_paths: Optional mapping of icon.id to previously used path
+        layout: "flat", "prefix" or "hash" (see shard_name)
 
     Returns:
         Mapping of icon.id to final file path
     """
-    # Get all existing files in target directory once
-    existing_files: set[str] = set()
-    if target_directory.exists():
-        for file_path in target_directory.iterdir():
-            if file_path.is_file():
-                existing_files.add(file_path.name.lower())
-
-    filename_map: dict[str, Path] = {}
-    name_counts: dict[str, int] = {}
-
-    for icon in icons:
-        base_name = sanitize_filename(icon.name)
-        base_filename = f"{base_name}.png"
-
-        # Check if base filename exists
-        if base_filename.lower() not in existing_files:
-            filename_map[icon.id] = target_directory / base_filename
-            existing_files.add(base_filename.lower())
-        else:
-            # Generate unique name with auto-incrementing suffix
-            if base_name not in name_counts:
-                name_counts[base_name] = 0
-
-            while True:
-                name_counts[base_name] += 1
-                candidate_name = f"{base_name}({name_counts[base_name]}).png"
-
-                if candidate_name.lower() not in existing_files:
-                    filename_map[icon.id] = target_directory / candidate_name
-                    existing_files.add(candidate_name.lower())
-                    break
-
-    return filename_map
+    resolver = FilenameResolver(target_directory, known_paths, layout=layout)
+    return {icon.id: resolver.resolve(icon) for icon in icons}
 
 
 def download_icon(
-    icon: Icon,
+    icon: IconRecord,
     file_path: Path,
     size: int,
-    progress: Progress,
-    task_id: TaskID,
+    progress: ProgressSink,
+    task_id: Optional[TaskID],
+    client: Optional[HttpClient] = None,
+    journal: Optional[ResumeJournal] = None,
+    revalidate: bool = False,
+    dead_letter: Optional[DeadLetterFile] = None,
+    store: Optional[FileStore] = None,
 ) -> bool:
     """
     Download a single icon to the specified file path.
 
+    Timeouts, connection errors, 429s and 5xx responses are retried with
+    exponential backoff and jitter (see the retry module). Downloads that
+    still fail are recorded in the dead-letter file.
+
     Args:
         icon: Icon to download
         file_path: Destination file path
         size: Icon size parameter
-        progress: Rich progress bar instance
-        task_id: Task ID for progress updates
+        progress: Progress bar, or a ProgressCounter, advanced per icon
+        task_id: Task ID for progress updates (unused by a ProgressCounter)
+        client: HTTP client to use (defaults to the shared client)
+        journal: Optional resume journal to record the completed download in
+        revalidate: Send a conditional request if the journal has validators
+            for an existing file; a 304 response leaves the file untouched
+        dead_letter: Optional dead-letter file to record a failed download in
+        store: Optional content store or archive to save the icon through
 
     Returns:
-        True if download succeeded, False otherwise
+        True if download succeeded or the file is unchanged, False otherwise
     """
-    download_url = f"{DOWNLOAD_BASE_URL}/?size={size}&id={icon.id}&format=png"
+    download_url = build_download_url(icon.id, size)
+    client = client or get_default_client()
+
+    headers = {}
+    if revalidate and journal:
+        headers = journal.get_conditional_headers(icon.id, size, file_path)
+
+    attempt = 1
+    while True:
+        try:
+            with span("download", "download", id=icon.id, size=size, attempt=attempt):
+                _download_once(
+                    icon,
+                    file_path,
+                    size,
+                    download_url,
+                    headers,
+                    client,
+                    journal,
+                    store,
+                )
+            if attempt > 1:
+                retry_stats.record_recovered()
+            progress.update(task_id, advance=1)
+            return True
+
+        except requests.RequestException as e:
+            error_class = classify_error(e)
+            if should_retry(error_class, attempt):
+                delay = get_retry_delay(error_class, attempt, get_retry_after(e))
+                log_retry(f"{icon.name} ({icon.id})", error_class, attempt, delay, e)
+                time.sleep(delay)
+                attempt += 1
+                continue
+            icon_logger.error("Failed to download %s (%s): %s", icon.name, icon.id, e)
+            error = str(e)
+        except Exception as e:
+            error_class = "other"
+            error = str(e)
+            icon_logger.error(
+                "Unexpected error downloading %s (%s): %s",
+                icon.name,
+                icon.id,
+                e,
+            )
+
+        if dead_letter:
+            dead_letter.record(icon, size, file_path, error_class, error, attempt)
+        progress.update(task_id, advance=1)
+        return False
 
-    try:
-        response = requests.get(download_url, timeout=30, stream=True)
-        response.raise_for_status()
 
-        file_path.parent.mkdir(parents=True, exist_ok=True)
+def _download_once(
+    icon: IconRecord,
+    file_path: Path,
+    size: int,
+    download_url: str,
+    headers: Mapping[str, str],
+    client: HttpClient,
+    journal: Optional[ResumeJournal],
+    store: Optional[FileStore],
+) -> None:
+    """
+    Make one download attempt, streaming the body to disk.
+
+    Raises:
+        requests.RequestException: If the request fails or the body is shorter
+            or longer than its Content-Length
+    """
+    # Closing the response returns its connection to the pool
+    with run_stats.in_flight("image"), client.get(
+        download_url,
+        stream=True,
+        headers=headers,
+    ) as response:
+        latency = response.elapsed.total_seconds()
+        if headers and response.status_code == 304:
+            run_stats.record_response("image", latency, 0)
+            image_stats.record_hit(revalidated=True)
+            icon_logger.info("Not modified: %s -> %s", icon.name, file_path.name)
+            return
 
-        with file_path.open("wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+        response.raise_for_status()
 
-        progress.update(task_id, advance=1)
-        logger.info("Downloaded: %s -> %s", icon.name, file_path.name)
-        return True
+        byte_count = 0
+        expected_size = get_content_length(response.headers)
+        writer = open_writer(file_path, store, expected_size)
+        try:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                writer.write(chunk)
+                byte_count += len(chunk)
+            if expected_size is not None and byte_count != expected_size:
+                raise requests.exceptions.ChunkedEncodingError(
+                    f"Received {byte_count} of {expected_size} bytes"
+                )
+        except BaseException:
+            writer.abort()
+            raise
+        writer.commit()
 
-    except requests.RequestException as e:
-        logger.error("Failed to download %s (%s): %s", icon.name, icon.id, e)
-        progress.update(task_id, advance=1)
-        return False
-    except Exception as e:
-        logger.error(
-            "Unexpected error downloading %s (%s): %s",
-            icon.name,
+    run_stats.record_response("image", latency, byte_count)
+
+    if journal:
+        journal.record(
             icon.id,
-            e,
+            size,
+            file_path,
+            validators_from_headers(response.headers),
         )
-        progress.update(task_id, advance=1)
-        return False
+    if headers:
+        image_stats.record_miss(expired=True)
 
+    icon_logger.info("Downloaded: %s -> %s", icon.name, file_path.name)
 
-def download_icons_parallel(
-    icons: list[Icon],
-    filename_map: Mapping[str, Path],
-    size: int,
-    progress: Progress,
-    task_id: TaskID,
+
+def download_jobs(
+    jobs: Iterable[DownloadJob],
+    progress: ProgressSink,
+    task_id: Optional[TaskID],
     max_workers: int = 5,
+    max_pending: Optional[int] = None,
+    client: Optional[HttpClient] = None,
+    journal: Optional[ResumeJournal] = None,
+    revalidate: bool = False,
+    dead_letter: Optional[DeadLetterFile] = None,
+    store: Optional[FileStore] = None,
 ) -> tuple[int, int]:
     """
-    Download multiple icons in parallel using thread pool.
+    Run download jobs on a thread pool with bounded in-flight work.
+
+    Jobs are pulled from the iterable lazily. At most max_pending downloads
+    are queued or running at once; when the queue is full, pulling the next
+    job waits. With a lazy iterable (e.g. one fed by the listing) this
+    backpressure reaches all the way to the producer.
+
+    With an adaptive client, max_workers is the upper bound of threads and
+    the client's limiter decides how many requests are actually in flight;
+    its current limit is published as the "concurrency" field of the
+    progress task.
 
     Args:
-        icons: List of icons to download
-        filename_map: Mapping of icon.id to file path
-        size: Icon size parameter
-        progress: Rich progress bar instance
-        task_id: Task ID for progress updates
+        jobs: Iterable of (icon, size, file_path) download jobs
+        progress: Progress bar, or a ProgressCounter, advanced per icon
+        task_id: Task ID for progress updates (unused by a ProgressCounter)
         max_workers: Maximum number of concurrent download threads
+        max_pending: Maximum number of queued or running downloads
+            (default: 4 * max_workers)
+        client: HTTP client shared by all download threads
+        journal: Optional resume journal to record completed downloads in
+        revalidate: Revalidate journaled files with conditional requests
+        dead_letter: Optional dead-letter file to record failed downloads in
+        store: Optional content store or archive to save icons through
 
     Returns:
         Tuple of (successful_count, failed_count)
     """
-    downloaded_count = 0
-    failed_count = 0
-
-    def download_with_error_handling(icon: Icon) -> bool:
-        """Wrapper to handle exceptions in thread pool."""
-        file_path = filename_map[icon.id]
-        return download_icon(icon, file_path, size, progress, task_id)
+    counts = {"downloaded": 0, "failed": 0}
+    counts_lock = threading.Lock()
+    slots = threading.BoundedSemaphore(max_pending or max_workers * 4)
+    client = client or get_default_client()
+    limiter = client.get_limiter(DOWNLOAD_BASE_URL)
+
+    def on_done(future: Future[bool], icon: IconRecord) -> None:
+        """Count the result and free the queue slot."""
+        try:
+            success = future.result()
+        except Exception as e:
+            logger.error(
+                "Unexpected error in parallel download for %s (%s): %s",
+                icon.name,
+                icon.id,
+                e,
+            )
+            success = False
+
+        with counts_lock:
+            counts["downloaded" if success else "failed"] += 1
+        if limiter:
+            progress.update(task_id, concurrency=limiter.limit)
+        slots.release()
 
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all download tasks
-        future_to_icon = {
-            executor.submit(download_with_error_handling, icon): icon
-            for icon in icons
-        }
-
-        # Process completed downloads as they finish
-        for future in as_completed(future_to_icon):
-            icon = future_to_icon[future]
-            try:
-                success = future.result()
-                if success:
-                    downloaded_count += 1
-                else:
-                    failed_count += 1
-            except Exception as e:
-                logger.error(
-                    "Unexpected error in parallel download for %s (%s): %s",
-                    icon.name,
-                    icon.id,
-                    e,
-                )
-                failed_count += 1
-
-    return downloaded_count, failed_count
-
+        for job in jobs:
+            # Backpressure: wait for a free slot before queueing more work
+            slots.acquire()
+            future = executor.submit(
+                download_icon,
+                job.icon,
+                job.file_path,
+                job.size,
+                progress,
+                task_id,
+                client,
+                journal,
+                revalidate,
+                dead_letter,
+                store,
+            )
+            future.add_done_callback(partial(on_done, icon=job.icon))
+
+    return counts["downloaded"], counts["failed"]
@@ -0,0 +1,218 @@
+"""Crash-safe journal of completed downloads used to resume runs."""
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Mapping, Optional
+
+from icons8_download_cli.cache import conditional_headers
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_FILENAME = ".icons8-journal.jsonl"
+
+
+class ResumeJournal:
+    """
+    Append-only record of completed downloads in a target directory.
+
+    Each completed download is appended as one JSON line keyed by
+    (icon id, size) with a single write() on an O_APPEND descriptor, so a
+    crash can at worst lose or truncate the last record. Truncated lines are
+    ignored when the journal is loaded. Records also keep the HTTP validators
+    of the image response, so later runs can revalidate instead of
+    re-downloading.
+    """
+
+    def __init__(self, target_directory: Path) -> None:
+        """
+        Open (or create) the journal for a target directory.
+
+        Args:
+            target_directory: Directory where icons are saved
+        """
+        self.target_directory = target_directory
+        self.path = target_directory / JOURNAL_FILENAME
+        self._entries: dict[tuple[str, int], dict] = {}
+        self._lock = threading.Lock()
+
+        self._load()
+
+        self._fd = os.open(
+            self.path,
+            os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+            0o644,
+        )
+
+        # Terminate a record truncated by a previous crash
+        if self.path.stat().st_size and not self._ends_with_newline():
+            os.write(self._fd, b"\n")
+
+    def _load(self) -> None:
+        """Load completed entries from disk."""
+        self._entries = load_journal_entries(self.path)
+
+    def _ends_with_newline(self) -> bool:
+        """Check whether the journal file ends with a newline."""
+        with self.path.open("rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def get_path(self, icon_id: str, size: int) -> Optional[Path]:
+        """
+        Get the recorded file path of a completed download.
+
+        Args:
+            icon_id: Icon identifier
+            size: Icon size
+
+        Returns:
+            Absolute file path, or None if the download is not recorded
+        """
+        entry = self._entries.get((icon_id, size))
+        if entry is None:
+            return None
+        return self.target_directory / entry["path"]
+
+    def get_paths(self, size: int) -> dict[str, Path]:
+        """
+        Get recorded file paths of all completed downloads of a size.
+
+        Args:
+            size: Icon size
+
+        Returns:
+            Mapping of icon id to absolute file path
+        """
+        return {
+            icon_id: self.target_directory / entry["path"]
+            for (icon_id, entry_size), entry in self._entries.items()
+            if entry_size == size
+        }
+
+    def is_complete(self, icon_id: str, size: int) -> bool:
+        """
+        Check whether an icon was downloaded and its file is still present.
+
+        Args:
+            icon_id: Icon identifier
+            size: Icon size
+
+        Returns:
+            True if the download can be skipped
+        """
+        file_path = self.get_path(icon_id, size)
+        return file_path is not None and file_path.is_file()
+
+    def get_conditional_headers(
+        self,
+        icon_id: str,
+        size: int,
+        file_path: Path,
+    ) -> dict[str, str]:
+        """
+        Build conditional request headers for revalidating a downloaded icon.
+
+        Headers are only returned when the recorded file is still present at
+        file_path and, if a Content-Length was recorded, has that size.
+
+        Args:
+            icon_id: Icon identifier
+            size: Icon size
+            file_path: Path the icon is expected at
+
+        Returns:
+            If-None-Match / If-Modified-Since headers, empty if not applicable
+        """
+        entry = self._entries.get((icon_id, size))
+        if entry is None or self.target_directory / entry["path"] != file_path:
+            return {}
+
+        validators = entry.get("validators") or {}
+        try:
+            file_size = file_path.stat().st_size
+        except OSError:
+            return {}
+        if "content_length" in validators and str(file_size) != validators["content_length"]:
+            return {}
+
+        return conditional_headers(validators)
+
+    def record(
+        self,
+        icon_id: str,
+        size: int,
+        file_path: Path,
+        validators: Optional[Mapping[str, str]] = None,
+    ) -> None:
+        """
+        Record a completed download.
+
+        Args:
+            icon_id: Icon identifier
+            size: Icon size
+            file_path: Path the icon was saved to
+            validators: Optional HTTP validators of the image response
+        """
+        try:
+            relative_path = file_path.relative_to(self.target_directory)
+        except ValueError:
+            relative_path = file_path
+
+        entry = {"id": icon_id, "size": size, "path": relative_path.as_posix()}
+        if validators:
+            entry["validators"] = dict(validators)
+        line = (json.dumps(entry, separators=(",", ":")) + "\n").encode("utf-8")
+
+        with self._lock:
+            self._entries[(icon_id, size)] = entry
+            try:
+                os.write(self._fd, line)
+            except OSError as e:
+                logger.warning("Failed to write journal entry for %s: %s", icon_id, e)
+
+    def close(self) -> None:
+        """Close the journal file."""
+        with self._lock:
+            if self._fd >= 0:
+                os.close(self._fd)
+                self._fd = -1
+
+    def __enter__(self) -> "ResumeJournal":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def load_journal_entries(path: Path) -> dict[tuple[str, int], dict]:
+    """
+    Load the entries of a journal file, skipping unreadable lines.
+
+    Args:
+        path: Journal file path
+
+    Returns:
+        Latest entry per (icon id, size), empty if the file does not exist
+    """
+    entries: dict[tuple[str, int], dict] = {}
+    if not path.exists():
+        return entries
+
+    skipped = 0
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+                key = (str(entry["id"]), int(entry["size"]))
+            except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+                skipped += 1
+                continue
+            entries[key] = entry
+
+    if skipped:
+        logger.warning("Skipped %d unreadable journal lines in %s", skipped, path)
+    logger.info("Loaded %d journal entries from %s", len(entries), path)
+    return entries
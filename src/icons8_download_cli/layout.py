@@ -0,0 +1,337 @@
+"""Output directory layouts and the persisted index of used file names."""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from icons8_download_cli.defaults import LAYOUTS
+from icons8_download_cli.storage import STALE_TEMP_AGE, is_temp_name, remove_stale_temp_file
+
+logger = logging.getLogger(__name__)
+
+NAME_INDEX_FILENAME = ".icons8-names.jsonl"
+
+# Characters of the icon name ("prefix") or hex digits of the id hash ("hash")
+# naming the shard directory
+SHARD_WIDTH = 2
+
+_SUFFIXED_NAME = re.compile(r"^(.*)\((\d+)\)\.png$")
+_encoder = json.JSONEncoder(separators=(",", ":"))
+
+
+def shard_name(layout: str, base_name: str, icon_id: str) -> str:
+    """
+    Get the shard subdirectory of an icon in a layout.
+
+    "prefix" groups icons by the first characters of their file name, so
+    related icons stay together; "hash" spreads them evenly over 256
+    directories by a hash of their id.
+
+    Args:
+        layout: "flat", "prefix" or "hash"
+        base_name: Sanitized file name of the icon, without extension
+        icon_id: Icon identifier
+
+    Returns:
+        Subdirectory name, empty for the flat layout
+
+    Raises:
+        ValueError: If the layout is unknown
+    """
+    if layout == "flat":
+        return ""
+    if layout == "prefix":
+        prefix = "".join(
+            char if char.isalnum() else "_" for char in base_name[:SHARD_WIDTH].lower()
+        )
+        return prefix.ljust(SHARD_WIDTH, "_")
+    if layout == "hash":
+        return hashlib.sha1(icon_id.encode("utf-8")).hexdigest()[:SHARD_WIDTH]
+    raise ValueError(f"Unknown layout {layout!r}, expected one of: {', '.join(LAYOUTS)}")
+
+
+class _DirectoryNames:
+    """File names used in one directory and the icons they belong to."""
+
+    def __init__(self) -> None:
+        # Lowercased file name -> owning icon id (None for foreign files)
+        self.owners: dict[str, Optional[str]] = {}
+        # Icon id -> file name it was given
+        self.by_icon: dict[str, str] = {}
+        # Lowercased base name -> last "(n)" suffix given out by this run;
+        # names are never freed during a run, so every lower one is taken
+        self.last_suffix: dict[str, int] = {}
+
+    def add(self, name: str, icon_id: Optional[str]) -> None:
+        """Mark a file name as used, by an icon or by a foreign file."""
+        key = name.lower()
+        if icon_id is not None or key not in self.owners:
+            self.owners[key] = icon_id
+        if icon_id is not None:
+            self.by_icon[icon_id] = name
+
+
+class NameIndex:
+    """
+    Index of the file names used below a target directory.
+
+    Each directory is scanned once (a single scandir() pass, without a stat
+    per file) the first time a name is needed in it. From then on the index
+    is the source of truth: names given to icons are appended to
+    .icons8-names.jsonl as [directory, name, icon id] lines, and a later run
+    loads that file instead of listing huge directories again. Collisions get
+    the lowest free base_name(n).png, and an icon gets back the name it was
+    given before, so reruns keep stable names even for icons whose download
+    failed.
+
+    Files created in indexed directories by other programs are not noticed;
+    delete the index file to rescan. Every run still lists each directory it
+    uses once, without collecting names, to remove the temporary files of
+    downloads an interrupted run left behind.
+    """
+
+    def __init__(self, root: Path, persist: bool = True, scan: bool = True) -> None:
+        """
+        Open (or create) the index of a target directory.
+
+        Args:
+            root: Target directory the indexed directories are below
+            persist: Keep the index in root between runs
+            scan: Avoid names of files already on disk; disable when icons
+                are not saved as files (e.g. archives)
+        """
+        self.root = root
+        self.path = root / NAME_INDEX_FILENAME if persist else None
+        self._scan = scan
+        self._directories: dict[str, _DirectoryNames] = {}
+        # Index key per directory path, computing relative paths is costly
+        self._keys: dict[Path, str] = {}
+        self._scanned: set[str] = set()
+        # Directories visited by this run, and the age of stale temporary files
+        self._visited: set[str] = set()
+        self._stale_before = time.time() - STALE_TEMP_AGE
+        self._pending: list[str] = []
+        self._needs_newline = False
+        self._lock = threading.Lock()
+
+        if self.path is not None:
+            self._load()
+
+    def _load(self) -> None:
+        """Load the persisted index, skipping unreadable lines."""
+        assert self.path is not None
+        try:
+            content = self.path.read_bytes()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logger.warning("Cannot read name index %s: %s", self.path, e)
+            return
+        # Terminate a line truncated by a previous crash before appending
+        self._needs_newline = bool(content) and not content.endswith(b"\n")
+
+        skipped = 0
+        try:
+            # Parse all lines at once; names cannot contain raw newlines
+            records = json.loads(b"[" + content.rstrip(b"\n").replace(b"\n", b",") + b"]")
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            records = []
+            for line in content.splitlines():
+                try:
+                    records.append(json.loads(line))
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    skipped += 1
+
+        count = 0
+        for record in records:
+            try:
+                directory, name, icon_id = record
+            except (TypeError, ValueError):
+                skipped += 1
+                continue
+            if name is None:
+                # Marker written once a directory has been scanned
+                self._scanned.add(directory)
+                continue
+            self._names(directory).add(name, icon_id)
+            count += 1
+
+        if skipped:
+            logger.warning("Skipped %d unreadable name index lines in %s", skipped, self.path)
+        logger.info("Loaded %d names of %d directories from %s", count, len(self._scanned), self.path)
+
+    def _names(self, key: str) -> _DirectoryNames:
+        """Get the names of a directory, creating an empty entry."""
+        names = self._directories.get(key)
+        if names is None:
+            names = self._directories[key] = _DirectoryNames()
+        return names
+
+    def _key(self, directory: Path) -> str:
+        """Index key of a directory: its POSIX path relative to the root."""
+        key = self._keys.get(directory)
+        if key is None:
+            try:
+                key = directory.relative_to(self.root).as_posix()
+            except ValueError:
+                key = directory.as_posix()
+            self._keys[directory] = key
+        return key
+
+    def _directory(self, directory: Path, key: str) -> _DirectoryNames:
+        """Get the names of a directory, scanning it on first use."""
+        names = self._names(key)
+        if self._scan and key not in self._visited:
+            self._visited.add(key)
+            scan = key not in self._scanned
+            self._scanned.add(key)
+            found = []
+            removed = 0
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if is_temp_name(entry.name):
+                            removed += remove_stale_temp_file(entry, self._stale_before)
+                        # d_type from the directory listing, no stat per file
+                        elif scan and entry.is_file() and entry.name.lower() not in names.owners:
+                            names.add(entry.name, None)
+                            found.append(entry.name)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning("Cannot scan %s: %s", directory, e)
+            if removed:
+                logger.info("Removed %d stale temporary files from %s", removed, directory)
+            if scan:
+                logger.debug("Scanned %d existing files in %s", len(found), directory)
+                if self.path is not None:
+                    self._pending.extend(self._line(key, name, None) for name in found)
+                    self._pending.append(self._line(key, None, None))
+        return names
+
+    @staticmethod
+    def _line(directory: str, name: Optional[str], icon_id: Optional[str]) -> str:
+        """Encode one index line."""
+        return _encoder.encode([directory, name, icon_id]) + "\n"
+
+    def assign(self, directory: Path, base_name: str, icon_id: str) -> Path:
+        """
+        Give an icon a file name that is unique in a directory.
+
+        Args:
+            directory: Directory the icon is saved in
+            base_name: Sanitized file name without extension
+            icon_id: Icon identifier
+
+        Returns:
+            File path for the icon: the name it was given before if that is
+            still based on base_name, otherwise base_name.png or the
+            lowest free base_name(n).png
+        """
+        with self._lock:
+            key = self._key(directory)
+            names = self._directory(directory, key)
+            base_key = base_name.lower()
+
+            previous = names.by_icon.get(icon_id)
+            if previous is not None:
+                previous_key = previous.lower()
+                if previous_key == f"{base_key}.png":
+                    same_base = True
+                else:
+                    match = _SUFFIXED_NAME.match(previous_key)
+                    same_base = match is not None and match.group(1) == base_key
+                if same_base and names.owners.get(previous_key) == icon_id:
+                    return directory / previous
+
+            filename = f"{base_name}.png"
+            if filename.lower() in names.owners:
+                # Lowest free number, probed from where this run left off
+                number = names.last_suffix.get(base_key, 0)
+                while True:
+                    number += 1
+                    filename = f"{base_name}({number}).png"
+                    if filename.lower() not in names.owners:
+                        break
+                names.last_suffix[base_key] = number
+
+            names.add(filename, icon_id)
+            if self.path is not None:
+                self._pending.append(self._line(key, filename, icon_id))
+            return directory / filename
+
+    def claim(self, file_path: Path, icon_id: str) -> Path:
+        """
+        Give an icon a given file name, or the next free one if it is taken.
+
+        Used to keep the names icons got elsewhere, e.g. in another target
+        directory, while still avoiding collisions in this one.
+
+        Args:
+            file_path: Wanted file path, base_name.png or base_name(n).png
+            icon_id: Icon identifier
+
+        Returns:
+            file_path if it is free or already the icon's, otherwise the path
+            assign() gives for its base name
+        """
+        directory = file_path.parent
+        name_key = file_path.name.lower()
+        with self._lock:
+            key = self._key(directory)
+            names = self._directory(directory, key)
+            if names.owners.get(name_key, icon_id) == icon_id and (
+                names.by_icon.get(icon_id, file_path.name).lower() == name_key
+            ):
+                if name_key not in names.owners:
+                    names.add(file_path.name, icon_id)
+                    if self.path is not None:
+                        self._pending.append(self._line(key, file_path.name, icon_id))
+                return file_path
+
+        match = _SUFFIXED_NAME.match(name_key)
+        base_name = file_path.name[: len(match.group(1))] if match else file_path.stem
+        return self.assign(directory, base_name, icon_id)
+
+    def reserve(self, file_path: Path, icon_id: str) -> None:
+        """
+        Mark a file as owned by an icon, e.g. a path from the resume journal.
+
+        Args:
+            file_path: File path of the icon
+            icon_id: Icon identifier
+        """
+        with self._lock:
+            directory = file_path.parent
+            self._directory(directory, self._key(directory)).add(file_path.name, icon_id)
+
+    def flush(self) -> None:
+        """
+        Append names assigned since the last flush to the index file.
+
+        Call before the files are written, so a crash never leaves files the
+        index does not know about.
+        """
+        with self._lock:
+            if self.path is None or not self._pending:
+                return
+            data = "".join(self._pending).encode("utf-8")
+            if self._needs_newline:
+                data = b"\n" + data
+            self._pending.clear()
+            try:
+                self.root.mkdir(parents=True, exist_ok=True)
+                fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, data)
+                    self._needs_newline = False
+                finally:
+                    os.close(fd)
+            except OSError as e:
+                logger.warning("Failed to update name index %s: %s", self.path, e)
@@ -0,0 +1,186 @@
+"""Log file written by a background thread in batches, and per-icon log sampling."""
+
+import itertools
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Logger of the per-icon lines ("Downloaded: ...", failed downloads), so their
+# level and sampling can be set apart from the rest of the log (see IconLogger)
+ICON_LOGGER_NAME = "icons8_download_cli.icons"
+ICON_LOG_LEVELS = ("info", "warning", "error")
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+# Records written before the log file is flushed, and the longest time a
+# record waits in the file buffer while the log is idle, in seconds
+LOG_BATCH_SIZE = 256
+LOG_FLUSH_INTERVAL = 1.0
+LOG_BUFFER_SIZE = 64 * 1024
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+
+
+class BatchedFileHandler(logging.FileHandler):
+    """File handler flushing once per batch of records instead of per record."""
+
+    def __init__(self, filename: Path, batch_size: int = LOG_BATCH_SIZE) -> None:
+        """
+        Open the log file.
+
+        Args:
+            filename: Log file path
+            batch_size: Records written between flushes
+        """
+        self.batch_size = batch_size
+        self._unflushed = 0
+        super().__init__(filename, encoding="utf-8")
+
+    def _open(self):
+        """Open the log file with a large write buffer."""
+        return open(self.baseFilename, self.mode, buffering=LOG_BUFFER_SIZE, encoding=self.encoding)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Write a record, flushing once a batch is complete."""
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+            self._unflushed += 1
+            if self._unflushed >= self.batch_size:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        """Flush the records written so far."""
+        self._unflushed = 0
+        super().flush()
+
+
+class BatchingQueueListener(QueueListener):
+    """Queue listener flushing its handlers whenever the queue runs idle."""
+
+    def dequeue(self, block: bool) -> logging.LogRecord:
+        """Wait for the next record, flushing buffered records while waiting."""
+        while True:
+            try:
+                return self.queue.get(block, timeout=LOG_FLUSH_INTERVAL)
+            except queue.Empty:
+                for handler in self.handlers:
+                    handler.flush()
+
+
+class IconLogger(logging.LoggerAdapter):
+    """
+    Logger of per-icon lines that can log only one in every N info lines.
+
+    Sampling is decided in isEnabledFor(), before a record is created, so
+    skipped lines cost next to nothing. Warnings and errors always pass.
+    """
+
+    def __init__(self, logger: logging.Logger) -> None:
+        super().__init__(logger, {})
+        self.sample_every = 1
+        self._counter = itertools.count()
+
+    def configure(self, level: str, sample_every: int) -> None:
+        """
+        Set the lowest level and the sampling of per-icon lines.
+
+        Args:
+            level: Lowest level: "info", "warning" or "error"
+            sample_every: Log one in this many info lines
+        """
+        self.logger.setLevel(level.upper())
+        self.sample_every = max(1, sample_every)
+
+    def isEnabledFor(self, level: int) -> bool:
+        """Check whether a line of a level is logged, sampling info lines."""
+        if not self.logger.isEnabledFor(level):
+            return False
+        if level > logging.INFO or self.sample_every == 1:
+            return True
+        # next() on itertools.count is atomic, so threads need no lock
+        return next(self._counter) % self.sample_every == 0
+
+    def process(self, msg, kwargs):
+        """Pass lines through unchanged."""
+        return msg, kwargs
+
+
+icon_logger = IconLogger(logging.getLogger(ICON_LOGGER_NAME))
+
+
+class _QueueHandler(QueueHandler):
+    """Queue handler doing as little as possible on the logging thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Merge the message arguments and exception into the record.
+
+        Unlike QueueHandler.prepare() the record is neither copied nor
+        formatted; timestamps and layout are formatted by the listener.
+        """
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def start_file_logging(
+    path: Path,
+    icon_level: str = "info",
+    icon_sample: int = 1,
+) -> None:
+    """
+    Log to a file from a background thread.
+
+    Threads that log only put the record on a queue; a listener thread
+    formats and writes records, flushing the file once per batch and
+    whenever logging goes idle, so workers never wait for the file.
+
+    Args:
+        path: Log file path
+        icon_level: Lowest level of per-icon records: "info", "warning" or
+            "error"
+        icon_sample: Log one in this many per-icon info records
+    """
+    global _listener, _queue_handler
+
+    stop_file_logging()
+
+    file_handler = BatchedFileHandler(path)
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _queue_handler = _QueueHandler(log_queue)
+    _listener = BatchingQueueListener(log_queue, file_handler)
+    _listener.start()
+
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(_queue_handler)
+
+    icon_logger.configure(icon_level, icon_sample)
+
+    logger.info("Logging initialized. Log file: %s", path)
+
+
+def stop_file_logging() -> None:
+    """Write all queued records, stop the listener thread and close the file."""
+    global _listener, _queue_handler
+
+    listener, _listener = _listener, None
+    queue_handler, _queue_handler = _queue_handler, None
+    if queue_handler is not None:
+        logging.getLogger().removeHandler(queue_handler)
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
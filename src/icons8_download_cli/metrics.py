@@ -0,0 +1,374 @@
+"""Run metrics and machine-readable performance reports."""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Mapping, Optional
+
+from icons8_download_cli.concurrency import AdaptiveLimiter
+from icons8_download_cli.profiling import phase_span
+
+logger = logging.getLogger(__name__)
+
+REPORT_VERSION = 1
+METRIC_PREFIX = "icons8_download"
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class LatencyHistogram:
+    """Request latencies counted in fixed buckets, like a Prometheus histogram."""
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, latency: float) -> None:
+        """
+        Count one latency; callers hold the RunMetrics lock.
+
+        Args:
+            latency: Latency in seconds
+        """
+        index = 0
+        while index < len(LATENCY_BUCKETS) and latency > LATENCY_BUCKETS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += latency
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """
+        Estimate a latency percentile as the upper bound of its bucket.
+
+        Args:
+            percentile: Percentile between 0 and 100
+
+        Returns:
+            Latency in seconds (None above the last bucket or without samples)
+        """
+        if not self.count:
+            return None
+        rank = self.count * percentile / 100
+        cumulative = 0
+        # The last count is the overflow bucket above every bound
+        for bound, count in zip(LATENCY_BUCKETS, self.counts[:-1], strict=True):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return None
+
+    def to_dict(self) -> dict[str, Any]:
+        """Summarize the histogram with cumulative bucket counts."""
+        buckets: dict[str, int] = {}
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.counts[:-1], strict=True):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = self.count
+
+        return {
+            "count": self.count,
+            "sum_seconds": round(self.sum, 6),
+            "mean_seconds": round(self.sum / self.count, 6) if self.count else None,
+            "p50_seconds": self.percentile(50),
+            "p90_seconds": self.percentile(90),
+            "p99_seconds": self.percentile(99),
+            "buckets": buckets,
+        }
+
+
+class RunMetrics:
+    """
+    Thread-safe request, byte, concurrency and phase metrics of the process.
+
+    Requests are grouped by kind: "listing" for API pages, "image" for icon
+    downloads. Latency is the time until the response headers arrive. Peak
+    concurrency counts requests from the moment a worker starts them, so it
+    includes time spent waiting for a pooled connection or an adaptive
+    limiter slot; adaptive limits are reported separately.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.latencies: dict[str, LatencyHistogram] = {}
+        self.bytes: dict[str, int] = {}
+        self.peak_concurrency: dict[str, int] = {}
+        self.phases: dict[str, float] = {}
+        self._in_flight: dict[str, int] = {}
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the metrics were created."""
+        return time.perf_counter() - self._started
+
+    def record_response(self, kind: str, latency: float, byte_count: int) -> None:
+        """
+        Record a completed request.
+
+        Args:
+            kind: Request kind, "listing" or "image"
+            latency: Time until the response headers arrived, in seconds
+            byte_count: Size of the response body
+        """
+        with self._lock:
+            histogram = self.latencies.get(kind)
+            if histogram is None:
+                histogram = self.latencies[kind] = LatencyHistogram()
+            histogram.observe(latency)
+            self.bytes[kind] = self.bytes.get(kind, 0) + byte_count
+
+    @contextmanager
+    def in_flight(self, kind: str) -> Iterator[None]:
+        """
+        Count a request as in flight for the peak concurrency of its kind.
+
+        Args:
+            kind: Request kind, "listing" or "image"
+        """
+        with self._lock:
+            active = self._in_flight.get(kind, 0) + 1
+            self._in_flight[kind] = active
+            self.peak_concurrency[kind] = max(self.peak_concurrency.get(kind, 0), active)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight[kind] -= 1
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Add the wall time of a block to a named phase, e.g. "fetch".
+
+        The phase is also traced when profiling is enabled.
+
+        Args:
+            name: Phase name
+        """
+        started_at = time.perf_counter()
+        try:
+            with phase_span(name):
+                yield
+        finally:
+            elapsed = time.perf_counter() - started_at
+            with self._lock:
+                self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+
+stats = RunMetrics()
+
+
+def build_report(
+    counts: Mapping[str, int],
+    limiters: Iterable[AdaptiveLimiter] = (),
+) -> dict[str, Any]:
+    """
+    Build the performance report of the current run.
+
+    Combines the run metrics with the listing cache, icon revalidation and
+    retry statistics of the process.
+
+    Args:
+        counts: Icon counts by outcome, e.g. {"found": 10, "downloaded": 9}
+        limiters: Adaptive limiters of the run's HTTP client, if any
+
+    Returns:
+        JSON-serializable report
+    """
+    from icons8_download_cli.cache import stats as cache_stats
+    from icons8_download_cli.downloader import image_stats
+    from icons8_download_cli.retry import stats as retry_stats
+
+    duration = stats.elapsed
+    with stats._lock:
+        latencies = {kind: histogram.to_dict() for kind, histogram in stats.latencies.items()}
+        transferred = dict(stats.bytes)
+        peak_concurrency = dict(stats.peak_concurrency)
+        phases = {name: round(seconds, 6) for name, seconds in stats.phases.items()}
+
+    return {
+        "version": REPORT_VERSION,
+        "started_at": datetime.fromtimestamp(stats.started_at, timezone.utc).isoformat(),
+        "duration_seconds": round(duration, 6),
+        "icons": dict(counts),
+        "throughput": {
+            "icons_per_second": round(counts.get("downloaded", 0) / duration, 3),
+            "bytes_per_second": round(transferred.get("image", 0) / duration, 3),
+        },
+        "phases_seconds": phases,
+        "requests": latencies,
+        "bytes": transferred,
+        "concurrency": {
+            "peak": peak_concurrency,
+            "adaptive": {
+                limiter.name: {"final": limiter.limit, "peak": limiter.peak_limit}
+                for limiter in limiters
+            },
+        },
+        "cache": {
+            "hits": cache_stats.hits,
+            "misses": cache_stats.misses,
+            "expired": cache_stats.expired,
+            "revalidated": cache_stats.revalidated,
+            "hit_ratio": round(cache_stats.hit_ratio, 4),
+        },
+        "icons_revalidated": {
+            "not_modified": image_stats.hits,
+            "changed": image_stats.misses,
+        },
+        "retries": {
+            "total": retry_stats.total,
+            "recovered": retry_stats.recovered,
+            "by_error_class": dict(retry_stats.retries),
+        },
+    }
+
+
+def format_prometheus(report: Mapping[str, Any]) -> str:
+    """
+    Format a report in the Prometheus text exposition format.
+
+    Args:
+        report: Report built by build_report
+
+    Returns:
+        Metrics text, suitable for the node_exporter textfile collector
+    """
+    lines: list[str] = []
+
+    def add(name: str, kind: str, help_text: str, samples: list[tuple[str, Any]]) -> None:
+        metric = f"{METRIC_PREFIX}_{name}"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for suffix_labels, value in samples:
+            lines.append(f"{metric}{suffix_labels} {value}")
+
+    add(
+        "last_run_timestamp_seconds",
+        "gauge",
+        "Start time of the last run.",
+        [("", datetime.fromisoformat(report["started_at"]).timestamp())],
+    )
+    add(
+        "run_duration_seconds",
+        "gauge",
+        "Wall time of the last run.",
+        [("", report["duration_seconds"])],
+    )
+    add(
+        "phase_duration_seconds",
+        "gauge",
+        "Wall time per phase of the last run.",
+        [(_labels(phase=name), value) for name, value in report["phases_seconds"].items()],
+    )
+    add(
+        "icons",
+        "gauge",
+        "Icons per outcome in the last run.",
+        [(_labels(result=name), value) for name, value in report["icons"].items()],
+    )
+
+    lines.append(f"# HELP {METRIC_PREFIX}_request_duration_seconds Time until response headers.")
+    lines.append(f"# TYPE {METRIC_PREFIX}_request_duration_seconds histogram")
+    for kind, histogram in report["requests"].items():
+        metric = f"{METRIC_PREFIX}_request_duration_seconds"
+        for bound, count in histogram["buckets"].items():
+            lines.append(f"{metric}_bucket{_labels(kind=kind, le=bound)} {count}")
+        lines.append(f"{metric}_sum{_labels(kind=kind)} {histogram['sum_seconds']}")
+        lines.append(f"{metric}_count{_labels(kind=kind)} {histogram['count']}")
+
+    add(
+        "response_bytes",
+        "gauge",
+        "Response body bytes received in the last run.",
+        [(_labels(kind=kind), value) for kind, value in report["bytes"].items()],
+    )
+    add(
+        "peak_concurrency",
+        "gauge",
+        "Most requests in flight at once in the last run.",
+        [(_labels(kind=kind), value) for kind, value in report["concurrency"]["peak"].items()],
+    )
+    add(
+        "cache_lookups",
+        "gauge",
+        "Listing cache lookups in the last run.",
+        [
+            (_labels(result="hit"), report["cache"]["hits"]),
+            (_labels(result="miss"), report["cache"]["misses"]),
+        ],
+    )
+    add(
+        "cache_hit_ratio",
+        "gauge",
+        "Share of listing pages served from the cache in the last run.",
+        [("", report["cache"]["hit_ratio"])],
+    )
+    add(
+        "retries",
+        "gauge",
+        "Retried requests per error class in the last run.",
+        [
+            (_labels(error_class=name), value)
+            for name, value in report["retries"]["by_error_class"].items()
+        ],
+    )
+
+    return "\n".join(lines) + "\n"
+
+
+def _labels(**labels: object) -> str:
+    """Format Prometheus labels, escaping their values."""
+    pairs = []
+    for name, value in labels.items():
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def write_stats_json(path: Path, report: Mapping[str, Any]) -> None:
+    """
+    Write a report as JSON.
+
+    Args:
+        path: Output file
+        report: Report built by build_report
+
+    Raises:
+        OSError: If the file cannot be written
+    """
+    _write_atomic(path, json.dumps(report, indent=2) + "\n")
+    logger.info("Wrote run statistics to %s", path)
+
+
+def write_prometheus_textfile(path: Path, report: Mapping[str, Any]) -> None:
+    """
+    Write a report as a Prometheus textfile.
+
+    Args:
+        path: Output file, usually *.prom in the textfile collector directory
+        report: Report built by build_report
+
+    Raises:
+        OSError: If the file cannot be written
+    """
+    _write_atomic(path, format_prometheus(report))
+    logger.info("Wrote Prometheus metrics to %s", path)
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    """Write a file through a temporary file so readers never see it partially written."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f".{path.name}.tmp")
+    temp_path.write_text(text, encoding="utf-8")
+    os.replace(temp_path, path)
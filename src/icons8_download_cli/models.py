@@ -1,5 +1,7 @@
 """Data models for Icons8 API responses."""
 
+from typing import Any, NamedTuple
+
 from pydantic import BaseModel
 
 
@@ -16,3 +18,99 @@ class IconResponse(BaseModel):
     success: bool
     icons: list[Icon]
 
+
+class IconRecord(NamedTuple):
+    """
+    Compact icon record used by the listing and download pipeline.
+
+    A plain tuple rather than an Icon model: listings hold hundreds of
+    thousands of icons, and decode_icon_page builds these records several
+    times faster and in a fraction of the memory.
+    """
+
+    id: str
+    name: str
+
+
+class ListingPage(NamedTuple):
+    """Listing page decoded by decode_icon_page."""
+
+    success: bool
+    icons: list[IconRecord]
+
+
+def decode_icon_page(data: Any) -> ListingPage:
+    """
+    Decode a listing page, validating only the fields in use.
+
+    Fast path for the pipeline, checking what IconResponse would check for
+    these fields: a boolean "success", and string "id" and "name" fields of
+    every entry. All other fields of the API response are ignored without
+    being looked at.
+
+    Args:
+        data: Parsed JSON of a listing page
+
+    Returns:
+        Decoded page
+
+    Raises:
+        ValueError: If the page or one of its entries is malformed
+    """
+    if not isinstance(data, dict):
+        raise ValueError(f"Listing page is a {type(data).__name__}, not an object")
+
+    success = data.get("success")
+    entries = data.get("icons")
+    if not isinstance(success, bool):
+        raise ValueError("Listing page has no boolean 'success' field")
+    if not isinstance(entries, list):
+        raise ValueError("Listing page has no 'icons' list")
+
+    try:
+        icons = [IconRecord(entry["id"], entry["name"]) for entry in entries]
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"Listing page has an icon without id or name: {e!r}") from e
+
+    for icon_id, name in icons:
+        if type(icon_id) is not str or type(name) is not str:
+            raise ValueError(
+                f"Listing page has an icon with a non-string id or name: {icon_id!r}, {name!r}"
+            )
+
+    return ListingPage(success, icons)
+
+
+def validate_icon(data: Any) -> IconRecord:
+    """
+    Validate an icon read back from a file with the Icon model.
+
+    Used for records written by earlier runs (dead-letter files, shard
+    manifests), which may have been edited by hand.
+
+    Args:
+        data: Parsed JSON object with "id" and "name" fields; other fields
+            are ignored
+
+    Returns:
+        Icon record
+
+    Raises:
+        pydantic.ValidationError: If the fields are missing or not strings
+            (a ValueError)
+    """
+    icon = Icon.model_validate(data)
+    return IconRecord(icon.id, icon.name)
+
+
+class Style(BaseModel):
+    """Icon style entry from styles.json."""
+
+    id: str
+    label: str
+
+
+class StylesFile(BaseModel):
+    """Contents of styles.json listing all known icon styles."""
+
+    styles: list[Style]
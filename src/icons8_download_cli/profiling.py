@@ -0,0 +1,256 @@
+"""Opt-in profiling: trace spans, per-phase cProfile and stack sampling."""
+
+import cProfile
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, ContextManager, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("spans", "cprofile", "sample")
+# Interval between stack samples in "sample" mode, in seconds
+SAMPLE_INTERVAL = 0.005
+
+_profiler: Optional["Profiler"] = None
+_no_span = nullcontext()
+
+
+class Profiler:
+    """
+    Collects trace spans of a run and, depending on the mode, profiles.
+
+    Spans are written as a Chrome trace (chrome://tracing, Perfetto,
+    speedscope). In "cprofile" mode every phase gets its own cProfile
+    profile, saved as <trace>.<phase>.pstats; since Python 3.12 a profile
+    covers all threads. In "sample" mode a background thread samples the
+    stacks of all threads, and the samples are saved per phase and thread as
+    folded stacks in <trace>.folded for flame graph tools.
+    """
+
+    def __init__(self, path: Path, mode: str = "spans") -> None:
+        """
+        Create a profiler.
+
+        Args:
+            path: Path of the Chrome trace file
+            mode: "spans", "cprofile" or "sample"
+        """
+        self.path = path
+        self.mode = mode
+        self.phase = "startup"
+        self._started = time.perf_counter()
+        self._pid = os.getpid()
+        self._events: list[dict[str, Any]] = []
+        self._thread_names: dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._profiles: dict[str, cProfile.Profile] = {}
+        self._samples: Counter[str] = Counter()
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        """Start the stack sampler in "sample" mode."""
+        if self.mode == "sample":
+            self._sampler = threading.Thread(
+                target=self._sample,
+                name="icons8-profiler",
+                daemon=True,
+            )
+            self._sampler.start()
+
+    @contextmanager
+    def span(self, name: str, category: str, args: Optional[dict[str, Any]]) -> Iterator[None]:
+        """Record a span; see the module-level span()."""
+        thread = threading.current_thread()
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            ended_at = time.perf_counter()
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (started_at - self._started) * 1e6,
+                "dur": (ended_at - started_at) * 1e6,
+                "pid": self._pid,
+                "tid": thread.ident,
+            }
+            if args:
+                event["args"] = args
+            with self._lock:
+                self._events.append(event)
+                self._thread_names.setdefault(thread.ident, thread.name)
+
+    @contextmanager
+    def phase_span(self, name: str) -> Iterator[None]:
+        """Record a phase span, profiling it in "cprofile" mode."""
+        self.phase = name
+        profile = None
+        if self.mode == "cprofile":
+            profile = self._profiles.setdefault(name, cProfile.Profile())
+            try:
+                profile.enable()
+            except ValueError as e:
+                # Another profiler (e.g. a debugger) is already active
+                logger.warning("Cannot profile phase %s: %s", name, e)
+                profile = None
+        try:
+            with self.span(name, "phase", None):
+                yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            self.phase = "other"
+
+    def _sample(self) -> None:
+        """Sample the stacks of all other threads until stopped."""
+        own_ident = threading.get_ident()
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            phase = self.phase
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(
+                        f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                    )
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                stack.append(phase)
+                self._samples[";".join(reversed(stack))] += 1
+
+    def stop(self) -> list[Path]:
+        """
+        Stop profiling and write the trace and profiles.
+
+        Returns:
+            Paths of the files written
+
+        Raises:
+            OSError: If a file cannot be written
+        """
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+
+        with self._lock:
+            events = list(self._events)
+            thread_names = dict(self._thread_names)
+        metadata = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": self._pid,
+                "tid": ident,
+                "args": {"name": name},
+            }
+            for ident, name in thread_names.items()
+        ]
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(
+            json.dumps({"traceEvents": metadata + events, "displayTimeUnit": "ms"}),
+            encoding="utf-8",
+        )
+        written = [self.path]
+
+        base = self.path.with_suffix("")
+        for phase, profile in self._profiles.items():
+            stats_path = base.with_name(f"{base.name}.{phase}.pstats")
+            profile.dump_stats(stats_path)
+            written.append(stats_path)
+
+        if self._samples:
+            folded_path = base.with_name(f"{base.name}.folded")
+            folded_path.write_text(
+                "".join(f"{stack} {count}\n" for stack, count in self._samples.most_common()),
+                encoding="utf-8",
+            )
+            written.append(folded_path)
+
+        return written
+
+
+def start_profiling(path: Path, mode: str = "spans") -> Profiler:
+    """
+    Start profiling the process.
+
+    Args:
+        path: Path of the Chrome trace file to write on stop_profiling()
+        mode: "spans" for trace spans only, "cprofile" to also profile each
+            phase, "sample" to also sample the stacks of all threads
+
+    Returns:
+        The active profiler
+    """
+    global _profiler
+
+    _profiler = Profiler(path, mode)
+    _profiler.start()
+    logger.info("Profiling to %s (%s mode)", path, mode)
+    return _profiler
+
+
+def stop_profiling() -> list[Path]:
+    """
+    Stop profiling and write the collected trace and profiles.
+
+    Returns:
+        Paths of the files written, empty if profiling was not started
+
+    Raises:
+        OSError: If a file cannot be written
+    """
+    global _profiler
+
+    profiler, _profiler = _profiler, None
+    if profiler is None:
+        return []
+    written = profiler.stop()
+    logger.info("Wrote profile: %s", ", ".join(str(path) for path in written))
+    return written
+
+
+def span(name: str, category: str = "code", **args: Any) -> ContextManager[None]:
+    """
+    Trace a block as a named span while profiling; a no-op otherwise.
+
+    Args:
+        name: Span name shown in trace viewers
+        category: Span category, e.g. "http"
+        **args: Details attached to the span
+
+    Returns:
+        Context manager timing the block
+    """
+    profiler = _profiler
+    if profiler is None:
+        return _no_span
+    return profiler.span(name, category, args)
+
+
+def phase_span(name: str) -> ContextManager[None]:
+    """
+    Trace a phase of the run, e.g. "fetch", while profiling.
+
+    Args:
+        name: Phase name
+
+    Returns:
+        Context manager timing (and in "cprofile" mode profiling) the phase
+    """
+    profiler = _profiler
+    if profiler is None:
+        return _no_span
+    return profiler.phase_span(name)
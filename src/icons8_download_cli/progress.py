@@ -0,0 +1,190 @@
+"""Low-overhead download progress: lock-free counting, fixed-rate reporting."""
+
+import json
+import logging
+import sys
+import threading
+import time
+from typing import Any, Callable, Optional, Protocol, TextIO
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_MODES = ("rich", "jsonl", "none")
+# Seconds between progress bar refreshes and between JSON-lines records
+RICH_INTERVAL = 0.1
+JSONL_INTERVAL = 1.0
+
+
+class ProgressSink(Protocol):
+    """Anything download functions can report progress to, like rich's Progress."""
+
+    def update(self, task_id: Any, **kwargs: Any) -> None:
+        """Advance a task or set its total or fields."""
+
+
+class ProgressCounter:
+    """
+    Download progress shared by worker threads without a lock.
+
+    Every thread advances a counter slot of its own, so the per-icon update
+    is a plain integer increment with no lock and no rendering; readers sum
+    the slots, which may lag a concurrent increment by an icon. The update()
+    method mirrors rich's Progress.update(), so a counter can be passed to
+    the download functions in place of a progress bar, and a ProgressTicker
+    reports it at a fixed rate.
+    """
+
+    def __init__(self, total: Optional[int] = None, **fields: Any) -> None:
+        """
+        Create a counter.
+
+        Args:
+            total: Expected number of steps, if known
+            **fields: Initial task fields, e.g. concurrency
+        """
+        self.total = total
+        self.fields = dict(fields)
+        self.started_at = time.perf_counter()
+        self._slots: list[list[int]] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def update(
+        self,
+        task_id: Any = None,
+        *,
+        advance: int = 0,
+        total: Optional[int] = None,
+        **fields: Any,
+    ) -> None:
+        """
+        Advance the counter or set its total or fields.
+
+        Args:
+            task_id: Ignored; accepted for compatibility with rich's Progress
+            advance: Steps completed
+            total: New expected number of steps
+            **fields: Task fields to set, e.g. concurrency
+        """
+        if advance:
+            try:
+                slot = self._local.slot
+            except AttributeError:
+                slot = self._add_slot()
+            slot[0] += advance
+        if total is not None:
+            self.total = total
+        if fields:
+            self.fields.update(fields)
+
+    def _add_slot(self) -> list[int]:
+        """Register the counter slot of the calling thread."""
+        slot = [0]
+        with self._lock:
+            self._slots.append(slot)
+        self._local.slot = slot
+        return slot
+
+    @property
+    def completed(self) -> int:
+        """Steps completed so far."""
+        return sum(slot[0] for slot in list(self._slots))
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the counter was created."""
+        return time.perf_counter() - self.started_at
+
+
+class ProgressTicker:
+    """
+    Reports a ProgressCounter from a background thread at a fixed rate.
+
+    The report callback runs every interval while the ticker is active and
+    once more when it stops, so the final state is always reported.
+    """
+
+    def __init__(
+        self,
+        counter: ProgressCounter,
+        report: Callable[[ProgressCounter], None],
+        interval: float,
+    ) -> None:
+        """
+        Create a ticker.
+
+        Args:
+            counter: Counter to report
+            report: Called with the counter on every tick
+            interval: Seconds between reports
+        """
+        self.counter = counter
+        self.report = report
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="icons8-progress", daemon=True)
+
+    def _run(self) -> None:
+        """Report until stopped."""
+        while not self._stop.wait(self.interval):
+            self._report()
+
+    def _report(self) -> None:
+        """Report once, never letting a reporting error stop the download."""
+        try:
+            self.report(self.counter)
+        except Exception as e:
+            logger.warning("Failed to report progress: %s", e)
+
+    def __enter__(self) -> "ProgressTicker":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._report()
+
+
+class JsonlProgressWriter:
+    """Writes progress records as JSON lines, e.g. for CI logs."""
+
+    def __init__(self, phase: str, stream: Optional[TextIO] = None) -> None:
+        """
+        Create a writer.
+
+        Args:
+            phase: Phase reported in every record, e.g. "download"
+            stream: Output stream (default: stdout)
+        """
+        self.phase = phase
+        self.stream = stream
+
+    def __call__(self, counter: ProgressCounter) -> None:
+        """Write one progress record for a counter."""
+        elapsed = counter.elapsed
+        completed = counter.completed
+        record = {
+            "event": "progress",
+            "phase": self.phase,
+            "completed": completed,
+            "total": counter.total,
+            "elapsed_seconds": round(elapsed, 3),
+            "icons_per_second": round(completed / elapsed, 3) if elapsed > 0 else 0.0,
+            # Copied first: workers may set fields meanwhile
+            **counter.fields.copy(),
+        }
+        write_record(record, self.stream)
+
+
+def write_record(record: dict[str, Any], stream: Optional[TextIO] = None) -> None:
+    """
+    Write one JSON-lines record and flush it, so readers see it immediately.
+
+    Args:
+        record: JSON-serializable record
+        stream: Output stream (default: stdout)
+    """
+    stream = stream or sys.stdout
+    stream.write(json.dumps(record, separators=(",", ":")) + "\n")
+    stream.flush()
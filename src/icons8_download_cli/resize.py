@@ -0,0 +1,259 @@
+"""Deriving smaller icon sizes locally from one downloaded size."""
+
+import io
+import logging
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, NamedTuple, Optional
+
+from icons8_download_cli.logfile import icon_logger
+from icons8_download_cli.storage import open_writer
+
+# Worker processes import this module to run render_icons(), so everything
+# that loads pydantic, requests or rich is imported for type checking only
+if TYPE_CHECKING:
+    from rich.progress import TaskID
+
+    from icons8_download_cli.deadletter import DeadLetterFile
+    from icons8_download_cli.journal import ResumeJournal
+    from icons8_download_cli.models import IconRecord
+    from icons8_download_cli.progress import ProgressSink
+    from icons8_download_cli.storage import FileStore
+
+logger = logging.getLogger(__name__)
+
+# Icons resized per task sent to a worker process, so the cost of passing
+# a task between processes is shared by several icons
+RESIZE_BATCH_SIZE = 16
+# Tasks queued per worker process, bounding the PNGs held in memory
+RESIZE_TASKS_PER_WORKER = 2
+# Steps of Image.reduce() before resampling are allowed to shrink the image to
+# this factor of the target size; 3.0 is indistinguishable from resampling
+# the full image (see Pillow's Image.resize)
+REDUCING_GAP = 3.0
+# Premultiplied-alpha variants of the modes with transparency
+_PREMULTIPLIED_MODES = {"RGBA": "RGBa", "LA": "La"}
+
+
+class DeriveJob(NamedTuple):
+    """Smaller sizes of an icon, rendered from a downloaded larger size."""
+
+    icon: "IconRecord"
+    source_path: Path
+    # (size, file path) of every size to render
+    targets: tuple[tuple[int, Path], ...]
+    # Stamp of the source when the job was planned, if its sizes need
+    # rendering only when the source changes (see get_file_stamp)
+    source_stamp: Optional[tuple[int, int, int]] = None
+
+
+def check_resize_support() -> None:
+    """
+    Ensure the optional dependency of --derive-sizes is installed.
+
+    Raises:
+        RuntimeError: If Pillow is not installed
+    """
+    try:
+        import PIL  # noqa: F401
+    except ImportError as e:
+        raise RuntimeError(
+            "Deriving sizes requires Pillow. "
+            "Install it with: pip install 'icons8-download-cli[resize]'"
+        ) from e
+
+
+def get_file_stamp(path: Path) -> Optional[tuple[int, int, int]]:
+    """
+    Get the inode, size and modification time of a file.
+
+    Downloads are saved by renaming a new file into place, so the stamp
+    changes whenever a new body is saved and stays the same when a
+    revalidation is answered with 304 Not Modified.
+
+    Args:
+        path: File path
+
+    Returns:
+        Stamp of the file, or None if it does not exist
+    """
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def render_icons(tasks: list[tuple[str, tuple[int, ...]]]) -> list[list[bytes] | str]:
+    """
+    Render smaller sizes of icons; runs in a worker process.
+
+    Args:
+        tasks: (source PNG path, sizes to render) per icon
+
+    Returns:
+        Per icon, the PNG of every size in order, or an error message if the
+        source could not be read or resized
+    """
+    from PIL import Image
+
+    results: list[list[bytes] | str] = []
+    for source_path, sizes in tasks:
+        try:
+            with Image.open(source_path) as source:
+                source.load()
+                image: Image.Image = source
+                # Palette and bilevel images would be resized with the
+                # nearest neighbour
+                if image.mode not in ("RGBA", "RGB", "LA", "L"):
+                    image = image.convert("RGBA")
+                # Resample with premultiplied alpha, so transparent pixels do
+                # not bleed their colour into the edges. Image.resize() does
+                # this too, but converts the full image again for every size.
+                mode = image.mode
+                premultiplied_mode = _PREMULTIPLIED_MODES.get(mode)
+                if premultiplied_mode:
+                    image = image.convert(premultiplied_mode)
+                width, height = image.size
+                pngs = []
+                for size in sizes:
+                    scale = size / max(width, height)
+                    resized = image.resize(
+                        (max(1, round(width * scale)), max(1, round(height * scale))),
+                        Image.Resampling.LANCZOS,
+                        reducing_gap=REDUCING_GAP,
+                    )
+                    if premultiplied_mode:
+                        resized = resized.convert(mode)
+                    buffer = io.BytesIO()
+                    resized.save(buffer, "PNG")
+                    pngs.append(buffer.getvalue())
+            results.append(pngs)
+        except Exception as e:
+            results.append(f"{type(e).__name__}: {e}")
+    return results
+
+
+def derive_icons(
+    jobs: Iterable[DeriveJob],
+    progress: "ProgressSink",
+    task_id: Optional["TaskID"],
+    max_workers: Optional[int] = None,
+    journal: Optional["ResumeJournal"] = None,
+    dead_letter: Optional["DeadLetterFile"] = None,
+    store: Optional["FileStore"] = None,
+) -> tuple[int, int]:
+    """
+    Render smaller icon sizes in a process pool and save them.
+
+    Decoding, resampling and PNG encoding run in worker processes, one per
+    core by default, so they use every core instead of contending for the
+    GIL with I/O threads. Rendered files are saved by the calling thread
+    through the same writers as downloads, recorded in the resume journal
+    and reported to progress one file at a time. Icons whose source was not
+    downloaded are recorded as failed, so --retry-failed fetches them from
+    the network. Jobs whose source still has the stamp they were planned
+    with are not rendered again, their files are kept.
+
+    Args:
+        jobs: Icons to render sizes of
+        progress: Progress to advance for every file
+        task_id: Progress task, if the progress has several
+        max_workers: Worker processes (default: number of CPUs)
+        journal: Optional resume journal to record rendered files in
+        dead_letter: Optional dead-letter file to record failures in
+        store: Optional content store to save files through
+
+    Returns:
+        Tuple of (rendered_count, failed_count), counted per file; kept files
+        count as rendered, as files revalidated with 304 count as downloaded
+    """
+    rendered_count = 0
+    failed_count = 0
+
+    def fail(job: DeriveJob, error: str) -> None:
+        nonlocal failed_count
+        icon_logger.error("Failed to resize %s (%s): %s", job.icon.name, job.icon.id, error)
+        for size, file_path in job.targets:
+            if dead_letter:
+                dead_letter.record(job.icon, size, file_path, "other", error, 0)
+            progress.update(task_id, advance=1)
+        failed_count += len(job.targets)
+
+    def save(batch: list[DeriveJob], results: list[list[bytes] | str]) -> None:
+        nonlocal rendered_count, failed_count
+        for job, pngs in zip(batch, results, strict=True):
+            if isinstance(pngs, str):
+                fail(job, pngs)
+                continue
+            for (size, file_path), data in zip(job.targets, pngs, strict=True):
+                writer = open_writer(file_path, store, len(data))
+                try:
+                    writer.write(data)
+                    writer.commit()
+                except OSError as e:
+                    writer.abort()
+                    icon_logger.error("Failed to save %s: %s", file_path, e)
+                    if dead_letter:
+                        dead_letter.record(job.icon, size, file_path, "other", str(e), 0)
+                    failed_count += 1
+                else:
+                    if journal:
+                        journal.record(job.icon.id, size, file_path)
+                    icon_logger.info("Resized: %s -> %s", job.icon.name, file_path.name)
+                    rendered_count += 1
+                progress.update(task_id, advance=1)
+
+    # Not fork: the parent runs download, logging and progress threads
+    start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    # process_cpu_count() (Python 3.13+) honours the CPU affinity mask
+    cpu_count = getattr(os, "process_cpu_count", os.cpu_count)
+    max_workers = max_workers or cpu_count() or 1
+    max_pending = max_workers * RESIZE_TASKS_PER_WORKER
+    with ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context(start_method)) as pool:
+        pending: dict[Future, list[DeriveJob]] = {}
+
+        def submit(batch: list[DeriveJob]) -> None:
+            if len(pending) >= max_pending:
+                collect()
+            tasks = [(str(job.source_path), tuple(size for size, _ in job.targets)) for job in batch]
+            pending[pool.submit(render_icons, tasks)] = batch
+
+        def collect() -> None:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                batch = pending.pop(future)
+                try:
+                    results = future.result()
+                except Exception as e:
+                    for job in batch:
+                        fail(job, f"{type(e).__name__}: {e}")
+                    continue
+                save(batch, results)
+
+        batch: list[DeriveJob] = []
+        for job in jobs:
+            stamp = get_file_stamp(job.source_path)
+            if stamp is None:
+                fail(job, f"{job.source_path.name} was not downloaded")
+                continue
+            if stamp == job.source_stamp:
+                # The source was revalidated unchanged, so are its sizes
+                for _, file_path in job.targets:
+                    icon_logger.info("Not modified: %s -> %s", job.icon.name, file_path.name)
+                    progress.update(task_id, advance=1)
+                rendered_count += len(job.targets)
+                continue
+            batch.append(job)
+            if len(batch) == RESIZE_BATCH_SIZE:
+                submit(batch)
+                batch = []
+        if batch:
+            submit(batch)
+        while pending:
+            collect()
+
+    logger.info("Resized %d files, %d failed", rendered_count, failed_count)
+    return rendered_count, failed_count
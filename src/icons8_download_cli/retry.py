@@ -0,0 +1,248 @@
+"""Retries with exponential backoff and jitter for failed requests."""
+
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import requests
+
+from icons8_download_cli.client import HttpClient
+from icons8_download_cli.concurrency import parse_retry_after
+from icons8_download_cli.defaults import DEFAULT_MAX_RETRIES
+
+logger = logging.getLogger(__name__)
+
+MAX_DELAY = 30.0
+
+# Error classes worth retrying and the base delay of their backoff, in seconds
+RETRY_BASE_DELAYS = {
+    "timeout": 1.0,
+    "connection": 0.5,
+    "server": 1.0,
+    "rate_limited": 2.0,
+}
+
+
+@dataclass
+class RetrySettings:
+    """Number of retries applied to failed requests."""
+
+    max_retries: int = DEFAULT_MAX_RETRIES
+
+
+class RetryStats:
+    """Thread-safe retry counters per error class for the current process."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.retries: dict[str, int] = {}
+        self.recovered = 0
+
+    def record_retry(self, error_class: str) -> None:
+        """
+        Count a retried request.
+
+        Args:
+            error_class: Error class of the failed attempt
+        """
+        with self._lock:
+            self.retries[error_class] = self.retries.get(error_class, 0) + 1
+
+    def record_recovered(self) -> None:
+        """Count a request that succeeded after one or more retries."""
+        with self._lock:
+            self.recovered += 1
+
+    @property
+    def total(self) -> int:
+        """Total number of retried requests."""
+        return sum(self.retries.values())
+
+
+settings = RetrySettings()
+stats = RetryStats()
+
+
+def configure_retries(max_retries: int = DEFAULT_MAX_RETRIES) -> None:
+    """
+    Configure how often failed requests are retried.
+
+    Args:
+        max_retries: Number of retries after the first attempt (0 disables)
+    """
+    settings.max_retries = max(0, max_retries)
+
+
+def classify_status(status: int) -> str:
+    """
+    Classify an HTTP error status.
+
+    Args:
+        status: HTTP status code
+
+    Returns:
+        "rate_limited" for 429, "server" for 5xx, "http" otherwise
+    """
+    if status == 429:
+        return "rate_limited"
+    if status >= 500:
+        return "server"
+    return "http"
+
+
+def classify_error(error: Exception) -> str:
+    """
+    Classify a failed request by the kind of error.
+
+    Args:
+        error: Exception raised by the request
+
+    Returns:
+        One of "timeout", "connection", "rate_limited", "server", "http"
+        or "other"
+    """
+    # Timeouts first: ConnectTimeout is also a ConnectionError
+    if isinstance(error, requests.Timeout):
+        return "timeout"
+    if isinstance(error, (requests.ConnectionError, requests.exceptions.ChunkedEncodingError)):
+        return "connection"
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return classify_status(error.response.status_code)
+    return "other"
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """
+    Get the delay requested by the Retry-After header of an error response.
+
+    Args:
+        error: Exception raised by the request
+
+    Returns:
+        Delay in seconds, or None if the response has no Retry-After header
+    """
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    return parse_retry_after(response.headers.get("Retry-After"))
+
+
+def should_retry(error_class: str, attempt: int) -> bool:
+    """
+    Decide whether a failed attempt is retried.
+
+    Args:
+        error_class: Error class of the failed attempt
+        attempt: Number of the failed attempt, starting at 1
+
+    Returns:
+        True if the error is retryable and retries are left
+    """
+    return error_class in RETRY_BASE_DELAYS and attempt <= settings.max_retries
+
+
+def get_retry_delay(
+    error_class: str,
+    attempt: int,
+    retry_after: Optional[float] = None,
+) -> float:
+    """
+    Compute the backoff delay before the next attempt.
+
+    Uses exponential backoff with full jitter, so concurrent workers that
+    failed together do not retry in lockstep. A Retry-After delay requested
+    by the server is a lower bound.
+
+    Args:
+        error_class: Error class of the failed attempt
+        attempt: Number of the failed attempt, starting at 1
+        retry_after: Delay requested by the server, in seconds
+
+    Returns:
+        Delay in seconds
+    """
+    base_delay = RETRY_BASE_DELAYS.get(error_class, 1.0)
+    delay = random.uniform(0, min(MAX_DELAY, base_delay * 2 ** (attempt - 1)))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, MAX_DELAY))
+    return delay
+
+
+def log_retry(
+    description: str,
+    error_class: str,
+    attempt: int,
+    delay: float,
+    error: Exception,
+) -> None:
+    """
+    Count a retry and log it.
+
+    Args:
+        description: What is being requested, for the log message
+        error_class: Error class of the failed attempt
+        attempt: Number of the failed attempt, starting at 1
+        delay: Delay before the next attempt, in seconds
+        error: Exception raised by the failed attempt
+    """
+    stats.record_retry(error_class)
+    logger.warning(
+        "Retrying %s in %.1fs after %s error (attempt %d/%d): %s",
+        description,
+        delay,
+        error_class,
+        attempt,
+        settings.max_retries + 1,
+        error,
+    )
+
+
+def get_with_retries(
+    client: HttpClient,
+    url: str,
+    description: str,
+    **kwargs: Any,
+) -> requests.Response:
+    """
+    Send a GET request, retrying retryable errors with backoff.
+
+    Error statuses are raised as requests.HTTPError, so a returned response
+    is always successful (or a 304 for conditional requests).
+
+    Args:
+        client: HTTP client to send the request with
+        url: Request URL
+        description: What is being requested, for log messages
+        **kwargs: Extra arguments passed to HttpClient.get
+
+    Returns:
+        HTTP response
+
+    Raises:
+        requests.RequestException: If the request still fails after retries
+    """
+    attempt = 1
+    while True:
+        try:
+            response = client.get(url, **kwargs)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            error_class = classify_error(e)
+            if not should_retry(error_class, attempt):
+                raise
+            delay = get_retry_delay(error_class, attempt, get_retry_after(e))
+            log_retry(description, error_class, attempt, delay, e)
+            # An unread error body would keep a stream=True connection out
+            # of the pool while sleeping
+            if e.response is not None:
+                e.response.close()
+            time.sleep(delay)
+            attempt += 1
+            continue
+
+        if attempt > 1:
+            stats.record_recovered()
+        return response
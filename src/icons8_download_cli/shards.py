@@ -0,0 +1,491 @@
+"""Deterministic partitioning of a run into shards, and merging their outputs."""
+
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, NamedTuple
+
+from icons8_download_cli.deadletter import DeadLetterFile, load_failed_downloads
+from icons8_download_cli.defaults import DEAD_LETTER_FILENAME
+from icons8_download_cli.journal import JOURNAL_FILENAME, ResumeJournal, load_journal_entries
+from icons8_download_cli.layout import NameIndex
+from icons8_download_cli.models import IconRecord, validate_icon
+from icons8_download_cli.storage import LINK_MODES, link_file
+
+logger = logging.getLogger(__name__)
+
+# Manifest of a merged directory; shards write icons8-manifest-<i>-of-<N>.jsonl
+MANIFEST_FILENAME = "icons8-manifest.jsonl"
+MANIFEST_GLOB = "icons8-manifest-*-of-*.jsonl"
+
+
+class Shard(NamedTuple):
+    """Part number of total parts of a run, numbered from 1."""
+
+    number: int
+    total: int
+
+    def __str__(self) -> str:
+        return f"{self.number}/{self.total}"
+
+    @property
+    def manifest_filename(self) -> str:
+        """File name of the shard's manifest in its target directory."""
+        return f"icons8-manifest-{self.number}-of-{self.total}.jsonl"
+
+    def owns(self, icon_id: str) -> bool:
+        """Check whether an icon is downloaded by this shard."""
+        return get_shard_index(icon_id, self.total) == self.number
+
+
+def parse_shard(text: str) -> Shard:
+    """
+    Parse a shard given as i/N.
+
+    Args:
+        text: Shard such as "2/4"
+
+    Returns:
+        Parsed shard
+
+    Raises:
+        ValueError: If text is not i/N with 1 <= i <= N
+    """
+    index, separator, count = text.strip().partition("/")
+    if separator and index.isdigit() and count.isdigit() and 1 <= int(index) <= int(count):
+        return Shard(int(index), int(count))
+    raise ValueError(f"{text!r} is not a shard i/N with 1 <= i <= N")
+
+
+def get_shard_index(icon_id: str, count: int) -> int:
+    """
+    Get the shard an icon belongs to.
+
+    A stable hash of the icon id (unlike hash(), the same on every machine
+    and Python version) spreads icons evenly and keeps every icon in the
+    same shard however the listing changes.
+
+    Args:
+        icon_id: Icon identifier
+        count: Number of shards
+
+    Returns:
+        Shard index, from 1 to count
+    """
+    digest = hashlib.blake2b(icon_id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % count + 1
+
+
+def get_listing_digest(icons: Iterable[IconRecord]) -> str:
+    """
+    Fingerprint a listing, so merges can tell whether all shards saw the same.
+
+    Args:
+        icons: Icons in listing order
+
+    Returns:
+        Hex digest of the icon ids and names in order
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for icon in icons:
+        digest.update(f"{icon.id}\0{icon.name}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ManifestEntry(NamedTuple):
+    """File of an icon listed in a manifest."""
+
+    icon: IconRecord
+    size: int
+    # POSIX path relative to the directory of the manifest
+    path: str
+    # Index of the icon in the listing of its style; names are resolved in
+    # this order
+    position: int
+
+
+class Manifest(NamedTuple):
+    """Manifest file loaded from disk."""
+
+    path: Path
+    shard: Shard
+    header: dict
+    entries: list[ManifestEntry]
+
+
+class ManifestWriter:
+    """
+    Collects the files of a shard and writes them as its manifest.
+
+    The manifest is a JSON lines file: a header with the shard, the run
+    options and a digest of the full listing, then one line per file the
+    shard owns, whether it was downloaded in this run, an earlier one, or
+    failed. It is replaced as a whole, so an interrupted write keeps the
+    previous manifest.
+    """
+
+    def __init__(
+        self,
+        target_directory: Path,
+        shard: Shard,
+        styles: list[str],
+        sizes: list[int],
+        layout: str,
+    ) -> None:
+        """
+        Start a manifest.
+
+        Args:
+            target_directory: Directory the shard saves icons in
+            shard: Shard of this run
+            styles: Styles of the run
+            sizes: Sizes of the run
+            layout: Directory layout of the run
+        """
+        self.target_directory = target_directory
+        self.path = target_directory / shard.manifest_filename
+        self.shard = shard
+        self.header = {
+            "shard": shard.number,
+            "shards": shard.total,
+            "styles": styles,
+            "sizes": sizes,
+            "layout": layout,
+        }
+        self._lines: list[str] = []
+
+    def add(self, position: int, icon: IconRecord, size: int, file_path: Path) -> None:
+        """
+        Add a file owned by the shard.
+
+        Args:
+            position: Index of the icon in the listing of its style
+            icon: Icon
+            size: Icon size
+            file_path: Resolved file path of the icon
+        """
+        try:
+            relative_path = file_path.relative_to(self.target_directory)
+        except ValueError:
+            relative_path = file_path
+        entry = {
+            "id": icon.id,
+            "name": icon.name,
+            "size": size,
+            "path": relative_path.as_posix(),
+            "position": position,
+        }
+        self._lines.append(json.dumps(entry, separators=(",", ":")) + "\n")
+
+    def write(self, icon_count: int, listing_digest: str) -> Path:
+        """
+        Write the manifest, replacing a previous one.
+
+        Args:
+            icon_count: Number of icons in the full listing, across shards
+            listing_digest: get_listing_digest() of the full listing
+
+        Returns:
+            Manifest path
+        """
+        header = {
+            **self.header,
+            "icons": icon_count,
+            "listing": listing_digest,
+            "files": len(self._lines),
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        _write_lines(self.path, [json.dumps(header, separators=(",", ":")) + "\n", *self._lines])
+        logger.info("Wrote manifest of shard %s with %d files to %s", self.shard, len(self._lines), self.path)
+        return self.path
+
+
+def _write_lines(path: Path, lines: list[str]) -> None:
+    """Write a text file through a temporary file renamed over it."""
+    temp_path = path.with_name(path.name + ".tmp")
+    try:
+        with temp_path.open("w", encoding="utf-8") as f:
+            f.writelines(lines)
+        os.replace(temp_path, path)
+    finally:
+        temp_path.unlink(missing_ok=True)
+
+
+def load_manifest(path: Path) -> Manifest:
+    """
+    Load a shard manifest.
+
+    Args:
+        path: Manifest path
+
+    Returns:
+        Loaded manifest, with unreadable entry lines skipped
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the file has no valid shard header
+    """
+    with path.open("r", encoding="utf-8") as f:
+        try:
+            header = json.loads(f.readline())
+            shard = Shard(int(header["shard"]), int(header["shards"]))
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"{path} is not a shard manifest") from e
+
+        entries: list[ManifestEntry] = []
+        skipped = 0
+        for line in f:
+            try:
+                entry = json.loads(line)
+                entries.append(
+                    ManifestEntry(
+                        validate_icon(entry),
+                        int(entry["size"]),
+                        str(entry["path"]),
+                        int(entry["position"]),
+                    )
+                )
+            except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+                skipped += 1
+
+    if skipped:
+        logger.warning("Skipped %d unreadable manifest lines in %s", skipped, path)
+    return Manifest(path, shard, header, entries)
+
+
+def find_manifests(directories: Iterable[Path]) -> list[Manifest]:
+    """
+    Load the shard manifests in directories.
+
+    Args:
+        directories: Target directories of shard runs
+
+    Returns:
+        Manifests ordered by shard index
+
+    Raises:
+        ValueError: If a directory has no manifest, a shard is given twice,
+            or the shards were run with different shard counts or options
+    """
+    manifests: list[Manifest] = []
+    for directory in directories:
+        paths = sorted(directory.glob(MANIFEST_GLOB))
+        if not paths:
+            raise ValueError(f"No shard manifest ({MANIFEST_GLOB}) in {directory}")
+        manifests.extend(load_manifest(path) for path in paths)
+
+    manifests.sort(key=lambda manifest: manifest.shard.number)
+    first = manifests[0]
+    seen: dict[int, Path] = {}
+    for manifest in manifests:
+        if manifest.shard.total != first.shard.total:
+            raise ValueError(
+                f"{manifest.path} is shard {manifest.shard}, but {first.path} "
+                f"is shard {first.shard}"
+            )
+        for option in ("styles", "sizes", "layout"):
+            if manifest.header.get(option) != first.header.get(option):
+                raise ValueError(
+                    f"{manifest.path} and {first.path} were downloaded with "
+                    f"different {option}"
+                )
+        if manifest.shard.number in seen:
+            raise ValueError(
+                f"Shard {manifest.shard} is in both {seen[manifest.shard.number]} "
+                f"and {manifest.path}"
+            )
+        seen[manifest.shard.number] = manifest.path
+    return manifests
+
+
+class MergeResult(NamedTuple):
+    """Outcome of merging shard outputs."""
+
+    # Shard count and the indexes of the merged shards
+    shard_count: int
+    shards: list[int]
+    # Files placed in the target directory
+    merged: int
+    # Listed files missing from their shard, e.g. failed downloads
+    missing: int
+    # Files that had to be renamed to avoid a name conflict
+    renamed: int
+    # Failed downloads carried over into the merged dead-letter file
+    failed: int
+    # Whether all shards saw the same listing, so their names agree
+    consistent: bool
+
+
+def merge_shards(
+    shard_directories: list[Path],
+    target_directory: Path,
+    move: bool = False,
+) -> MergeResult:
+    """
+    Merge the outputs of shard runs into one target directory.
+
+    Files are placed at the path they have in their shard. As every shard
+    resolved names over the full listing, paths agree across shards; when
+    they do not (e.g. the listing changed between shard runs, or the target
+    directory holds other files) conflicts are resolved in listing order
+    with the same name(n).png suffixes as downloads. The resume journals and
+    dead-letter files of the shards are merged too, so later runs in the
+    target directory resume and --retry-failed works, and a combined
+    manifest is written.
+
+    Args:
+        shard_directories: Target directories of the shard runs
+        target_directory: Directory to merge into
+        move: Move files out of the shard directories instead of linking
+            (or copying) them
+
+    Returns:
+        Merge outcome
+
+    Raises:
+        ValueError: If the shard manifests are missing or inconsistent
+        OSError: If a file cannot be placed in the target directory
+    """
+    manifests = find_manifests(shard_directories)
+    target_directory.mkdir(parents=True, exist_ok=True)
+    # Persisted for the sharded layouts only, as by the download command
+    name_index = NameIndex(
+        target_directory,
+        persist=manifests[0].header.get("layout", "flat") != "flat",
+    )
+
+    # Resolve all target paths first, in listing order across shards
+    placements: list[tuple[Path, ManifestEntry, Path]] = []
+    targets: dict[tuple[str, int], Path] = {}
+    renamed = 0
+    ordered = sorted(
+        (
+            (entry.position, manifest.shard.number, entry, manifest.path.parent)
+            for manifest in manifests
+            for entry in manifest.entries
+        ),
+        key=lambda item: item[:2],
+    )
+    for _, _, entry, shard_directory in ordered:
+        key = (entry.icon.id, entry.size)
+        if key in targets:
+            logger.warning("Icon %s (%s) is listed by more than one shard", entry.icon.id, entry.size)
+            continue
+        wanted_path = target_directory / entry.path
+        file_path = name_index.claim(wanted_path, entry.icon.id)
+        if file_path != wanted_path:
+            renamed += 1
+            logger.info("Renamed %s to %s to avoid a name conflict", entry.path, file_path.name)
+        targets[key] = file_path
+        placements.append((shard_directory, entry, file_path))
+    name_index.flush()
+
+    shard_directories = list(dict.fromkeys(manifest.path.parent for manifest in manifests))
+    journal_entries = {
+        directory: load_journal_entries(directory / JOURNAL_FILENAME)
+        for directory in shard_directories
+    }
+
+    merged = missing = 0
+    link_mode = LINK_MODES[0]
+    with ResumeJournal(target_directory) as journal:
+        for shard_directory, entry, file_path in placements:
+            source_path = shard_directory / entry.path
+            if not source_path.is_file():
+                missing += 1
+                continue
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            if move:
+                os.replace(source_path, file_path)
+            elif source_path.resolve() != file_path.resolve():
+                link_mode = link_file(source_path, file_path, link_mode)
+            merged += 1
+            journal_entry = journal_entries[shard_directory].get((entry.icon.id, entry.size))
+            if journal_entry is not None:
+                journal.record(entry.icon.id, entry.size, file_path, journal_entry.get("validators"))
+
+    failed = _merge_dead_letters(shard_directories, targets, target_directory)
+
+    header = {
+        "shard": None,
+        "shards": manifests[0].shard.total,
+        "merged": [manifest.shard.number for manifest in manifests],
+        **{option: manifests[0].header.get(option) for option in ("styles", "sizes", "layout", "icons")},
+        "files": len(placements),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    lines = [json.dumps(header, separators=(",", ":")) + "\n"]
+    for _, entry, file_path in placements:
+        record = {
+            "id": entry.icon.id,
+            "name": entry.icon.name,
+            "size": entry.size,
+            "path": file_path.relative_to(target_directory).as_posix(),
+            "position": entry.position,
+        }
+        lines.append(json.dumps(record, separators=(",", ":")) + "\n")
+    _write_lines(target_directory / MANIFEST_FILENAME, lines)
+
+    logger.info(
+        "Merged %d files of shards %s into %s (%d missing, %d renamed)",
+        merged,
+        ", ".join(str(manifest.shard) for manifest in manifests),
+        target_directory,
+        missing,
+        renamed,
+    )
+    return MergeResult(
+        shard_count=manifests[0].shard.total,
+        shards=[manifest.shard.number for manifest in manifests],
+        merged=merged,
+        missing=missing,
+        renamed=renamed,
+        failed=failed,
+        consistent=len({manifest.header.get("listing") for manifest in manifests}) == 1,
+    )
+
+
+def _merge_dead_letters(
+    shard_directories: Iterable[Path],
+    targets: dict[tuple[str, int], Path],
+    target_directory: Path,
+) -> int:
+    """
+    Combine the dead-letter files of shards, pointing at the merged paths.
+
+    Args:
+        shard_directories: Target directories of the shard runs
+        targets: Merged file path per (icon id, size)
+        target_directory: Directory merged into
+
+    Returns:
+        Number of failed downloads in the merged dead-letter file
+    """
+    dead_letter = DeadLetterFile(target_directory / DEAD_LETTER_FILENAME)
+    try:
+        for directory in shard_directories:
+            path = directory / DEAD_LETTER_FILENAME
+            if not path.exists():
+                continue
+            for failed in load_failed_downloads(path):
+                file_path = targets.get((failed.icon.id, failed.size))
+                if file_path is None:
+                    try:
+                        file_path = target_directory / failed.file_path.relative_to(directory)
+                    except ValueError:
+                        file_path = failed.file_path
+                dead_letter.record(
+                    failed.icon,
+                    failed.size,
+                    file_path,
+                    failed.error_class,
+                    failed.error,
+                    failed.attempts,
+                )
+        dead_letter.commit()
+    finally:
+        dead_letter.close()
+    return dead_letter.count
@@ -0,0 +1,754 @@
+"""Writers for downloaded files, the content-addressed store and archives."""
+
+import errno
+import hashlib
+import io
+import logging
+import os
+import queue
+import re
+import shutil
+import tarfile
+import threading
+import time
+import uuid
+import zipfile
+from pathlib import Path
+from typing import Optional
+
+from icons8_download_cli.defaults import DEFAULT_FSYNC_BATCH, STORE_DIRNAME
+
+logger = logging.getLogger(__name__)
+
+LINK_MODES = ("hardlink", "reflink", "copy")
+
+# ioctl request cloning a whole file (Linux, e.g. Btrfs and XFS)
+_FICLONE = 0x40049409
+
+# Archive suffixes and the tarfile write mode they map to (None for zip)
+ARCHIVE_FORMATS = {
+    ".zip": None,
+    ".tar": "w",
+    ".tar.gz": "w:gz",
+    ".tgz": "w:gz",
+    ".tar.bz2": "w:bz2",
+    ".tar.xz": "w:xz",
+    ".tar.zst": "w:zst",
+    ".tzst": "w:zst",
+}
+# Number of finished entries that may wait for the archive writer thread
+ARCHIVE_QUEUE_SIZE = 256
+
+FSYNC_MODES = ("always", "batch", "off")
+
+# Temporary files are named ".<name>.<uuid>.tmp" next to the file they
+# replace; ones older than this many seconds when a run opens their directory
+# were left behind by an interrupted run and are removed
+_TEMP_NAME = re.compile(r"^\..+\.[0-9a-f]{32}\.tmp$")
+STALE_TEMP_AGE = 60.0
+
+# Write buffer of a downloaded file: its expected size within these bounds, so
+# most icons are written with a single write() call
+MIN_WRITE_BUFFER = 64 * 1024
+MAX_WRITE_BUFFER = 1024 * 1024
+DEFAULT_WRITE_BUFFER = 256 * 1024
+
+
+class SyncPolicy:
+    """
+    When downloaded files are flushed to stable storage.
+
+    "always" fsyncs every file before it is renamed into place and its
+    directory after; "batch" fsyncs files and their directories in groups
+    once they have been renamed, so a power loss can lose at most the last
+    unsynced batch; "off" leaves flushing to the operating system.
+
+    In every mode a crash can leave hidden ".<name>.<uuid>.tmp" files behind
+    (and files in the content store's tmp directory). They are removed by
+    the next run that opens their directory (see remove_stale_temp_files).
+    """
+
+    def __init__(self, mode: str = "off", batch_size: int = DEFAULT_FSYNC_BATCH) -> None:
+        """
+        Create a policy.
+
+        Args:
+            mode: "always", "batch" or "off"
+            batch_size: Files per fsync batch in "batch" mode
+        """
+        self.mode = mode
+        self.batch_size = max(1, batch_size)
+        self.files_synced = 0
+        self._pending: list[Path] = []
+        self._lock = threading.Lock()
+
+    def before_rename(self, file: io.BufferedWriter) -> None:
+        """
+        Sync a flushed temporary file in "always" mode.
+
+        Args:
+            file: Open temporary file
+
+        Raises:
+            OSError: If the file cannot be synced
+        """
+        if self.mode == "always":
+            os.fsync(file.fileno())
+
+    def after_rename(self, file_path: Path) -> None:
+        """
+        Sync the directory of a renamed file, or add the file to the batch.
+
+        Args:
+            file_path: Final file path
+        """
+        if self.mode == "always":
+            _fsync_directory(file_path.parent)
+            with self._lock:
+                self.files_synced += 1
+        elif self.mode == "batch":
+            with self._lock:
+                self._pending.append(file_path)
+                if len(self._pending) < self.batch_size:
+                    return
+                batch, self._pending = self._pending, []
+            self._sync_files(batch)
+
+    def flush(self) -> None:
+        """Sync the files of an incomplete batch."""
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if batch:
+            self._sync_files(batch)
+
+    def _sync_files(self, paths: list[Path]) -> None:
+        """Fsync files, then each of their directories once."""
+        for path in paths:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            except OSError as e:
+                logger.warning("Cannot fsync %s: %s", path, e)
+        for directory in {path.parent for path in paths}:
+            _fsync_directory(directory)
+        with self._lock:
+            self.files_synced += len(paths)
+        logger.debug("Synced %d files", len(paths))
+
+
+sync_policy = SyncPolicy()
+
+
+def configure_fsync(mode: str = "off", batch_size: int = DEFAULT_FSYNC_BATCH) -> None:
+    """
+    Configure when downloaded files are flushed to stable storage.
+
+    Args:
+        mode: "always", "batch" or "off" (see SyncPolicy)
+        batch_size: Files per fsync batch in "batch" mode
+
+    Raises:
+        ValueError: If the mode is unknown
+    """
+    if mode not in FSYNC_MODES:
+        raise ValueError(f"Unknown fsync mode {mode!r}, expected one of: {', '.join(FSYNC_MODES)}")
+    sync_policy.flush()
+    sync_policy.mode = mode
+    sync_policy.batch_size = max(1, batch_size)
+
+
+def get_temp_path(file_path: Path) -> Path:
+    """
+    Get a unique hidden temporary path next to a file.
+
+    Args:
+        file_path: File the temporary file will replace
+
+    Returns:
+        Path named ".<name>.<uuid>.tmp" in the same directory
+    """
+    return file_path.with_name(f".{file_path.name}.{uuid.uuid4().hex}.tmp")
+
+
+def is_temp_name(name: str) -> bool:
+    """Check whether a file name is one given by get_temp_path()."""
+    return name.startswith(".") and _TEMP_NAME.match(name) is not None
+
+
+def remove_stale_temp_file(entry: os.DirEntry, before: float) -> bool:
+    """
+    Remove a temporary file if it was last modified before a given time.
+
+    Args:
+        entry: Directory entry of the temporary file
+        before: Time (as time.time()) the file must be older than; newer
+            files may still be written by a running download
+
+    Returns:
+        True if the file was removed
+    """
+    try:
+        if not entry.is_file(follow_symlinks=False) or entry.stat().st_mtime >= before:
+            return False
+        os.unlink(entry.path)
+    except FileNotFoundError:
+        return False
+    except OSError as e:
+        logger.warning("Cannot remove stale temporary file %s: %s", entry.path, e)
+        return False
+    return True
+
+
+def remove_stale_temp_files(directory: Path, before: float, every_file: bool = False) -> int:
+    """
+    Remove temporary files an interrupted run left in a directory.
+
+    Args:
+        directory: Directory to clean, not recursively
+        before: Time (as time.time()) files must be older than
+        every_file: Treat every file as temporary, not only hidden
+            ".<name>.<uuid>.tmp" ones (e.g. the content store's tmp directory)
+
+    Returns:
+        Number of files removed
+    """
+    removed = 0
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if (every_file or is_temp_name(entry.name)) and remove_stale_temp_file(entry, before):
+                    removed += 1
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning("Cannot clean temporary files in %s: %s", directory, e)
+    if removed:
+        logger.info("Removed %d stale temporary files from %s", removed, directory)
+    return removed
+
+
+def get_write_buffer_size(expected_size: Optional[int]) -> int:
+    """
+    Pick the write buffer size of a download.
+
+    Args:
+        expected_size: Announced body size, if known
+
+    Returns:
+        Buffer size in bytes
+    """
+    if expected_size is None:
+        return DEFAULT_WRITE_BUFFER
+    return min(max(expected_size, MIN_WRITE_BUFFER), MAX_WRITE_BUFFER)
+
+
+class FileWriter:
+    """
+    Writes a download to a temporary file renamed over its destination.
+
+    The temporary file lives next to the destination, so the rename is
+    atomic: readers see either the previous file or the complete new one,
+    never a partial download.
+    """
+
+    def __init__(self, file_path: Path, expected_size: Optional[int] = None) -> None:
+        """
+        Open a temporary file for writing.
+
+        Args:
+            file_path: Destination file path
+            expected_size: Announced body size, used to size the write buffer
+        """
+        self.file_path = file_path
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Replacing the destination by rename never writes through a
+        # hardlink shared with the store
+        self._temp_path = get_temp_path(file_path)
+        self._file = self._temp_path.open("wb", buffering=get_write_buffer_size(expected_size))
+
+    def write(self, chunk: bytes) -> None:
+        """Write a chunk of the response body."""
+        self._file.write(chunk)
+
+    def commit(self) -> None:
+        """
+        Move the finished file into place.
+
+        Raises:
+            OSError: If the file cannot be written or renamed
+        """
+        try:
+            try:
+                self._file.flush()
+                sync_policy.before_rename(self._file)
+            finally:
+                self._file.close()
+            os.replace(self._temp_path, self.file_path)
+        except BaseException:
+            self._temp_path.unlink(missing_ok=True)
+            raise
+        sync_policy.after_rename(self.file_path)
+
+    def abort(self) -> None:
+        """Discard the temporary file after a failed download."""
+        self._file.close()
+        self._temp_path.unlink(missing_ok=True)
+
+
+class BlobWriter:
+    """Writes a download into the content store, hashing it on the way."""
+
+    def __init__(
+        self,
+        store: "ContentStore",
+        file_path: Path,
+        expected_size: Optional[int] = None,
+    ) -> None:
+        """
+        Open a temporary blob for writing.
+
+        Args:
+            store: Content store the blob is added to
+            file_path: Destination file path linked to the blob on commit
+            expected_size: Announced body size, used to size the write buffer
+        """
+        self.store = store
+        self.file_path = file_path
+        self._hash = hashlib.sha256()
+        self._size = 0
+        self._temp_path = store.temp_directory / uuid.uuid4().hex
+        self._file = self._temp_path.open("wb", buffering=get_write_buffer_size(expected_size))
+
+    def write(self, chunk: bytes) -> None:
+        """Write a chunk of the response body."""
+        self._hash.update(chunk)
+        self._size += len(chunk)
+        self._file.write(chunk)
+
+    def commit(self) -> None:
+        """
+        Add the blob to the store and link the destination file to it.
+
+        Raises:
+            OSError: If the blob cannot be written, moved or linked; the
+                temporary blob is removed
+        """
+        try:
+            try:
+                self._file.flush()
+                sync_policy.before_rename(self._file)
+            finally:
+                self._file.close()
+            self.store.add(self._temp_path, self._hash.hexdigest(), self._size, self.file_path)
+        except BaseException:
+            # Already gone if the blob was moved into the store before linking failed
+            self._temp_path.unlink(missing_ok=True)
+            raise
+        sync_policy.after_rename(self.file_path)
+
+    def abort(self) -> None:
+        """Discard the temporary blob after a failed download."""
+        self._file.close()
+        self._temp_path.unlink(missing_ok=True)
+
+
+class ContentStore:
+    """
+    Content-addressed store keeping one blob per distinct file content.
+
+    Blobs are named by the SHA-256 digest of their bytes. User-facing files
+    are hardlinks to their blob, so byte-identical icons (across styles,
+    sizes or runs) take the disk space and inode of a single file. Where
+    hardlinks are not possible (e.g. the store is on another filesystem)
+    files are reflinked, or copied as a last resort.
+    """
+
+    def __init__(self, root: Path) -> None:
+        """
+        Open (or create) a store.
+
+        Args:
+            root: Store directory
+        """
+        self.root = root
+        self.temp_directory = root / "tmp"
+        self.temp_directory.mkdir(parents=True, exist_ok=True)
+        remove_stale_temp_files(self.temp_directory, time.time() - STALE_TEMP_AGE, every_file=True)
+        self.link_mode = LINK_MODES[0]
+
+        self.blobs_added = 0
+        self.duplicates = 0
+        self.bytes_deduplicated = 0
+        self._lock = threading.Lock()
+
+    def open(self, file_path: Path, expected_size: Optional[int] = None) -> BlobWriter:
+        """
+        Start writing a download through the store.
+
+        Args:
+            file_path: Destination file path
+            expected_size: Announced body size, used to size the write buffer
+
+        Returns:
+            Writer for the response body
+        """
+        return BlobWriter(self, file_path, expected_size)
+
+    def get_blob_path(self, digest: str) -> Path:
+        """
+        Get the path of a blob.
+
+        Args:
+            digest: SHA-256 hex digest of the content
+
+        Returns:
+            Blob path, sharded by the first two digest characters
+        """
+        return self.root / digest[:2] / f"{digest}.png"
+
+    def add(self, temp_path: Path, digest: str, size: int, file_path: Path) -> None:
+        """
+        Move a written temporary file into the store and link it.
+
+        Args:
+            temp_path: Temporary file inside temp_directory
+            digest: SHA-256 hex digest of its content
+            size: Content size in bytes
+            file_path: Destination file path to link to the blob
+        """
+        blob_path = self.get_blob_path(digest)
+
+        with self._lock:
+            if blob_path.exists():
+                temp_path.unlink()
+                self.duplicates += 1
+                self.bytes_deduplicated += size
+            else:
+                blob_path.parent.mkdir(exist_ok=True)
+                os.replace(temp_path, blob_path)
+                self.blobs_added += 1
+
+        self._link(blob_path, file_path)
+
+    def _link(self, blob_path: Path, file_path: Path) -> None:
+        """Atomically point file_path at a blob, falling back as needed."""
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+
+        try:
+            if file_path.stat().st_ino == blob_path.stat().st_ino:
+                return
+        except OSError:
+            pass
+
+        self.link_mode = link_file(blob_path, file_path, self.link_mode)
+
+
+class ArchiveEntryWriter:
+    """Buffers a download in memory until it is handed to the archive."""
+
+    def __init__(self, archive: "ArchiveStore", entry_name: str) -> None:
+        """
+        Start an archive entry.
+
+        Args:
+            archive: Archive the entry is added to
+            entry_name: Name of the entry inside the archive
+        """
+        self.archive = archive
+        self.entry_name = entry_name
+        self._buffer = io.BytesIO()
+
+    def write(self, chunk: bytes) -> None:
+        """Write a chunk of the response body."""
+        self._buffer.write(chunk)
+
+    def commit(self) -> None:
+        """Queue the finished entry for the archive writer."""
+        self.archive.add(self.entry_name, self._buffer.getvalue())
+
+    def abort(self) -> None:
+        """Drop the entry after a failed download."""
+        self._buffer = io.BytesIO()
+
+
+class ArchiveStore:
+    """
+    Zip or tar archive that downloads are written into instead of files.
+
+    Download workers hand finished entries to a bounded queue and a single
+    writer thread appends them to the archive, so workers never contend on
+    the archive and a slow disk or compressor slows the workers down instead
+    of buffering without limit. Entry names are the file paths relative to
+    the base directory. The archive is written under a temporary name and
+    only replaces the target path when committed.
+    """
+
+    def __init__(self, path: Path, base_directory: Path) -> None:
+        """
+        Create the archive and start its writer thread.
+
+        Args:
+            path: Archive path; its suffix selects the format (see
+                ARCHIVE_FORMATS)
+            base_directory: Directory entry names are relative to
+
+        Raises:
+            ValueError: If the suffix is not a supported archive format
+            tarfile.CompressionError: If the compression is not available
+        """
+        self.path = path
+        self.base_directory = base_directory
+        self.entries = 0
+        self.bytes_written = 0
+
+        tar_mode = get_archive_mode(path)
+        self._temp_path = get_temp_path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        remove_stale_temp_files(path.parent, time.time() - STALE_TEMP_AGE)
+        if tar_mode is None:
+            self._archive = zipfile.ZipFile(self._temp_path, "w", zipfile.ZIP_STORED)
+        else:
+            self._archive = tarfile.open(self._temp_path, tar_mode)
+
+        self._queue: queue.Queue = queue.Queue(maxsize=ARCHIVE_QUEUE_SIZE)
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._write_entries,
+            name="icons8-archive",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def open(self, file_path: Path, expected_size: Optional[int] = None) -> ArchiveEntryWriter:
+        """
+        Start writing a download into the archive.
+
+        Args:
+            file_path: File path the icon would have been saved to
+            expected_size: Announced body size (unused, entries are buffered
+                in memory)
+
+        Returns:
+            Writer for the response body
+        """
+        try:
+            entry_name = file_path.relative_to(self.base_directory).as_posix()
+        except ValueError:
+            entry_name = file_path.name
+        return ArchiveEntryWriter(self, entry_name)
+
+    def add(self, entry_name: str, data: bytes) -> None:
+        """
+        Queue an entry, waiting while the queue is full.
+
+        Args:
+            entry_name: Name of the entry inside the archive
+            data: Entry content
+
+        Raises:
+            OSError: If the writer thread failed
+        """
+        if self._error is not None:
+            raise OSError(f"Writing {self.path} failed: {self._error}")
+        self._queue.put((entry_name, data))
+
+    def _write_entries(self) -> None:
+        """Writer thread: append queued entries until the None sentinel."""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._error is not None:
+                continue
+
+            entry_name, data = item
+            try:
+                self._write_entry(entry_name, data)
+            except Exception as e:
+                logger.error("Failed to write %s to %s: %s", entry_name, self.path, e)
+                self._error = e
+                continue
+            self.entries += 1
+            self.bytes_written += len(data)
+
+    def _write_entry(self, entry_name: str, data: bytes) -> None:
+        """Append one entry to the archive."""
+        if isinstance(self._archive, zipfile.ZipFile):
+            info = zipfile.ZipInfo(entry_name, date_time=time.localtime()[:6])
+            info.external_attr = 0o644 << 16
+            self._archive.writestr(info, data)
+        else:
+            info = tarfile.TarInfo(entry_name)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            info.mode = 0o644
+            self._archive.addfile(info, io.BytesIO(data))
+
+    def _finish(self) -> None:
+        """Drain the queue, stop the writer thread and close the archive."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        self._archive.close()
+
+    def commit(self) -> None:
+        """
+        Finish the archive and move it to its final path.
+
+        Raises:
+            OSError: If writing the archive failed
+        """
+        self._finish()
+        if self._error is not None:
+            self._temp_path.unlink(missing_ok=True)
+            raise OSError(f"Writing {self.path} failed: {self._error}")
+        if self._temp_path.exists():
+            if sync_policy.mode != "off":
+                with self._temp_path.open("rb") as f:
+                    os.fsync(f.fileno())
+            os.replace(self._temp_path, self.path)
+            if sync_policy.mode != "off":
+                _fsync_directory(self.path.parent)
+            logger.info("Wrote %d entries to %s", self.entries, self.path)
+
+    def close(self) -> None:
+        """Discard an uncommitted archive, keeping any previous one."""
+        self._finish()
+        self._temp_path.unlink(missing_ok=True)
+
+
+def get_archive_mode(path: Path) -> Optional[str]:
+    """
+    Get the archive format of a path from its suffix.
+
+    Args:
+        path: Archive path
+
+    Returns:
+        tarfile write mode, or None for a zip archive
+
+    Raises:
+        ValueError: If the suffix is not a supported archive format
+    """
+    name = path.name.lower()
+    for suffix, tar_mode in ARCHIVE_FORMATS.items():
+        if name.endswith(suffix):
+            return tar_mode
+    raise ValueError(
+        f"Unsupported archive format: {path.name} "
+        f"(use one of {', '.join(ARCHIVE_FORMATS)})"
+    )
+
+
+def _hardlink(source: Path, target: Path) -> None:
+    """Create a hardlink."""
+    os.link(source, target)
+
+
+def _reflink(source: Path, target: Path) -> None:
+    """Create a copy-on-write clone of a file (Linux only)."""
+    try:
+        import fcntl
+    except ImportError as e:
+        raise OSError(errno.EOPNOTSUPP, "reflinks are not supported") from e
+
+    with source.open("rb") as src, target.open("wb") as dst:
+        fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+
+
+def _copy(source: Path, target: Path) -> None:
+    """Copy a file."""
+    shutil.copyfile(source, target)
+
+
+_LINKERS = {"hardlink": _hardlink, "reflink": _reflink, "copy": _copy}
+
+
+def link_file(source: Path, target: Path, link_mode: str = LINK_MODES[0]) -> str:
+    """
+    Atomically point target at the content of source, falling back as needed.
+
+    Tries link_mode first, then each slower mode after it in LINK_MODES
+    (hardlink, reflink, copy).
+
+    Args:
+        source: Existing file
+        target: File path to create or replace
+        link_mode: First link mode to try
+
+    Returns:
+        Link mode that worked, to start from next time
+
+    Raises:
+        OSError: If the file cannot even be copied
+    """
+    # Link under a temporary name, then swap it in with one rename
+    link_path = get_temp_path(target)
+    try:
+        for mode in LINK_MODES[LINK_MODES.index(link_mode):-1]:
+            try:
+                _LINKERS[mode](source, link_path)
+                break
+            except OSError as e:
+                link_path.unlink(missing_ok=True)
+                logger.info(
+                    "Cannot %s %s (%s), falling back",
+                    mode,
+                    target,
+                    errno.errorcode.get(e.errno, e),
+                )
+        else:
+            mode = "copy"
+            _copy(source, link_path)
+        os.replace(link_path, target)
+        return mode
+    finally:
+        link_path.unlink(missing_ok=True)
+
+
+def _fsync_directory(directory: Path) -> None:
+    """Fsync a directory so renames in it survive a crash (POSIX only)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        # Directories cannot be opened on Windows, where renames need no sync
+        return
+    try:
+        os.fsync(fd)
+    except OSError as e:
+        logger.warning("Cannot fsync directory %s: %s", directory, e)
+    finally:
+        os.close(fd)
+
+
+# Destinations downloads can be written through instead of plain files
+FileStore = ContentStore | ArchiveStore
+Writer = FileWriter | BlobWriter | ArchiveEntryWriter
+
+
+def open_writer(
+    file_path: Path,
+    store: Optional[FileStore] = None,
+    expected_size: Optional[int] = None,
+) -> Writer:
+    """
+    Open a writer for a downloaded file.
+
+    Args:
+        file_path: Destination file path
+        store: Optional content store or archive to write through
+        expected_size: Announced body size, used to size the write buffer
+
+    Returns:
+        Writer with write(), commit() and abort()
+    """
+    if store is not None:
+        return store.open(file_path, expected_size)
+    return FileWriter(file_path, expected_size)
@@ -0,0 +1,43 @@
+"""Known icon styles bundled from data/styles.json."""
+
+from importlib import resources
+from pathlib import Path
+
+from icons8_download_cli.models import Style, StylesFile
+
+STYLES_FILENAME = "styles.json"
+
+
+def load_styles() -> list[Style]:
+    """
+    Load all known icon styles.
+
+    Reads styles.json bundled with the installed package, falling back to
+    data/styles.json in the repository (development mode).
+
+    Returns:
+        List of styles in file order
+
+    Raises:
+        RuntimeError: If styles.json cannot be found
+    """
+    bundled = resources.files("icons8_download_cli") / STYLES_FILENAME
+    if bundled.is_file():
+        return StylesFile.model_validate_json(bundled.read_bytes()).styles
+
+    # Fallback: read from the repository (development mode)
+    repository_path = Path(__file__).parent.parent.parent / "data" / STYLES_FILENAME
+    if repository_path.exists():
+        return StylesFile.model_validate_json(repository_path.read_bytes()).styles
+
+    raise RuntimeError("Unable to find styles.json")
+
+
+def get_style_labels() -> dict[str, str]:
+    """
+    Get human-readable labels of all known styles.
+
+    Returns:
+        Mapping of style id to label
+    """
+    return {style.id: style.label for style in load_styles()}
@@ -0,0 +1,61 @@
+"""Shared fixtures: an isolated response cache and a stand-in Icons8 server."""
+
+import tempfile
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner, Result
+from server import ServerConfig, StandInServer
+
+from icons8_download_cli import api, cache, downloader
+from icons8_download_cli.cli import cli
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(
+    tmp_path_factory: pytest.TempPathFactory,
+    monkeypatch: pytest.MonkeyPatch,
+) -> Iterator[Path]:
+    """Give every test an empty response cache with the default settings."""
+    temp_dir = tmp_path_factory.mktemp("tmp")
+    monkeypatch.setattr(tempfile, "tempdir", str(temp_dir))
+    cache.configure_cache()
+    monkeypatch.setattr(cache, "_backend", None)
+    for counter in ("hits", "misses", "expired", "revalidated"):
+        monkeypatch.setattr(cache.stats, counter, 0)
+
+    yield temp_dir / "icons8"
+
+    cache.close_cache()
+    cache.configure_cache()
+
+
+@pytest.fixture
+def server_config() -> ServerConfig:
+    """Catalog of the stand-in server; override in a module to change it."""
+    return ServerConfig(icons=250)
+
+
+@pytest.fixture
+def server(
+    server_config: ServerConfig,
+    monkeypatch: pytest.MonkeyPatch,
+) -> Iterator[StandInServer]:
+    """Serve the listing API and image host locally and point the CLI at them."""
+    with StandInServer(server_config) as stand_in:
+        monkeypatch.setattr(api, "API_BASE_URL", stand_in.api_url)
+        monkeypatch.setattr(downloader, "DOWNLOAD_BASE_URL", stand_in.download_url)
+        yield stand_in
+
+
+@pytest.fixture
+def run_cli(server: StandInServer) -> Callable[..., Result]:
+    """Run a CLI command in-process against the stand-in server."""
+
+    def run(*args: str, exit_code: int = 0) -> Result:
+        result = CliRunner().invoke(cli, args, env={"ICONS8_PROGRESS": "none"})
+        assert result.exit_code == exit_code, result.output
+        return result
+
+    return run
@@ -0,0 +1,77 @@
+"""Tests of listing pagination against the stand-in server."""
+
+import pytest
+from server import ServerConfig, StandInServer
+
+from icons8_download_cli import cache
+from icons8_download_cli.api import (
+    fetch_all_icons,
+    fetch_icons_by_style,
+    iter_icon_pages,
+)
+
+
+@pytest.mark.parametrize(
+    ("icons", "requests"),
+    [
+        (250, 3),  # the short third page ends the listing
+        (200, 3),  # two full pages, then an empty one
+        (0, 1),
+    ],
+)
+def test_serial_walk_stops_at_the_last_page(
+    server_config: ServerConfig,
+    server: StandInServer,
+    icons: int,
+    requests: int,
+) -> None:
+    server_config.icons = icons
+
+    pages = list(iter_icon_pages("ios", use_cache=False, page_size=100))
+
+    assert sum(len(page) for page in pages) == icons
+    assert all(page for page in pages)
+    assert server.requests == requests
+
+
+@pytest.mark.parametrize("concurrency", [2, 4, 8])
+def test_concurrent_walk_matches_the_serial_walk(server: StandInServer, concurrency: int) -> None:
+    serial = fetch_all_icons("ios", use_cache=False, page_size=50)
+    serial_requests = server.requests
+
+    concurrent = fetch_all_icons("ios", use_cache=False, page_size=50, concurrency=concurrency)
+
+    assert concurrent == serial
+    assert len(concurrent) == 250
+    # At most concurrency - 1 requests go past the end of the listing
+    assert serial_requests <= server.requests - serial_requests <= serial_requests + concurrency - 1
+
+
+def test_empty_pages_past_the_end_are_not_cached(server: StandInServer) -> None:
+    icons = fetch_all_icons("ios", page_size=50, concurrency=8)
+
+    assert len(icons) == 250
+    # Five full pages and the empty sixth are fetched, and up to six more
+    # past the end; only the five non-empty pages are kept
+    assert len(cache.get_backend().entries()) == 5
+
+
+def test_cached_pages_are_not_requested_again(server: StandInServer) -> None:
+    first = fetch_all_icons("ios", page_size=100)
+    requests = server.requests
+
+    assert fetch_all_icons("ios", page_size=100) == first
+    assert server.requests == requests
+
+
+def test_styles_are_listed_separately(server: StandInServer) -> None:
+    icons_by_style = fetch_icons_by_style(
+        ["ios", "color"],
+        use_cache=False,
+        page_size=100,
+        style_concurrency=2,
+    )
+
+    assert list(icons_by_style) == ["ios", "color"]
+    assert [icon.id for icon in icons_by_style["color"][:2]] == ["color-0", "color-1"]
+    assert all(len(icons) == 250 for icons in icons_by_style.values())
@@ -0,0 +1,179 @@
+"""Tests of the response cache: expiration, LRU eviction, revalidation and backends."""
+
+import json
+import os
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Any
+
+import pytest
+import requests
+
+from icons8_download_cli import cache
+from icons8_download_cli.api import fetch_page
+from icons8_download_cli.models import IconRecord
+
+URL = "https://api.example.com/icons?offset={}"
+PAGE = {"success": True, "icons": [{"id": "home-id", "name": "home"}]}
+
+
+@pytest.fixture(params=cache.CACHE_BACKENDS)
+def backend(request: pytest.FixtureRequest) -> str:
+    """Run a test with each cache backend."""
+    cache.configure_cache(backend=request.param)
+    return request.param
+
+
+def _backdate(url: str, seconds: float) -> None:
+    """Make a cached response look written and last read seconds ago."""
+    _backdate_entry(cache.generate_cache_key(url), seconds)
+
+
+def _backdate_entry(key: str, seconds: float) -> None:
+    """Make a cache entry look written and last read seconds ago."""
+    when = time.time() - seconds
+    backend = cache.get_backend()
+    if isinstance(backend, cache.SqliteCacheBackend):
+        with backend._connection() as connection, connection:
+            connection.execute(
+                "UPDATE responses SET created_at = ?, accessed_at = ? WHERE key = ?",
+                (when, when, key),
+            )
+    else:
+        os.utime(backend._path(key), (when, when))
+
+
+def test_fresh_entries_are_hits(backend: str) -> None:
+    cache.write_cache(URL.format(0), {"success": True, "icons": []})
+
+    assert cache.read_cache(URL.format(0)) == {"success": True, "icons": []}
+    assert cache.read_cache(URL.format(100)) is None
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+def test_entries_expire_after_the_ttl(backend: str) -> None:
+    cache.configure_cache(ttl_seconds=60, backend=backend)
+    cache.write_cache(URL.format(0), {"page": 0})
+    cache.write_cache(URL.format(100), {"page": 1})
+    _backdate(URL.format(0), 120)
+
+    assert cache.read_cache(URL.format(0)) is None
+    assert cache.read_cache(URL.format(100)) == {"page": 1}
+    assert cache.stats.expired == 1
+    assert cache.get_cache_info().expired_entries == 1
+
+    assert cache.prune_cache() == (1, 0)
+    assert cache.get_cache_info().entries == 1
+
+
+def test_entries_without_ttl_never_expire(backend: str) -> None:
+    cache.configure_cache(ttl_seconds=None, backend=backend)
+    cache.write_cache(URL.format(0), {"page": 0})
+    _backdate(URL.format(0), 365 * 24 * 3600)
+
+    assert cache.read_cache(URL.format(0)) == {"page": 0}
+    assert cache.prune_cache() == (0, 0)
+
+
+def test_prune_evicts_least_recently_used_entries(backend: str) -> None:
+    urls = [URL.format(offset) for offset in (0, 100, 200)]
+    for age, url in zip((30, 20, 10), urls, strict=True):
+        cache.write_cache(url, {"url": url})
+        _backdate(url, age)
+    # Reading the oldest entry makes the second one the least recently used
+    assert cache.read_cache(urls[0]) is not None
+
+    sizes = {entry.key: entry.size for entry in cache.get_backend().entries()}
+    second_key = cache.generate_cache_key(urls[1])
+    cache.configure_cache(max_size_bytes=sum(sizes.values()) - sizes[second_key], backend=backend)
+
+    assert cache.prune_cache() == (0, 1)
+    assert cache.read_cache(urls[1]) is None
+    assert cache.read_cache(urls[0]) is not None
+    assert cache.read_cache(urls[2]) is not None
+
+
+def test_configure_cache_rejects_unknown_backends() -> None:
+    with pytest.raises(ValueError):
+        cache.configure_cache(backend="redis")
+
+
+def test_sqlite_entries_are_stored_compressed(cache_dir: Path) -> None:
+    cache.configure_cache(backend="sqlite")
+    page = {"success": True, "icons": [{"id": str(i), "name": "icon"} for i in range(100)]}
+    cache.write_cache(URL.format(0), page)
+    cache.close_cache()
+
+    reopened = cache.SqliteCacheBackend(cache_dir / cache.SQLITE_FILENAME)
+    try:
+        (entry,) = reopened.entries()
+        assert entry.size < len(json.dumps(page, separators=(",", ":"))) / 4
+        assert reopened.load(entry.key) == (page, entry.created_at, {})
+    finally:
+        reopened.close()
+
+
+def test_sqlite_database_shrinks_when_pruned(cache_dir: Path) -> None:
+    cache.configure_cache(backend="sqlite")
+    # Random names, so pages do not compress away
+    for offset in range(50):
+        page = {"icons": [{"id": str(i), "name": os.urandom(16).hex()} for i in range(200)]}
+        cache.write_cache(URL.format(offset), page)
+    cache.close_cache()
+    database = cache_dir / cache.SQLITE_FILENAME
+    full_size = database.stat().st_size
+
+    cache.configure_cache(max_size_bytes=0, backend="sqlite")
+    assert cache.prune_cache() == (0, 50)
+    cache.close_cache()
+
+    assert database.stat().st_size < full_size / 4
+
+
+class _RecordingClient:
+    """HTTP client answering listing requests with canned responses."""
+
+    def __init__(self, *responses: requests.Response) -> None:
+        self.responses = list(responses)
+        self.headers: list[dict[str, str]] = []
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        self.headers.append(kwargs.get("headers") or {})
+        return self.responses.pop(0)
+
+
+def _response(
+    status_code: int,
+    body: bytes = b"",
+    headers: dict[str, str] | None = None,
+) -> requests.Response:
+    """Build a response as the HTTP client returns it."""
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = body
+    response.headers.update(headers or {})
+    response.elapsed = timedelta(milliseconds=5)
+    return response
+
+
+
+@pytest.mark.parametrize("revalidate", [False, True])
+def test_expired_listing_pages_are_revalidated(backend: str, revalidate: bool) -> None:
+    client = _RecordingClient(
+        _response(200, json.dumps(PAGE).encode(), {"ETag": '"v1"'}),
+        _response(304),
+    )
+    cache.configure_cache(ttl_seconds=60, backend=backend)
+    assert fetch_page(0, "ios", client=client).icons == [IconRecord("home-id", "home")]
+    if not revalidate:
+        (entry,) = cache.get_backend().entries()
+        _backdate_entry(entry.key, 120)
+
+    page = fetch_page(0, "ios", client=client, revalidate=revalidate)
+
+    assert page.icons == [IconRecord("home-id", "home")]
+    assert client.headers == [{}, {"If-None-Match": '"v1"'}]
+    assert cache.stats.revalidated == 1
+    # The 304 renewed the entry, so it is served without a request
+    assert fetch_page(0, "ios", client=client).icons == page.icons
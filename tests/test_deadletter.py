@@ -0,0 +1,112 @@
+"""Tests of the dead-letter file and of --retry-failed runs."""
+
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+from click.testing import Result
+from server import ServerConfig, StandInServer
+
+from icons8_download_cli.api import fetch_all_icons
+from icons8_download_cli.deadletter import (
+    DeadLetterFile,
+    FailedDownload,
+    load_failed_downloads,
+)
+from icons8_download_cli.defaults import DEAD_LETTER_FILENAME
+from icons8_download_cli.models import IconRecord
+from icons8_download_cli.retry import RETRY_BASE_DELAYS
+
+
+def test_failures_round_trip(tmp_path: Path) -> None:
+    path = tmp_path / DEAD_LETTER_FILENAME
+    with DeadLetterFile(path) as dead_letter:
+        dead_letter.record(IconRecord("a", "home"), 48, tmp_path / "home.png", "server", "503", 4)
+        dead_letter.record(IconRecord("b", "user"), 96, tmp_path / "96" / "user.png", "timeout", "", 1)
+        assert not path.exists()
+        dead_letter.commit()
+
+    assert load_failed_downloads(path) == [
+        FailedDownload(IconRecord("a", "home"), 48, tmp_path / "home.png", "server", "503", 4),
+        FailedDownload(IconRecord("b", "user"), 96, tmp_path / "96" / "user.png", "timeout", "", 1),
+    ]
+    assert '"path":"96/user.png"' in path.read_text()
+
+
+def test_unreadable_lines_are_skipped(tmp_path: Path) -> None:
+    path = tmp_path / DEAD_LETTER_FILENAME
+    path.write_text(
+        '{"id":"a","name":"home","size":48,"path":"home.png"}\n'
+        '{"id":1,"name":"bad id","size":48,"path":"x.png"}\n'
+        '{"id":"c","name":"torn","si\n'
+    )
+
+    (failed,) = load_failed_downloads(path)
+
+    assert failed == FailedDownload(IconRecord("a", "home"), 48, tmp_path / "home.png", "other", "", 1)
+
+
+def test_interrupted_run_keeps_the_previous_file(tmp_path: Path) -> None:
+    path = tmp_path / DEAD_LETTER_FILENAME
+    path.write_text('{"id":"a","name":"home","size":48,"path":"home.png"}\n')
+
+    with DeadLetterFile(path) as dead_letter:
+        dead_letter.record(IconRecord("b", "user"), 48, tmp_path / "user.png", "server", "503", 4)
+
+    assert [failed.icon.id for failed in load_failed_downloads(path)] == ["a"]
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_run_without_failures_removes_the_file(tmp_path: Path) -> None:
+    path = tmp_path / DEAD_LETTER_FILENAME
+    path.write_text('{"id":"a","name":"home","size":48,"path":"home.png"}\n')
+
+    with DeadLetterFile(path) as dead_letter:
+        dead_letter.commit()
+
+    assert not path.exists()
+
+
+def test_retry_failed_downloads_what_failed(
+    run_cli: Callable[..., Result],
+    server_config: ServerConfig,
+    server: StandInServer,
+    tmp_path: Path,
+) -> None:
+    target = tmp_path / "icons"
+    # List before the server starts failing, so only downloads fail
+    fetch_all_icons("ios")
+    server_config.error_rate = 0.3
+    run_cli("download", "-d", str(target), "-S", "ios", "-s", "48", "-q", "--retries", "0")
+
+    failed = load_failed_downloads(target / DEAD_LETTER_FILENAME)
+    assert failed
+    assert len(list(target.glob("*.png"))) == 250 - len(failed)
+    assert all(failure.error_class == "server" for failure in failed)
+    assert not any(failure.file_path.exists() for failure in failed)
+
+    server_config.error_rate = 0.0
+    requests = server.requests
+    run_cli("download", "-d", str(target), "--retry-failed", str(target / DEAD_LETTER_FILENAME), "-q")
+
+    assert server.requests - requests == len(failed)
+    assert all(failure.file_path.is_file() for failure in failed)
+    assert len(list(target.glob("*.png"))) == 250
+    assert not (target / DEAD_LETTER_FILENAME).exists()
+
+
+def test_retries_recover_failed_requests(
+    run_cli: Callable[..., Result],
+    server_config: ServerConfig,
+    server: StandInServer,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setitem(RETRY_BASE_DELAYS, "server", 0.001)
+    server_config.error_rate = 0.2
+    target = tmp_path / "icons"
+
+    run_cli("download", "-d", str(target), "-S", "ios", "-s", "48", "-C", "-q", "--retries", "10")
+
+    assert len(list(target.glob("*.png"))) == 250
+    assert not (target / DEAD_LETTER_FILENAME).exists()
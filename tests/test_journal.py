@@ -0,0 +1,111 @@
+"""Tests of the resume journal and of reruns skipping completed downloads."""
+
+from collections.abc import Callable
+from pathlib import Path
+
+from click.testing import Result
+from server import StandInServer
+
+from icons8_download_cli.journal import (
+    JOURNAL_FILENAME,
+    ResumeJournal,
+    load_journal_entries,
+)
+
+
+def _file_versions(directory: Path) -> dict[Path, tuple[int, int]]:
+    """Inode and modification time of each icon, which change when it is rewritten."""
+    return {
+        path: (path.stat().st_ino, path.stat().st_mtime_ns)
+        for path in directory.glob("*.png")
+    }
+
+
+def test_recorded_downloads_are_complete_while_their_file_exists(tmp_path: Path) -> None:
+    icon_path = tmp_path / "ios" / "home.png"
+    icon_path.parent.mkdir()
+    icon_path.write_bytes(b"png")
+
+    with ResumeJournal(tmp_path) as journal:
+        journal.record("home-id", 48, icon_path, {"etag": '"v1"'})
+
+    with ResumeJournal(tmp_path) as journal:
+        assert journal.get_path("home-id", 48) == icon_path
+        assert journal.get_paths(48) == {"home-id": icon_path}
+        assert journal.is_complete("home-id", 48)
+        assert not journal.is_complete("home-id", 96)
+        assert journal.get_conditional_headers("home-id", 48, icon_path) == {"If-None-Match": '"v1"'}
+
+        icon_path.unlink()
+        assert not journal.is_complete("home-id", 48)
+        assert journal.get_conditional_headers("home-id", 48, icon_path) == {}
+
+    # Paths are stored relative to the target directory
+    assert load_journal_entries(tmp_path / JOURNAL_FILENAME)[("home-id", 48)]["path"] == "ios/home.png"
+
+
+def test_truncated_record_is_skipped_and_terminated(tmp_path: Path) -> None:
+    with ResumeJournal(tmp_path) as journal:
+        journal.record("first", 48, tmp_path / "first.png")
+    journal_path = tmp_path / JOURNAL_FILENAME
+    with journal_path.open("ab") as f:
+        f.write(b'{"id":"torn","size":48,"pa')
+
+    with ResumeJournal(tmp_path) as journal:
+        assert journal.get_path("torn", 48) is None
+        journal.record("second", 48, tmp_path / "second.png")
+
+    assert set(load_journal_entries(journal_path)) == {("first", 48), ("second", 48)}
+
+
+def test_rerun_skips_completed_downloads(
+    run_cli: Callable[..., Result],
+    server: StandInServer,
+    tmp_path: Path,
+) -> None:
+    target = tmp_path / "icons"
+    run_cli("download", "-d", str(target), "-S", "ios", "-s", "48", "-C", "-q")
+    files = {path: path.read_bytes() for path in target.glob("*.png")}
+    assert len(files) == 250
+
+    # Lose one file; only it is downloaded again, under the same name
+    lost = sorted(files)[7]
+    lost.unlink()
+    requests = server.requests
+    run_cli("download", "-d", str(target), "-S", "ios", "-s", "48", "-C", "-q")
+
+    # Three listing pages and the lost icon
+    assert server.requests - requests == 3 + 1
+    assert {path: path.read_bytes() for path in target.glob("*.png")} == files
+
+
+def test_no_resume_downloads_everything_again(
+    run_cli: Callable[..., Result],
+    server: StandInServer,
+    tmp_path: Path,
+) -> None:
+    target = tmp_path / "icons"
+    run_cli("download", "-d", str(target), "-S", "ios", "-s", "48", "-C", "-q")
+    requests = server.requests
+
+    run_cli("download", "-d", str(target), "-S", "ios", "-s", "48", "-C", "-q", "--no-resume")
+
+    assert server.requests - requests == 3 + 250
+
+
+def test_revalidate_keeps_unchanged_icons(
+    run_cli: Callable[..., Result],
+    server: StandInServer,
+    tmp_path: Path,
+) -> None:
+    target = tmp_path / "icons"
+    run_cli("download", "-d", str(target), "-S", "ios", "-s", "48", "-C", "-q")
+    files = _file_versions(target)
+    requests = server.requests
+
+    # Every icon is requested with its ETag, and the 304s leave files in place
+    run_cli("download", "-d", str(target), "-S", "ios", "-s", "48", "-C", "-q", "--revalidate")
+
+    assert server.requests - requests == 3 + 250
+    assert _file_versions(target) == files
+
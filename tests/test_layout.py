@@ -0,0 +1,114 @@
+"""Tests of file name assignment, the persisted name index and layouts."""
+
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+from click.testing import Result
+from server import StandInServer
+
+from icons8_download_cli.layout import NAME_INDEX_FILENAME, NameIndex, shard_name
+
+
+def test_collisions_get_numbered_names(tmp_path: Path) -> None:
+    index = NameIndex(tmp_path, persist=False)
+
+    paths = [
+        index.assign(tmp_path, name, f"id-{n}")
+        for n, name in enumerate(["home", "Home", "home"])
+    ]
+
+    assert [path.name for path in paths] == ["home.png", "Home(1).png", "home(2).png"]
+
+
+def test_existing_files_are_avoided_and_gaps_filled(tmp_path: Path) -> None:
+    for name in ("home.png", "home(2).png", "home(5).png"):
+        (tmp_path / name).write_bytes(b"")
+    index = NameIndex(tmp_path, persist=False)
+
+    names = [index.assign(tmp_path, "home", f"id-{n}").name for n in range(4)]
+
+    assert names == ["home(1).png", "home(3).png", "home(4).png", "home(6).png"]
+
+
+def test_an_icon_keeps_its_name(tmp_path: Path) -> None:
+    index = NameIndex(tmp_path, persist=False)
+    first = index.assign(tmp_path, "home", "a")
+    second = index.assign(tmp_path, "home", "b")
+
+    assert index.assign(tmp_path, "home", "b") == second
+    assert index.assign(tmp_path, "home", "a") == first
+    # A renamed icon gets a name based on its new name
+    assert index.assign(tmp_path, "house", "a").name == "house.png"
+
+
+def test_index_is_reloaded_instead_of_rescanning(tmp_path: Path) -> None:
+    directory = tmp_path / "ho"
+    index = NameIndex(tmp_path)
+    assigned = {icon_id: index.assign(directory, "home", icon_id) for icon_id in "abc"}
+    index.flush()
+    # Files created by other programs after the scan are not noticed
+    directory.mkdir()
+    (directory / "home(3).png").write_bytes(b"")
+
+    reloaded = NameIndex(tmp_path)
+
+    assert {icon_id: reloaded.assign(directory, "home", icon_id) for icon_id in "cba"} == assigned
+    assert reloaded.assign(directory, "home", "d").name == "home(3).png"
+
+
+def test_truncated_index_line_is_skipped(tmp_path: Path) -> None:
+    index = NameIndex(tmp_path)
+    home = index.assign(tmp_path, "home", "a")
+    index.flush()
+    with (tmp_path / NAME_INDEX_FILENAME).open("ab") as f:
+        f.write(b'[".","home(1).p')
+
+    reloaded = NameIndex(tmp_path)
+    assert reloaded.assign(tmp_path, "home", "a") == home
+    assert reloaded.assign(tmp_path, "home", "b").name == "home(1).png"
+    reloaded.flush()
+
+    assert NameIndex(tmp_path).assign(tmp_path, "home", "b").name == "home(1).png"
+
+
+def test_claim_keeps_free_names(tmp_path: Path) -> None:
+    index = NameIndex(tmp_path, persist=False)
+    index.assign(tmp_path, "home", "a")
+
+    assert index.claim(tmp_path / "home(4).png", "b").name == "home(4).png"
+    assert index.claim(tmp_path / "home(4).png", "c").name == "home(1).png"
+    assert index.claim(tmp_path / "home.png", "a").name == "home.png"
+
+
+@pytest.mark.parametrize(
+    ("layout", "expected"),
+    [("flat", ""), ("prefix", "h_"), ("hash", "86")],
+)
+def test_shard_names(layout: str, expected: str) -> None:
+    assert shard_name(layout, "H-ome", "a") == expected
+
+
+def test_unknown_layout_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        shard_name("tree", "home", "a")
+
+
+def test_prefix_layout_run_reuses_its_index(
+    run_cli: Callable[..., Result],
+    server: StandInServer,
+    tmp_path: Path,
+) -> None:
+    target = tmp_path / "icons"
+    options = ("-d", str(target), "-S", "ios", "-s", "48", "-C", "-q", "--layout", "prefix")
+    run_cli("download", *options)
+    files = sorted(path.relative_to(target) for path in target.rglob("*.png"))
+
+    assert len(files) == 250
+    assert {path.parent.name for path in files} == {"ic"}
+    assert (target / NAME_INDEX_FILENAME).is_file()
+
+    # Without the journal, names still come from the persisted index
+    run_cli("download", *options, "--no-resume")
+
+    assert sorted(path.relative_to(target) for path in target.rglob("*.png")) == files
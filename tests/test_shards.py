@@ -0,0 +1,97 @@
+"""Tests of shard assignment and of merging shard outputs."""
+
+from collections import Counter
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+from click.testing import Result
+from server import StandInServer
+
+from icons8_download_cli.shards import Shard, get_shard_index, merge_shards, parse_shard
+
+
+def _files(directory: Path) -> dict[Path, bytes]:
+    """Contents of the icons below a directory by relative path."""
+    return {
+        path.relative_to(directory): path.read_bytes()
+        for path in directory.rglob("*.png")
+    }
+
+
+def test_shard_index_is_stable() -> None:
+    # A stable hash: the same on every machine, process and Python version
+    assert [get_shard_index(icon_id, 4) for icon_id in ("home-id", "ios-0", "ios-1")] == [3, 1, 4]
+
+
+def test_icons_are_spread_evenly_over_shards() -> None:
+    counts = Counter(get_shard_index(f"icon-{n}", 4) for n in range(8000))
+
+    assert sorted(counts) == [1, 2, 3, 4]
+    assert all(1800 < count < 2200 for count in counts.values())
+
+
+def test_every_icon_is_owned_by_exactly_one_shard() -> None:
+    shards = [Shard(number, 3) for number in (1, 2, 3)]
+
+    for n in range(300):
+        assert sum(shard.owns(f"icon-{n}") for shard in shards) == 1
+
+
+def test_parse_shard() -> None:
+    assert parse_shard(" 2/4 ") == Shard(2, 4)
+    assert str(parse_shard("1/1")) == "1/1"
+    assert parse_shard("3/4").manifest_filename == "icons8-manifest-3-of-4.jsonl"
+
+
+@pytest.mark.parametrize("text", ["0/4", "5/4", "2", "-1/4", "a/b", "1/0"])
+def test_invalid_shards_are_rejected(text: str) -> None:
+    with pytest.raises(ValueError):
+        parse_shard(text)
+
+
+def test_merged_shards_match_an_unsharded_run(
+    run_cli: Callable[..., Result],
+    server: StandInServer,
+    tmp_path: Path,
+) -> None:
+    options = ("-S", "ios", "-s", "48,96", "-q")
+    run_cli("download", "-d", str(tmp_path / "whole"), *options)
+    for number in (1, 2):
+        part = str(tmp_path / f"part{number}")
+        run_cli("download", "-d", part, *options, "--shard", f"{number}/2")
+    part_files = [_files(tmp_path / f"part{number}") for number in (1, 2)]
+    assert part_files[0] and part_files[1]
+    assert not set(part_files[0]) & set(part_files[1])
+
+    merged = str(tmp_path / "merged")
+    run_cli("merge", str(tmp_path / "part1"), str(tmp_path / "part2"), "-d", merged)
+
+    assert _files(tmp_path / "merged") == _files(tmp_path / "whole")
+    # The merged journals let a rerun in the merged directory skip every icon
+    requests = server.requests
+    run_cli("download", "-d", merged, *options, "-C")
+    assert server.requests - requests == 3
+
+
+def test_merge_reports_missing_shards(
+    run_cli: Callable[..., Result],
+    server: StandInServer,
+    tmp_path: Path,
+) -> None:
+    part = tmp_path / "part1"
+    run_cli("download", "-d", str(part), "-S", "ios", "-s", "48", "-q", "--shard", "1/3")
+
+    result = merge_shards([part], tmp_path / "merged")
+
+    assert (result.shard_count, result.shards) == (3, [1])
+    assert result.merged == len(_files(part))
+    assert result.missing == result.failed == result.renamed == 0
+    assert result.consistent
+
+
+def test_merge_requires_manifests(tmp_path: Path) -> None:
+    (tmp_path / "part1").mkdir()
+
+    with pytest.raises(ValueError):
+        merge_shards([tmp_path / "part1"], tmp_path / "merged")
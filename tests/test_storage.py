@@ -0,0 +1,164 @@
+"""Tests of atomic writes, the fsync policy and stale temporary files."""
+
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from icons8_download_cli import storage
+from icons8_download_cli.storage import (
+    FileWriter,
+    SyncPolicy,
+    configure_fsync,
+    is_temp_name,
+    remove_stale_temp_files,
+)
+
+
+@pytest.fixture
+def fsync_calls(monkeypatch: pytest.MonkeyPatch) -> list[int]:
+    """Count os.fsync calls without syncing anything."""
+    calls: list[int] = []
+    monkeypatch.setattr(os, "fsync", calls.append)
+    return calls
+
+
+def _write(file_path: Path, data: bytes) -> None:
+    """Write a file the way downloads are written."""
+    writer = FileWriter(file_path, len(data))
+    writer.write(data)
+    writer.commit()
+
+
+def test_file_appears_only_when_committed(tmp_path: Path) -> None:
+    file_path = tmp_path / "icons" / "home.png"
+    writer = FileWriter(file_path)
+    writer.write(b"first ")
+    writer.write(b"second")
+
+    assert not file_path.exists()
+    (temp_name,) = os.listdir(file_path.parent)
+    assert is_temp_name(temp_name)
+
+    writer.commit()
+
+    assert file_path.read_bytes() == b"first second"
+    assert os.listdir(file_path.parent) == ["home.png"]
+
+
+def test_replaced_file_is_intact_until_commit(tmp_path: Path) -> None:
+    file_path = tmp_path / "home.png"
+    file_path.write_bytes(b"old")
+    writer = FileWriter(file_path)
+    writer.write(b"new")
+
+    assert file_path.read_bytes() == b"old"
+    writer.commit()
+    assert file_path.read_bytes() == b"new"
+
+
+def test_abort_keeps_the_previous_file(tmp_path: Path) -> None:
+    file_path = tmp_path / "home.png"
+    file_path.write_bytes(b"old")
+    writer = FileWriter(file_path)
+    writer.write(b"partial")
+
+    writer.abort()
+
+    assert file_path.read_bytes() == b"old"
+    assert os.listdir(tmp_path) == ["home.png"]
+
+
+def test_failed_commit_removes_the_temporary_file(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    def fail(source: Path, target: Path) -> None:
+        raise OSError("disk full")
+
+    writer = FileWriter(tmp_path / "home.png")
+    writer.write(b"data")
+    monkeypatch.setattr(os, "replace", fail)
+
+    with pytest.raises(OSError, match="disk full"):
+        writer.commit()
+    assert os.listdir(tmp_path) == []
+
+
+def test_fsync_off_never_syncs(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    fsync_calls: list[int],
+) -> None:
+    monkeypatch.setattr(storage, "sync_policy", SyncPolicy("off"))
+
+    for n in range(3):
+        _write(tmp_path / f"{n}.png", b"data")
+    storage.sync_policy.flush()
+
+    assert fsync_calls == []
+
+
+def test_fsync_always_syncs_each_file_and_directory(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    fsync_calls: list[int],
+) -> None:
+    monkeypatch.setattr(storage, "sync_policy", SyncPolicy("always"))
+
+    for n in range(3):
+        _write(tmp_path / f"{n}.png", b"data")
+
+    assert len(fsync_calls) == 3 * 2
+    assert storage.sync_policy.files_synced == 3
+
+
+def test_fsync_batch_syncs_full_batches_and_flushes_the_rest(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    fsync_calls: list[int],
+) -> None:
+    monkeypatch.setattr(storage, "sync_policy", SyncPolicy("batch", batch_size=4))
+    directories = [tmp_path / "a", tmp_path / "b"]
+
+    for n in range(6):
+        _write(directories[n % 2] / f"{n}.png", b"data")
+    # One batch of four files in two directories
+    assert len(fsync_calls) == 4 + 2
+    assert storage.sync_policy.files_synced == 4
+
+    storage.sync_policy.flush()
+    assert len(fsync_calls) == 6 + 2 + 2
+    assert storage.sync_policy.files_synced == 6
+
+
+def test_configure_fsync_flushes_and_validates(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    fsync_calls: list[int],
+) -> None:
+    monkeypatch.setattr(storage, "sync_policy", SyncPolicy("batch"))
+    _write(tmp_path / "home.png", b"data")
+    assert fsync_calls == []
+
+    configure_fsync("off")
+
+    assert len(fsync_calls) == 2
+    assert storage.sync_policy.mode == "off"
+    with pytest.raises(ValueError):
+        configure_fsync("sometimes")
+
+
+def test_only_stale_temporary_files_are_removed(tmp_path: Path) -> None:
+    stale = tmp_path / f".home.png.{'0' * 32}.tmp"
+    fresh = tmp_path / f".user.png.{'1' * 32}.tmp"
+    other = tmp_path / ".home.png.tmp"
+    for path in (stale, fresh, other):
+        path.write_bytes(b"")
+    an_hour_ago = time.time() - 3600
+    os.utime(stale, (an_hour_ago, an_hour_ago))
+    os.utime(other, (an_hour_ago, an_hour_ago))
+
+    assert remove_stale_temp_files(tmp_path, time.time() - 60) == 1
+    assert sorted(os.listdir(tmp_path)) == sorted([fresh.name, other.name])